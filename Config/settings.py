@@ -17,20 +17,76 @@ class Config:
     EMAIL_ADDRESS = os.getenv('EMAIL_ADDRESS')
     EMAIL_PASSWORD = os.getenv('EMAIL_PASSWORD')
     EMAIL_DAILY_LIMIT = int(os.getenv('EMAIL_DAILY_LIMIT'))
+    SMTP_HOST = os.getenv('SMTP_HOST', 'smtp.gmail.com')
+    SMTP_PORT = int(os.getenv('SMTP_PORT', '465'))
+    SMTP_POOL_SIZE = int(os.getenv('SMTP_POOL_SIZE', '3'))
+    SMTP_MAX_MESSAGES_PER_CONNECTION = int(os.getenv('SMTP_MAX_MESSAGES_PER_CONNECTION', '100'))
+    SMTP_IDLE_TIMEOUT = int(os.getenv('SMTP_IDLE_TIMEOUT', '60'))
+    EMAIL_WORKERS = int(os.getenv('EMAIL_WORKERS', '3'))
+    EMAIL_RATE_PER_SECOND = float(os.getenv('EMAIL_RATE_PER_SECOND', '0.5'))
+    EMAIL_RATE_BURST = int(os.getenv('EMAIL_RATE_BURST', '1'))
 
     #CONFIGURATIONS FOR GOOGLE SHEETS
     GOOGLE_SHEETS_CREDENTIALS = (BASE_DIR / os.getenv('GOOGLE_SHEETS_CREDENTIALS')).resolve()
     SALES_SHEET_NAME = os.getenv('SALES_SHEET_NAME')
     SOCIAL_SHEET_NAME = os.getenv('SOCIAL_SHEET_NAME')
+    SHEETS_CACHE_TTL = int(os.getenv('SHEETS_CACHE_TTL', '300'))
+    SHEETS_WRITE_BATCH_SIZE = int(os.getenv('SHEETS_WRITE_BATCH_SIZE', '150'))
+    SHEETS_WRITE_FLUSH_SECONDS = int(os.getenv('SHEETS_WRITE_FLUSH_SECONDS', '30'))
+    SHEETS_MIRROR_ENABLED = os.getenv('SHEETS_MIRROR_ENABLED', 'true').lower() == 'true'
+    SHEETS_MIRROR_PATH = DATA_DIR / 'sheets_mirror.db'
+    SHEETS_MIRROR_MAX_AGE = int(os.getenv('SHEETS_MIRROR_MAX_AGE', '120'))
+    SHEETS_MIRROR_SYNC_SECONDS = int(os.getenv('SHEETS_MIRROR_SYNC_SECONDS', '60'))
+
+    #STORAGE BACKEND: 'sheets' (Google Sheets) or 'sqlite' (local database)
+    STORAGE_BACKEND = os.getenv('STORAGE_BACKEND', 'sheets')
+    STORAGE_DB_PATH = DATA_DIR / os.getenv('STORAGE_DB_NAME', 'storage.db')
+
+    #Daily send counters shared by the scheduler and API processes
+    QUOTA_DB_PATH = DATA_DIR / os.getenv('QUOTA_DB_NAME', 'quotas.db')
+
+    #Post metrics over time; each post is re-fetched less often as it ages
+    METRICS_DB_PATH = DATA_DIR / os.getenv('METRICS_DB_NAME', 'metrics.db')
+    METRICS_COLLECT_SECONDS = int(os.getenv('METRICS_COLLECT_SECONDS', '3600'))
+    METRICS_MIN_INTERVAL = int(os.getenv('METRICS_MIN_INTERVAL', '3600'))
+    METRICS_MAX_INTERVAL = int(os.getenv('METRICS_MAX_INTERVAL', '86400'))
+    METRICS_STALE_DAYS = int(os.getenv('METRICS_STALE_DAYS', '30'))
+
+    #Scheduler process started by the API, remembered across API restarts
+    BOT_PID_FILE = DATA_DIR / 'bot.pid'
+    #Written by the scheduler once it can take SIGUSR1 wakes without dying
+    BOT_READY_FILE = DATA_DIR / 'bot.ready'
+    BOT_STATUS_TTL = float(os.getenv('BOT_STATUS_TTL', '2'))
+    BOT_OUTPUT_LINES = int(os.getenv('BOT_OUTPUT_LINES', '2000'))
+    BOT_AUTO_RESTART = os.getenv('BOT_AUTO_RESTART', 'true').lower() == 'true'
+    BOT_RESTART_BACKOFF = float(os.getenv('BOT_RESTART_BACKOFF', '1'))
+    BOT_RESTART_MAX_DELAY = float(os.getenv('BOT_RESTART_MAX_DELAY', '300'))
+    #A run at least this long counts as healthy and resets the backoff
+    BOT_STABLE_SECONDS = float(os.getenv('BOT_STABLE_SECONDS', '60'))
 
     #CONFIGURATIONS FOR FACEBOOK/INSTAGRAM (META) API
     META_ACCESS_TOKEN = os.getenv('META_ACCESS_TOKEN')
+    #Graph batch calls: sub-requests per call (API max 50), chunks in flight, retry rounds
+    GRAPH_BATCH_SIZE = min(50, int(os.getenv('GRAPH_BATCH_SIZE', '50')))
+    GRAPH_BATCH_WORKERS = int(os.getenv('GRAPH_BATCH_WORKERS', '4'))
+    GRAPH_BATCH_RETRIES = int(os.getenv('GRAPH_BATCH_RETRIES', '2'))
     
     FACEBOOK_PAGE_ID = os.getenv('FACEBOOK_PAGE_ID')
     FACEBOOK_DAILY_LIMIT = int(os.getenv('FACEBOOK_DAILY_LIMIT'))
+    FACEBOOK_WORKERS = int(os.getenv('FACEBOOK_WORKERS', '3'))
+    FACEBOOK_RATE_PER_SECOND = float(os.getenv('FACEBOOK_RATE_PER_SECOND', '0.5'))
+    FACEBOOK_RATE_BURST = int(os.getenv('FACEBOOK_RATE_BURST', '5'))
     
     INSTAGRAM_ACCOUNT_ID = os.getenv('INSTAGRAM_ACCOUNT_ID')
     INSTAGRAM_DAILY_LIMIT = int(os.getenv('INSTAGRAM_DAILY_LIMIT'))
+    #Workers mostly wait on media processing, so several containers can be in flight
+    INSTAGRAM_WORKERS = int(os.getenv('INSTAGRAM_WORKERS', '4'))
+    INSTAGRAM_RATE_PER_SECOND = float(os.getenv('INSTAGRAM_RATE_PER_SECOND', '0.5'))
+    INSTAGRAM_RATE_BURST = int(os.getenv('INSTAGRAM_RATE_BURST', '5'))
+    #Media container status polling: first delay, backoff cap and overall timeout in seconds
+    INSTAGRAM_POLL_INITIAL = float(os.getenv('INSTAGRAM_POLL_INITIAL', '0.5'))
+    INSTAGRAM_POLL_MAX_DELAY = float(os.getenv('INSTAGRAM_POLL_MAX_DELAY', '10'))
+    INSTAGRAM_CONTAINER_TIMEOUT = float(os.getenv('INSTAGRAM_CONTAINER_TIMEOUT', '300'))
 
     #Configurations for LinkedIn API
     LINKEDIN_ACCESS_TOKEN = os.getenv('LINKEDIN_ACCESS_TOKEN')
@@ -41,8 +97,17 @@ class Config:
     #LOGGING CONFIGURATIONS
     LOG_FILE = LOGS_DIR / 'automation.log'
     ACTIVITY_LOG = LOGS_DIR / 'activity.csv'
+    ACTIVITY_DB_PATH = LOGS_DIR / 'activity.db'
+    LOG_ARCHIVE_DIR = LOGS_DIR / 'archive'
+    LOG_MAX_BYTES = int(os.getenv('LOG_MAX_MB', '10')) * 1024 * 1024
+    LOG_ROTATE_HOURS = int(os.getenv('LOG_ROTATE_HOURS', '24'))
     LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO')
 
+    #SCHEDULER: sleeps until the next job, these only bound how stale it can get
+    SCHEDULER_MAX_SLEEP = int(os.getenv('SCHEDULER_MAX_SLEEP', '3600'))
+    SCHEDULER_REFRESH_SECONDS = int(os.getenv('SCHEDULER_REFRESH_SECONDS', '300'))
+    SCHEDULER_STATS_PATH = LOGS_DIR / 'scheduler_stats.json'
+
     @classmethod
     def validate(cls):
         #validating required configuration
@@ -1,20 +1,29 @@
-from flask import Flask, jsonify, request, send_from_directory
+from flask import Flask, Response, jsonify, request, send_from_directory
 from flask_cors import CORS
 import sys
 from pathlib import Path
-import csv
 import json
 import subprocess
-import psutil
 import os 
 import signal
 from datetime import datetime
 from datetime import timedelta
+from collections import deque
+from functools import wraps
 from werkzeug.utils import secure_filename
 
 sys.path.insert(0, str(Path(__file__).parent.parent))
 from Config import Config
 from src.database.sheets_manager import SheetsManager
+from src.utils.quota_store import get_quota_store
+from src.utils.activity_store import get_activity_store
+from src.utils.metrics_store import get_metrics_store
+from src.utils.log_reader import tail_lines, tail_csv
+from src.utils.log_rotation import LogArchive
+from src.utils.activity_tail import ActivityTailCache
+from src.utils.events import EventBroker, ChangeFeed, format_sse
+from src.utils.response_cache import ResponseCache
+from src.utils.bot_supervisor import BotSupervisor
 
 
 app = Flask(__name__)
@@ -29,8 +38,15 @@ app.config['UPLOAD_FOLDER'] = str(UPLOAD_FOLDER)
 app.config['MAX_CONTENT_LENGTH'] = 100 * 1024 * 1024  # 100 MB limit
 
 #global state
-bot_process = None
 sheets_manager = None
+#Tracks the scheduler process by PID file instead of scanning the process table
+bot = BotSupervisor(Path(__file__).parent.parent / 'run_scheduler.py')
+#Last-24h activity counts, kept current by reading only newly appended rows
+activity_cache = ActivityTailCache(Config.ACTIVITY_LOG)
+#Dashboard push updates: one change feed, fanned out to every /api/events client
+event_broker = EventBroker()
+#Serialized GET responses, reused until the data they were built from changes
+response_cache = ResponseCache()
 
 def init_manager():
     #Initialize managers
@@ -38,6 +54,7 @@ def init_manager():
     if sheets_manager is None:
         try:
             sheets_manager = SheetsManager()
+            sheets_manager.start_background_sync()
         except Exception as e:
             print(f"Warning: Could not initialize SheetsManager: {e}")
             return False
@@ -46,7 +63,58 @@ def init_manager():
 def allowed_file(filename):
     #Chceck if the file has an allowed extension
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
-            
+
+def sheet_version(sheet_name):
+    #Mirror revision, or None when there is no fresh mirror to vouch for cached rows
+    if not init_manager() or sheets_manager.mirror is None:
+        return None
+    if sheets_manager.mirror.is_stale(sheet_name):
+        return None
+    return sheets_manager.mirror.revision(sheet_name)
+
+def cached_json(version):
+    """Serve a GET view through response_cache with ETags.
+
+    version() returns whatever the view's output depends on; while it is unchanged
+    the stored body is reused, and a matching If-None-Match gets an empty 304.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            key = (request.endpoint, tuple(sorted(request.args.items(multi=True))), tuple(sorted(kwargs.items())))
+            try:
+                current = version()
+            except Exception as e:
+                print(f"Warning: could not read version for {request.endpoint}: {e}")
+                current = None
+
+            cached = response_cache.get(key, current)
+            if cached is None:
+                response = app.make_response(view(*args, **kwargs))
+                #Errors are never cached
+                if response.status_code != 200:
+                    return response
+                etag = response_cache.put(key, current, response.get_data(), response.mimetype)
+            else:
+                etag, body, mimetype = cached
+                response = Response(body, mimetype=mimetype)
+
+            response.set_etag(etag)
+            #Clients may keep the body but must revalidate before using it
+            response.headers['Cache-Control'] = 'no-cache'
+            if request.if_none_match.contains_weak(etag):
+                response_cache.count_not_modified()
+                return Response(status=304, headers={
+                    'ETag': response.headers['ETag'],
+                    'Cache-Control': 'no-cache'
+                })
+            return response
+        return wrapper
+    return decorator
+
+def current_minute():
+    #For views that depend on the clock (sliding windows, "upcoming" filters)
+    return datetime.now().strftime('%Y-%m-%dT%H:%M')
 
 
 # HEALTH AND STATUS ENDPOINTS
@@ -62,7 +130,14 @@ def health_check():
             'api': 'running',
             'sheets': 'connected' if sheets_manager else 'disconnected', 
             'bot': 'running' if check_bot_running() else 'stopped'
-        }
+        },
+        'sheets_cache': sheets_manager.cache_stats() if sheets_manager else None,
+        'sheets_mirror': sheets_manager.mirror.stats() if sheets_manager and sheets_manager.mirror else None,
+        'activity_cache': activity_cache.stats(),
+        'events': {**event_broker.stats(), 'feed': change_feed.stats()},
+        'response_cache': response_cache.stats(),
+        'bot_supervisor': bot.stats(),
+        'scheduler': read_scheduler_stats()
     })           
 
 @app.route('/api/status', methods=['GET'])
@@ -72,127 +147,154 @@ def get_status():
     uptime = get_uptime() if is_running else 0
 
     return jsonify({
-        'status': 'running' if is_running else 'stopped',
+        'status': 'running' if is_running else ('restarting' if bot.restart_pending else 'stopped'),
         'last_sync': datetime.now().isoformat(),
         'uptime': uptime,
-        'uptime_formatted': format_uptime(uptime)
+        'uptime_formatted': format_uptime(uptime),
+        'restarts': bot.restarts,
+        'last_exit_code': bot.last_exit_code
     })
 
 
 #DASHBOARD ENDPOINTS
 
 @app.route('/api/quotas', methods=['GET'])
+@cached_json(lambda: (
+    #Same sources as quota_payload(), read before the body so a cached body is never older than its key
+    activity_cache.version(),
+    tuple(sorted(get_quota_store().usage().items())),
+    current_minute()
+))
 def get_quotas():
     #Get quota usage for all platforms
-    activity = analyze_activity_log()
+    return jsonify(quota_payload())
 
-    return jsonify({
+def quota_payload():
+    #'used' is read straight from the shared quota store, the log only splits success/failed
+    activity = activity_cache.counts()
+    used = get_quota_store().usage()
+
+    return {
         'email':{
-            'used': activity['Email']['Success'] + activity['Email']['Failed'],
+            'used': used.get('email', 0),
             'limit': Config.EMAIL_DAILY_LIMIT,
             'success': activity['Email']['Success'],
             'failed': activity['Email']['Failed']
         },
         'facebook':{
-            'used': activity['Facebook']['Success'] + activity['Facebook']['Failed'],
+            'used': used.get('facebook', 0),
             'limit': Config.FACEBOOK_DAILY_LIMIT,
             'success': activity['Facebook']['Success'],
             'failed': activity['Facebook']['Failed']
         },
         'Instagram':{
-          'used': activity['Instagram']['Success'] + activity['Instagram']['Failed'],
+          'used': used.get('instagram', 0),
           'limit': Config.INSTAGRAM_DAILY_LIMIT,
           'success': activity['Instagram']['Success'],
           'failed': activity['Instagram']['Failed']
         }
-    })
+    }
 
 @app.route('/api/activity/recent', methods=['GET'])
 def get_recent_activity():
     limit = request.args.get('limit', 50, type=int)
+    #Byte offset from a previous page's X-Next-Before header, for older entries
+    before = request.args.get('before', None, type=int)
 
     log_file = Config.ACTIVITY_LOG
     if not log_file.exists():
         return jsonify([])
     
     activities = []
+    cursor = None
     try:
-        with open(log_file, 'r', encoding='utf-8') as f:
-            reader = csv.DictReader(f)
-            rows = list(reader)
+        #Seeks back from the end of the file, only the requested rows are read
+        rows, cursor = tail_csv(log_file, limit, before)
 
-            #Get last N activities
-            for row in reversed(rows[-limit:]):
-                try:
-                    timestamp = datetime.fromisoformat(row['Timestamp'])
-                    activities.append({
-                        'time': timestamp.strftime('%I:%M %p'),
-                        'datetime': timestamp.isoformat(),
-                        'type': row['Type'],
-                        'status': row['Status'],
-                        'details': row['Details']
-                    })
-                except:
-                    continue
+        for row in rows:
+            try:
+                activities.append(format_activity(row))
+            except:
+                continue
     except Exception as e:
         print(f"Error reading activity log: {e}")
     
-    return jsonify(activities)
+    response = jsonify(activities)
+    if cursor is not None:
+        response.headers['X-Next-Before'] = str(cursor)
+    return response
+
+def format_activity(row):
+    timestamp = datetime.fromisoformat(row['Timestamp'])
+    return {
+        'time': timestamp.strftime('%I:%M %p'),
+        'datetime': timestamp.isoformat(),
+        'type': row['Type'],
+        'status': row['Status'],
+        'details': row['Details']
+    }
 
 @app.route('/api/stats/weekly', methods=['GET'])
+@cached_json(lambda: (get_activity_store().version(), datetime.now().strftime('%Y-%m-%d')))
 def get_weekly_stats():
     stats = []
     today = datetime.now()
+    #One query for the whole week instead of a log scan per day
+    days = get_activity_store().daily_counts(today - timedelta(days=6), today)
 
     for i in range(7):
         day = today - timedelta(days=6-i)
-        day_stats = get_day_stats(day)
+        counts = days.get(day.strftime('%Y-%m-%d'))
         stats.append({
             'day': day.strftime('%a'),
             'data': day.strftime('%Y-%m-%d'),
-            'emails':day_stats['emails'],
-            'posts': day_stats['posts']
+            'emails': counts['Email']['Success'] if counts else 0,
+            'posts': sum(counts[t]['Success'] for t in ('Facebook', 'Instagram', 'LinkedIn')) if counts else 0
         })
     return jsonify(stats)
 
 @app.route('/api/engagement', methods=['GET'])
+@cached_json(lambda: get_metrics_store().version())
 def get_engagement():
-    #In production, fetch from platform APIs
-    #Returns mock data for now
-    return jsonify([{'platform': 'Facebook', 'Likes': 120, 'comments': 45, 'shares': 23},
-                    {'platform': 'Instagram', 'Likes': 350, 'comments': 89, 'shares': 67}])
+    #Latest collected metrics per post, summed per platform
+    try:
+        return jsonify(get_metrics_store().engagement())
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
 
 
 #Social Media Post Endpoints
 
 @app.route('/api/posts', methods=['GET'])
+@cached_json(lambda: sheet_version(Config.SOCIAL_SHEET_NAME))
 def get_scheduled_posts():
     if not init_manager():
         return jsonify({'error': 'sheets manager not initialized'}), 500
     
     try:
         posts = sheets_manager.get_social_post()
-
-        formatted_posts = []
-        for idx, post in enumerate(posts):
-            formatted_posts.append({
-                'id': idx + 1,
-                'platform': post.get('Platform', ''),
-                'caption': post.get('Text', ''),
-                'hashtags': post.get('Hashtags', ''),
-                'date': post.get('Date', ''),
-                'time': post.get('Time', ''),
-                'status': post.get('Status', 'Pending'),
-                'media': post.get('Media', None),
-                'posted_time': post.get('Posted Time', ''),
-                'post_id': post.get('Post ID', '')
-            })
-
-        return jsonify(formatted_posts)
+        return jsonify(format_posts(posts))
 
     except Exception as e:
         return jsonify({'error': str(e)}), 500
     
+def format_posts(posts):
+    formatted_posts = []
+    for idx, post in enumerate(posts):
+        formatted_posts.append({
+            'id': idx + 1,
+            'platform': post.get('Platform', ''),
+            'caption': post.get('Text', ''),
+            'hashtags': post.get('Hashtags', ''),
+            'date': post.get('Date', ''),
+            'time': post.get('Time', ''),
+            'status': post.get('Status', 'Pending'),
+            'media': post.get('Media', None),
+            'posted_time': post.get('Posted Time', ''),
+            'post_id': post.get('Post ID', '')
+        })
+    return formatted_posts
+
 @app.route('/api/posts', methods=['POST'])
 def create_scheduled_post():
     if not init_manager():
@@ -227,8 +329,6 @@ def create_scheduled_post():
                     return jsonify({'error': 'Instagram requires an image or video'}), 400
                 
                 #Add to google sheets
-                sheet = sheets_manager.client.open(Config.SOCIAL_SHEET_NAME).sheet1
-
                 # Prepare row data
                 new_row = [
                     scheduled_date,
@@ -242,8 +342,12 @@ def create_scheduled_post():
                     ''
                 ]
 
-                #Append to sheet 
-                sheet.append_row(new_row)
+                #Append to sheet (and the local mirror)
+                if not sheets_manager.append_row(Config.SOCIAL_SHEET_NAME, new_row):
+                    return jsonify({'error': 'Failed to add post to sheet'}), 500
+
+                #Let the scheduler queue the new post time instead of finding it later
+                bot.wake()
 
                 return jsonify({
                     'success': True,
@@ -258,6 +362,7 @@ def create_scheduled_post():
                     }), 201
             
     except Exception as e:
+        sheets_manager.handle_error(Config.SOCIAL_SHEET_NAME, e)
         return jsonify({'error': str(e)}), 500
     
 @app.route('/api/posts/<int:post_id>', methods=['DELETE'])
@@ -266,11 +371,11 @@ def delete_scheduled_post(post_id):
         return jsonify({'error': 'Sheets manager not initialized'}), 500
     
     try:
-        sheet= sheets_manager.client.open(Config.SOCIAL_SHEET_NAME).sheet1
-
         #Delete row
         row_num = post_id + 1
-        sheet.delete_rows(row_num)
+        if not sheets_manager.delete_row(Config.SOCIAL_SHEET_NAME, row_num):
+            return jsonify({'error': 'Failed to delete post'}), 500
+        bot.wake()
 
         return jsonify({
             'success': True,
@@ -279,6 +384,7 @@ def delete_scheduled_post(post_id):
 
 
     except Exception as e:
+        sheets_manager.handle_error(Config.SOCIAL_SHEET_NAME, e)
         return jsonify({'error': str(e)}), 500
     
 @app.route('/api/posts/<int:post_id>', methods=['PUT'])
@@ -288,18 +394,21 @@ def update_scheduled_post(post_id):
 
     try:
         data = request.get_json()
-        sheet = sheets_manager.client.open(Config.SOCIAL_SHEET_NAME).sheet1
         
         row_num = post_id + 1
         
-        if 'caption' in data:
-            sheet.update_cell(row_num, 4, data['caption'])
-        if 'hashtags' in data:
-            sheet.update_cell(row_num, 6, data['hashtags'])
-        if 'scheduleDate' in data:
-            sheet.update_cell(row_num, 1, data['scheduleDate'])
-        if 'scheduleTime' in data:
-            sheet.update_cell(row_num, 2, data['scheduleTime'])
+        #Map request keys to sheet headers, written as one batched range update
+        field_map = {
+            'caption': 'Text',
+            'hashtags': 'Hashtags',
+            'scheduleDate': 'Date',
+            'scheduleTime': 'Time'
+        }
+        fields = {header: data[key] for key, header in field_map.items() if key in data}
+
+        if not sheets_manager.update_fields(row_num, fields, sheet_name=Config.SOCIAL_SHEET_NAME):
+            return jsonify({'error': 'Failed to update post'}), 500
+        bot.wake()
         
         return jsonify({
             'success': True,
@@ -308,6 +417,7 @@ def update_scheduled_post(post_id):
 
 
     except Exception as e:
+        sheets_manager.handle_error(Config.SOCIAL_SHEET_NAME, e)
         return jsonify({'error': str(e)}), 500
     
 #File upload endpoints
@@ -351,6 +461,7 @@ def uploaded_file(filename):
 
 
 @app.route('/api/campaigns/sales', methods=['GET'])
+@cached_json(lambda: sheet_version(Config.SALES_SHEET_NAME))
 def get_sales_campaigns():
     """Get sales campaign status"""
     if not init_manager():
@@ -392,6 +503,7 @@ def get_sales_campaigns():
         return jsonify({'error': str(e), 'campaigns': []}), 500
 
 @app.route('/api/campaigns/social', methods=['GET'])
+@cached_json(lambda: social_schedule_version())
 def get_social_schedule():
     """Get upcoming scheduled social media posts"""
     if not init_manager():
@@ -426,33 +538,29 @@ def get_social_schedule():
         return jsonify({'error': str(e)}), 500
 
 
+def social_schedule_version():
+    #"Upcoming" depends on the time as well as the sheet
+    revision = sheet_version(Config.SOCIAL_SHEET_NAME)
+    return None if revision is None else (revision, current_minute())
+
+
 #Bot Control Endpoints
 
 
 @app.route('/api/bot/start', methods=['POST'])
 def start_bot():
     """Start the automation bot"""
-    global bot_process
-    
     if check_bot_running():
         return jsonify({'error': 'Bot is already running'}), 400
     
     try:
         # Start bot process
-        python_path = sys.executable
-        script_path = Path(__file__).parent.parent / 'run_scheduler.py'
-        
-        bot_process = subprocess.Popen(
-            [python_path, str(script_path)],
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-            cwd=str(script_path.parent)
-        )
+        pid = bot.start()
         
         return jsonify({
             'status': 'success',
             'message': 'Bot started successfully',
-            'pid': bot_process.pid
+            'pid': pid
         })
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -460,22 +568,13 @@ def start_bot():
 @app.route('/api/bot/stop', methods=['POST'])
 def stop_bot():
     """Stop the automation bot"""
-    global bot_process
-    
     if not check_bot_running():
         return jsonify({'error': 'Bot is not running'}), 400
     
     try:
-        # Kill bot processes
+        # Terminates the bot and waits for it to exit
         killed = kill_bot_processes()
         
-        if bot_process:
-            try:
-                bot_process.terminate()
-                bot_process.wait(timeout=5)
-            except:
-                bot_process.kill()
-        
         return jsonify({
             'status': 'success',
             'message': f'Bot stopped successfully (killed {killed} processes)'
@@ -487,11 +586,9 @@ def stop_bot():
 def restart_bot():
     """Restart the automation bot"""
     try:
-        # Stop if running
+        # Stop if running, stop() returns once the old process has exited
         if check_bot_running():
-            stop_bot()
-            import time
-            time.sleep(2)
+            kill_bot_processes()
         
         # Start
         return start_bot()
@@ -546,12 +643,137 @@ def test_connections():
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+#LIVE UPDATES
+
+#Bounded so a feed that falls behind drops the oldest rows instead of growing
+_new_activity = deque(maxlen=1000)
+_feed_state = {'usage': None, 'posts_revision': None, 'posts': None}
+
+def _collect_activity(rows):
+    #Called by activity_cache whenever it reads new rows, whoever triggered the read.
+    #Nobody drains the queue until an SSE client has started the feed, so only collect while it runs.
+    if change_feed.running:
+        _new_activity.extend(rows)
+
+activity_cache.on_rows = _collect_activity
+
+def activity_changes():
+    #New activity rows and, when anything moved, a fresh quota snapshot
+    activity_cache.refresh()
+    rows = []
+    while _new_activity:
+        rows.append(_new_activity.popleft())
+    events = []
+    if rows:
+        formatted = []
+        for row in rows:
+            try:
+                formatted.append(format_activity(dict(zip(['Timestamp', 'Type', 'Status', 'Details'], row))))
+            except (KeyError, ValueError):
+                continue
+        if formatted:
+            events.append(('activity', formatted))
+
+    usage = get_quota_store().usage()
+    if rows or usage != _feed_state['usage']:
+        _feed_state['usage'] = usage
+        events.append(('quotas', quota_payload()))
+    return events
+
+def post_changes():
+    #Posts whose status changed; the mirror revision makes the no-change case one small query
+    if sheets_manager is None:
+        return []
+    mirror = sheets_manager.mirror
+    revision = mirror.revision(Config.SOCIAL_SHEET_NAME) if mirror else None
+    if revision is not None and revision == _feed_state['posts_revision']:
+        return []
+    _feed_state['posts_revision'] = revision
+
+    posts = {post['id']: post for post in format_posts(sheets_manager.get_social_post())}
+    previous, _feed_state['posts'] = _feed_state['posts'], posts
+    if previous is None:
+        return []
+    changed = [post for post_id, post in posts.items() if previous.get(post_id) != post]
+    removed = [post_id for post_id in previous if post_id not in posts]
+    if not changed and not removed:
+        return []
+    return [('posts', {'changed': changed, 'removed': removed})]
+
+change_feed = ChangeFeed(event_broker, {'activity': activity_changes, 'posts': post_changes})
+
+@app.route('/api/events', methods=['GET'])
+def stream_events():
+    """Server-Sent Events: activity, quotas and posts deltas as the bot records them"""
+    init_manager()
+    change_feed.start()
+    last_event_id = request.headers.get('Last-Event-ID', type=int)
+    subscription = event_broker.subscribe(last_event_id)
+
+    def generate():
+        try:
+            yield 'retry: 5000\n\n'
+            while True:
+                event = subscription.get(timeout=15)
+                if event is None:
+                    #Comment line keeps proxies from closing an idle stream
+                    yield ': keep-alive\n\n'
+                else:
+                    yield format_sse(event)
+        finally:
+            subscription.close()
+
+    return Response(generate(), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'
+    })
+
+@app.route('/api/activity/history', methods=['GET'])
+def get_activity_history():
+    """Activity rows or counts for a time window, across archived segments"""
+    try:
+        start = datetime.fromisoformat(request.args['start']) if 'start' in request.args else None
+        end = datetime.fromisoformat(request.args['end']) if 'end' in request.args else None
+    except ValueError:
+        return jsonify({'error': 'start and end must be ISO timestamps'}), 400
+    limit = request.args.get('limit', 500, type=int)
+    archive = LogArchive(Config.ACTIVITY_LOG)
+
+    try:
+        if request.args.get('counts') == 'true':
+            return jsonify({'counts': archive.counts(start, end)})
+
+        activities = []
+        for row in archive.iter_rows(start, end):
+            activities.append({
+                'datetime': row['Timestamp'],
+                'type': row['Type'],
+                'status': row['Status'],
+                'details': row['Details']
+            })
+            if len(activities) >= limit:
+                break
+        return jsonify({'activities': activities, 'truncated': len(activities) >= limit})
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
 @app.route('/api/logs', methods=['GET'])
 def get_logs():
     """Get recent logs"""
     lines = request.args.get('lines', 100, type=int)
-    log_type = request.args.get('type', 'main')  # main or activity
+    log_type = request.args.get('type', 'main')  # main, activity or bot
+    before = request.args.get('before', None, type=int)
     
+    if log_type == 'bot':
+        #Captured stdout/stderr of the bot process this API started
+        log_lines, cursor = bot.output(lines, before)
+        return jsonify({
+            'logs': [line + '\n' for line in log_lines],
+            'next_before': cursor,
+            'restarts': bot.restarts,
+            'last_exit_code': bot.last_exit_code
+        })
+
     if log_type == 'activity':
         log_file = Config.ACTIVITY_LOG
     else:
@@ -561,9 +783,11 @@ def get_logs():
         return jsonify({'logs': []})
     
     try:
-        with open(log_file, 'r', encoding='utf-8') as f:
-            log_lines = f.readlines()
-            return jsonify({'logs': log_lines[-lines:]})
+        log_lines, cursor = tail_lines(log_file, lines, before)
+        return jsonify({
+            'logs': [line + '\n' for line in log_lines],
+            'next_before': cursor
+        })
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -573,38 +797,22 @@ def get_logs():
 
 def check_bot_running():
     """Check if bot process is running"""
-    for proc in psutil.process_iter(['pid', 'name', 'cmdline']):
-        try:
-            cmdline = proc.info['cmdline']
-            if cmdline and 'run_scheduler.py' in ' '.join(cmdline):
-                return True
-        except (psutil.NoSuchProcess, psutil.AccessDenied):
-            continue
-    return False
+    return bot.is_running()
 
 def kill_bot_processes():
     """Kill all bot processes"""
-    killed = 0
-    for proc in psutil.process_iter(['pid', 'name', 'cmdline']):
-        try:
-            cmdline = proc.info['cmdline']
-            if cmdline and 'run_scheduler.py' in ' '.join(cmdline):
-                proc.terminate()
-                killed += 1
-        except (psutil.NoSuchProcess, psutil.AccessDenied):
-            continue
-    return killed
+    return bot.stop()
 
 def get_uptime():
     """Get bot uptime in seconds"""
-    for proc in psutil.process_iter(['pid', 'name', 'cmdline', 'create_time']):
-        try:
-            cmdline = proc.info['cmdline']
-            if cmdline and 'run_scheduler.py' in ' '.join(cmdline):
-                return int(datetime.now().timestamp() - proc.info['create_time'])
-        except (psutil.NoSuchProcess, psutil.AccessDenied):
-            continue
-    return 0
+    return bot.status()['uptime']
+
+def read_scheduler_stats():
+    """Job lateness and run counts written by the scheduler process"""
+    try:
+        return json.loads(Config.SCHEDULER_STATS_PATH.read_text(encoding='utf-8'))
+    except (OSError, ValueError):
+        return None
 
 def format_uptime(seconds):
     """Format uptime in human readable format"""
@@ -617,74 +825,6 @@ def format_uptime(seconds):
         minutes = (seconds % 3600) // 60
         return f"{hours}h {minutes}m"
 
-def analyze_activity_log():
-    """Analyze activity log for last 24 hours"""
-    log_file = Config.ACTIVITY_LOG
-    
-    if not log_file.exists():
-        return {
-            'Email': {'Success': 0, 'Failed': 0},
-            'Facebook': {'Success': 0, 'Failed': 0},
-            'Instagram': {'Success': 0, 'Failed': 0},
-            'LinkedIn': {'Success': 0, 'Failed': 0}
-        }
-    
-    cutoff_time = datetime.now() - timedelta(hours=24)
-    counts = {
-        'Email': {'Success': 0, 'Failed': 0},
-        'Facebook': {'Success': 0, 'Failed': 0},
-        'Instagram': {'Success': 0, 'Failed': 0},
-        'LinkedIn': {'Success': 0, 'Failed': 0}
-    }
-    
-    try:
-        with open(log_file, 'r', encoding='utf-8') as f:
-            reader = csv.DictReader(f)
-            for row in reader:
-                try:
-                    timestamp = datetime.fromisoformat(row['Timestamp'])
-                    if timestamp > cutoff_time:
-                        activity_type = row['Type']
-                        status = row['Status']
-                        if activity_type in counts:
-                            counts[activity_type][status] = counts[activity_type].get(status, 0) + 1
-                except:
-                    continue
-    except Exception as e:
-        print(f"Error analyzing activity log: {e}")
-    
-    return counts
-
-def get_day_stats(date):
-    """Get statistics for a specific day"""
-    log_file = Config.ACTIVITY_LOG
-    
-    if not log_file.exists():
-        return {'emails': 0, 'posts': 0}
-    
-    day_start = date.replace(hour=0, minute=0, second=0, microsecond=0)
-    day_end = day_start + timedelta(days=1)
-    
-    stats = {'emails': 0, 'posts': 0}
-    
-    try:
-        with open(log_file, 'r', encoding='utf-8') as f:
-            reader = csv.DictReader(f)
-            for row in reader:
-                try:
-                    timestamp = datetime.fromisoformat(row['Timestamp'])
-                    if day_start <= timestamp < day_end and row['Status'] == 'Success':
-                        if row['Type'] == 'Email':
-                            stats['emails'] += 1
-                        elif row['Type'] in ['Facebook', 'Instagram', 'LinkedIn']:
-                            stats['posts'] += 1
-                except:
-                    continue
-    except Exception as e:
-        print(f"Error getting day stats: {e}")
-    
-    return stats
-
 #error handlers
 
 
@@ -707,9 +847,6 @@ def shutdown_handler(signum, frame):
     print("\nShutting down API server...")
     
     # Kill bot processes
-    if bot_process:
-        bot_process.terminate()
-    
     kill_bot_processes()
     
     sys.exit(0)
@@ -734,8 +871,11 @@ if __name__ == '__main__':
     print("  GET  /api/status              - Bot status")
     print("  GET  /api/quotas              - API quota usage")
     print("  GET  /api/activity/recent     - Recent activity")
+    print("  GET  /api/activity/history    - Activity across archived logs")
+    print("  GET  /api/events              - Live updates (Server-Sent Events)")
     print("  GET  /api/posts               - Scheduled posts")
     print("  POST /api/posts               - Create post")
+    print("  GET  /api/logs?type=bot       - Bot process output")
     print("  POST /api/bot/start           - Start bot")
     print("  POST /api/bot/stop            - Stop bot")
     print("=" * 60)
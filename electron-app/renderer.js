@@ -6,10 +6,34 @@ window.addEventListener('DOMContentLoaded', async () => {
     API_URL = await window.electronAPI.getAPIURL();
     loadDashboard();
     loadScheduledPosts();
-    //Auto-refresh dashboard every 30 seconds
-    setInterval(loadDashboard, 30000);
+    //Live updates pushed by the API instead of polling
+    subscribeToEvents();
 });
 
+//Server-Sent Events: the API pushes deltas when the bot records something
+function subscribeToEvents() {
+    const events = new EventSource(`${API_URL}/api/events`);
+
+    events.addEventListener('quotas', (e) => renderQuotas(JSON.parse(e.data)));
+
+    events.addEventListener('activity', (e) => {
+        //Newest first, like /api/activity/recent
+        recentActivities = JSON.parse(e.data).reverse().concat(recentActivities).slice(0, 10);
+        renderActivities(recentActivities);
+    });
+
+    events.addEventListener('posts', () => loadScheduledPosts());
+
+    //We fell behind or reconnected too late to replay, fetch everything once
+    events.addEventListener('resync', () => {
+        loadDashboard();
+        loadScheduledPosts();
+    });
+
+    //EventSource reconnects by itself and resumes from Last-Event-ID
+    events.onerror = (error) => console.error('Event stream error:', error);
+}
+
 //Tab switching
 function switchTab(tabName, event) {
     //hide all tabs
@@ -30,6 +54,33 @@ function switchTab(tabName, event) {
     event.target.classList.remove('border-transparent', 'text-gray-600');
 };
 
+let recentActivities = [];
+
+function renderQuotas(quotas) {
+    //update quota displays
+    document.getElementById('email-used').textContent = quotas.email.used;
+    document.getElementById('email-limit').textContent = quotas.email.limit;
+    document.getElementById('fb-used').textContent = quotas.facebook.used;
+    document.getElementById('fb-limit').textContent = quotas.facebook.limit;
+    document.getElementById('ig-used').textContent = quotas.Instagram.used;
+    document.getElementById('ig-limit').textContent = quotas.Instagram.limit;
+}
+
+function renderActivities(activities) {
+    const activitiesList = document.getElementById('recent-activities-list');
+    activitiesList.innerHTML = activities.map( a => {
+        return `<div class="p-3 bg-gray-50 rounded flex justify-between items-center">
+                    <div>
+                <span class="text-sm text-gray-500">${a.time}</span>
+                <span class="ml-3 font-medium">${a.type}</span>
+                <span class="ml-2 text-sm text-gray-600">${a.details}</span>
+            </div>
+            <span class="px-3 py-1 rounded-full text-sm ${a.status === 'Success' ? 'bg-green-100 text-green-700' : 'bg-red-100 text-red-700'}">
+                ${a.status}
+            </span>
+        </div>`}).join('');
+}
+
 //Load dashboard data
 async function loadDashboard() {
     try {
@@ -40,32 +91,12 @@ async function loadDashboard() {
         }
 
         const quotas = await response.json();
-
-
-        //update quota displays
-        document.getElementById('email-used').textContent = quotas.email.used;
-        document.getElementById('email-limit').textContent = quotas.email.limit;
-        document.getElementById('fb-used').textContent = quotas.facebook.used;
-        document.getElementById('fb-limit').textContent = quotas.facebook.limit;
-        document.getElementById('ig-used').textContent = quotas.Instagram.used;
-        document.getElementById('ig-limit').textContent = quotas.Instagram.limit;
+        renderQuotas(quotas);
         
         //load recent activities
         const activitiesResponse = await fetch(`${API_URL}/api/activity/recent?limit=10`);
-        const activities = await activitiesResponse.json();
-
-        const activitiesList = document.getElementById('recent-activities-list');
-        activitiesList.innerHTML = activities.map( a => {
-            return `<div class="p-3 bg-gray-50 rounded flex justify-between items-center">
-                        <div>
-                    <span class="text-sm text-gray-500">${a.time}</span>
-                    <span class="ml-3 font-medium">${a.type}</span>
-                    <span class="ml-2 text-sm text-gray-600">${a.details}</span>
-                </div>
-                <span class="px-3 py-1 rounded-full text-sm ${a.status === 'Success' ? 'bg-green-100 text-green-700' : 'bg-red-100 text-red-700'}">
-                    ${a.status}
-                </span>
-            </div>`}).join('');       
+        recentActivities = await activitiesResponse.json();
+        renderActivities(recentActivities);
     }
     catch (error) {
         console.error('Error loading dashboard:', error);
@@ -23,7 +23,7 @@ def run_social():
 def collect_metrics():
     #Collecting social media metrics
     try:
-        campaign = SalesCampaign()
+        campaign = SocialCampaign()
         campaign.collect_metrics()
     except Exception as e:
         logger.error(f"Metrics collection error: {e}")
@@ -45,7 +45,7 @@ if __name__ == "__main__":
             run_sales()
         elif command == "social":
             run_social()
-        elif command == "merics":
+        elif command == "metrics":
             collect_metrics()
         else:
             print("Usage: python main.py [sales| social| metrics]")
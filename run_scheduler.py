@@ -1,25 +1,80 @@
-import schedule
-import time
-from main import run_social, run_sales, collect_metrics
+import os
+import signal
+from pathlib import Path
+
+if __name__ == "__main__" and hasattr(signal, 'SIGUSR1'):
+    #SIGUSR1 ends a process by default and the API sends it whenever posts change, so it is
+    #handled before the slow imports below. A wake this early needs no replay: main() loads posts on start.
+    signal.signal(signal.SIGUSR1, signal.SIG_IGN)
+    #Tells the API it is now safe to signal this process
+    _ready_file = Path(os.environ.get('BOT_READY_FILE') or Path(__file__).parent / 'data' / 'bot.ready')
+    _ready_file.parent.mkdir(parents=True, exist_ok=True)
+    _ready_file.write_text(str(os.getpid()))
+
+from datetime import datetime
+from Config import Config
+from main import run_sales, collect_metrics
+from src.campaigns.social_campaign import SocialCampaign
+from src.utils.scheduler import EventScheduler
 from src.utils.logger import logger
 
+_social = None
+
+def social_campaign():
+    #One long-lived campaign, so its post index is updated incrementally rather than rebuilt
+    global _social
+    if _social is None:
+        _social = SocialCampaign()
+    return _social
+
+def schedule_posts(scheduler):
+    #Arm a single timer for the next pending post
+    try:
+        campaign = social_campaign()
+        campaign.refresh_schedule()
+    except Exception as e:
+        logger.error(f"Could not load posts to schedule: {e}")
+        return None
+
+    when = campaign.next_post_time()
+    if when is None:
+        scheduler.cancel('next_post')
+        return None
+    scheduler.once(max(when, datetime.now()), lambda: run_due_posts(scheduler), name='next_post')
+    return when
+
+def run_due_posts(scheduler):
+    #Post whatever is due now, then re-arm for the next one
+    try:
+        social_campaign().run()
+    except Exception as e:
+        logger.error(f"Social campaign error: {e}")
+    schedule_posts(scheduler)
+
 def main():
     #setup and run scheduler
+    scheduler = EventScheduler(max_sleep=Config.SCHEDULER_MAX_SLEEP, stats_path=Config.SCHEDULER_STATS_PATH)
 
     #schedule tasks
-    schedule.every().day.at("09:00").do(run_sales)
-    schedule.every(30).minutes.do(run_social)
-    schedule.every().day.at("18:00").do(collect_metrics)
+    scheduler.daily("09:00", run_sales)
+    #Hourly tick; each post is only fetched when its age-based refresh is due
+    scheduler.every(Config.METRICS_COLLECT_SECONDS, collect_metrics)
+    #Safety net for platforms without SIGUSR1, picks up posts added since the last wake
+    scheduler.every(Config.SCHEDULER_REFRESH_SECONDS, lambda: schedule_posts(scheduler), name='refresh_posts')
+
+    #The API sends SIGUSR1 after posts are created or edited
+    scheduler.on_wake = lambda: schedule_posts(scheduler)
+    if hasattr(signal, 'SIGUSR1'):
+        signal.signal(signal.SIGUSR1, lambda signum, frame: scheduler.wake())
 
     logger.info("Automation Scheduler Started")
     logger.info("="*50)
     logger.info("Sales campaigns: Daily at 09:00")
-    logger.info("Social posts: Every 30 minutes")
-    logger.info("Metrics collection: Daily at 18:00")
-    while True:
-        schedule.run_pending()
-        time.sleep(60)
+    logger.info("Social posts: At their scheduled times")
+    logger.info(f"Metrics collection: Every {Config.METRICS_COLLECT_SECONDS // 60} minutes")
+    schedule_posts(scheduler)
+    scheduler.run_forever()
+
 
-    
 if __name__=="__main__":
     main()
@@ -0,0 +1,149 @@
+import sys
+import time
+import tempfile
+import argparse
+from datetime import datetime
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from Config import Config
+from src.database.backends import SQLiteBackend
+from src.database.sheets_manager import SheetsManager
+from src.campaigns.sales_campaign import SalesCampaign
+from src.campaigns.social_campaign import SocialCampaign
+
+
+def make_leads(count):
+    #Synthetic leads shaped like the Sales Leads sheet
+    return [
+        {
+            'Name': f'Lead {i}',
+            'Email': f'lead{i}@example.com',
+            'Company': f'Company {i % 500}',
+            'Industry': 'SaaS',
+            'Status': 'Pending',
+            'Last Contact': '',
+            'Stage': i % 3
+        }
+        for i in range(count)
+    ]
+
+
+def make_posts(count, when):
+    #Synthetic posts all due at `when`, split across the two publishing platforms
+    return [
+        {
+            'Date': when.strftime('%Y-%m-%d'),
+            'Time': when.strftime('%H:%M'),
+            'Platform': 'Facebook' if i % 2 else 'Instagram',
+            'Text': f'Post {i}',
+            'Media': f'https://example.com/{i}.jpg',
+            'Hashtags': '#benchmark',
+            'Status': 'Pending',
+            'Posted Time': '',
+            'Post ID': ''
+        }
+        for i in range(count)
+    ]
+
+
+class StubEmailClient:
+    #Accepts every email instantly, so the run measures rendering, dispatch and storage
+    def send(self, to_email, subject, body_html):
+        return True
+
+    def close(self):
+        pass
+
+
+class StubSocialClient:
+    def __init__(self, platform_name):
+        self.platform_name = platform_name
+        self.posted = 0
+
+    def post(self, text, media_path=None):
+        self.posted += 1
+        return f"{self.platform_name.lower()}_{self.posted}"
+
+
+class NoLimit:
+    def acquire(self, timeout=None):
+        return True
+
+
+def timed(label, func, operations):
+    start = time.perf_counter()
+    result = func()
+    elapsed = time.perf_counter() - start
+    rate = operations / elapsed if elapsed else float('inf')
+    print(f"{label:<32} {elapsed:8.3f}s  {rate:12,.0f} ops/s")
+    return result
+
+
+def run_benchmark(lead_count):
+    #Exercise the same SheetsManager calls a sales run makes, against a throwaway SQLite file
+    print("=" * 60)
+    print(f"STORAGE BENCHMARK ({lead_count:,} leads, SQLite backend)")
+    print("=" * 60)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        backend = SQLiteBackend(Path(tmp) / 'benchmark.db')
+        manager = SheetsManager(backend=backend)
+        sheet = Config.SALES_SHEET_NAME
+
+        timed("Seed leads", lambda: backend.append_records(sheet, make_leads(lead_count)), lead_count)
+        leads = timed("Read all leads", manager.get_sales_leads, lead_count)
+
+        def update_all():
+            with manager.buffered_writes():
+                for i in range(len(leads)):
+                    manager.update_lead_status(i + 2, 'Contacted', 1)
+
+        timed("Buffered status updates", update_all, lead_count)
+        timed("Unbuffered status updates", lambda: [
+            manager.update_lead_status(i + 2, 'Contacted', 2) for i in range(min(lead_count, 1000))
+        ], min(lead_count, 1000))
+
+        backend.close()
+
+
+def run_campaign_benchmark(lead_count, post_count):
+    #Whole SalesCampaign/SocialCampaign runs against SQLite, with stubbed senders and no pacing
+    print("=" * 60)
+    print(f"CAMPAIGN BENCHMARK ({lead_count:,} leads, {post_count:,} posts, SQLite backend)")
+    print("=" * 60)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        #Point every local store at the throwaway directory and pick the SQLite backend
+        Config.STORAGE_BACKEND = 'sqlite'
+        Config.STORAGE_DB_PATH = Path(tmp) / 'benchmark.db'
+        Config.QUOTA_DB_PATH = Path(tmp) / 'quotas.db'
+        Config.METRICS_DB_PATH = Path(tmp) / 'metrics.db'
+
+        sales = SalesCampaign()
+        sales.email = sales.dispatcher.email = StubEmailClient()
+        sales.dispatcher.limiter = NoLimit()
+        sales.sheets.backend.append_records(Config.SALES_SHEET_NAME, make_leads(lead_count))
+        timed("Sales campaign run", sales.run, lead_count)
+        print(f"  {sales.dispatcher.stats()['sent']:,} emails sent")
+
+        social = SocialCampaign()
+        social.clients = {'facebook': StubSocialClient('Facebook'), 'instagram': StubSocialClient('Instagram')}
+        social.dispatcher.platforms = {key: (NoLimit(), workers) for key, (_, workers) in social.dispatcher.platforms.items()}
+        social.sheets.backend.append_records(Config.SOCIAL_SHEET_NAME, make_posts(post_count, datetime.now()))
+        timed("Social campaign run", social.run, post_count)
+        print(f"  {sum(client.posted for client in social.clients.values()):,} posts published")
+
+        sales.sheets.backend.close()
+        social.sheets.backend.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the local storage backend")
+    parser.add_argument('--leads', type=int, default=100000)
+    parser.add_argument('--campaign-leads', type=int, default=10000)
+    parser.add_argument('--posts', type=int, default=2000)
+    args = parser.parse_args()
+    run_benchmark(args.leads)
+    run_campaign_benchmark(args.campaign_leads, args.posts)
@@ -6,38 +6,21 @@ sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from Config import Config
 from src.utils.logger import logger
-import csv
+from src.utils.quota_store import get_quota_store
+from src.utils.activity_store import get_activity_store, normalize_status
+from src.utils.log_reader import tail_csv
+from src.utils.log_rotation import LogArchive
 
 def analyze_activity_log():
-    #Analyze recent activity from log
-    log_file = Config.ACTIVITY_LOG
-    
-    if not log_file.exists():
-        print("No activity log found")
-        return {}
-    
-    # Count activities in last 24 hours
-    cutoff_time = datetime.now() - timedelta(hours=24)
-    counts = {
-        'Email': {'Success': 0, 'Failed': 0},
-        'Facebook': {'Success': 0, 'Failed': 0},
-        'Instagram': {'Success': 0, 'Failed': 0}
-    }
-    
-    with open(log_file, 'r') as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            try:
-                timestamp = datetime.fromisoformat(row['Timestamp'])
-                if timestamp > cutoff_time:
-                    activity_type = row['Type']
-                    status = row['Status']
-                    if activity_type in counts:
-                        counts[activity_type][status] = counts[activity_type].get(status, 0) + 1
-            except:
-                continue
-    
-    return counts
+    #Activity counts for the last 24 hours, read from the hourly rollups
+    return get_activity_store().last_24_hours()
+
+def recent_failures(limit=5, scan=500):
+    #Latest failed activity rows, read backwards from the end of the log
+    if not Config.ACTIVITY_LOG.exists():
+        return []
+    rows, _ = tail_csv(Config.ACTIVITY_LOG, scan)
+    return [row for row in rows if normalize_status(row.get('Status', '')) == 'Failed'][:limit]
 
 def print_quota_report():
     #Print quota usage report
@@ -47,11 +30,12 @@ def print_quota_report():
     print("=" * 60)
     
     counts = analyze_activity_log()
+    used = get_quota_store().usage()
     
     # Email
     print("\\n📧 EMAIL (Gmail)")
     print("-" * 60)
-    email_used = counts['Email']['Success'] + counts['Email']['Failed']
+    email_used = used.get('email', 0)
     email_limit = Config.EMAIL_DAILY_LIMIT
     email_pct = (email_used / email_limit * 100) if email_limit > 0 else 0
     print(f"Used: {email_used}/{email_limit} ({email_pct:.1f}%)")
@@ -63,7 +47,7 @@ def print_quota_report():
     # Facebook
     print("\\n📘 FACEBOOK")
     print("-" * 60)
-    fb_used = counts['Facebook']['Success'] + counts['Facebook']['Failed']
+    fb_used = used.get('facebook', 0)
     fb_limit = Config.FACEBOOK_DAILY_LIMIT
     fb_pct = (fb_used / fb_limit * 100) if fb_limit > 0 else 0
     print(f"Used: {fb_used}/{fb_limit} ({fb_pct:.1f}%)")
@@ -75,7 +59,7 @@ def print_quota_report():
     # Instagram
     print("\\n📷 INSTAGRAM")
     print("-" * 60)
-    ig_used = counts['Instagram']['Success'] + counts['Instagram']['Failed']
+    ig_used = used.get('instagram', 0)
     ig_limit = Config.INSTAGRAM_DAILY_LIMIT
     ig_pct = (ig_used / ig_limit * 100) if ig_limit > 0 else 0
     print(f"Used: {ig_used}/{ig_limit} ({ig_pct:.1f}%)")
@@ -102,5 +86,18 @@ def print_quota_report():
     if success_rate < 95:
         print("\\n⚠️  WARNING: Success rate below 95%! Investigate failures.")
 
+    #Last 7 days across rotated segments, whole segments are answered from their index
+    week = LogArchive(Config.ACTIVITY_LOG).counts(datetime.now() - timedelta(days=7))
+    if week:
+        print("\\nLast 7 days:")
+        for activity_type, by_status in sorted(week.items()):
+            print(f"  {activity_type}: {by_status.get('Success', 0)} success, {by_status.get('Failed', 0)} failed")
+
+    failures = recent_failures()
+    if failures:
+        print("\\nRecent failures:")
+        for row in failures:
+            print(f"  {row.get('Timestamp', '')}  {row.get('Type', '')}: {row.get('Details', '')}")
+
 if __name__ == "__main__":
     print_quota_report()
\ No newline at end of file
@@ -11,6 +11,7 @@ from src.database.sheets_manager import SheetsManager
 from src.email.email_client import EmailClient
 from src.social.facebook_client import FacebookClient
 from src.social.instagram_client import InstagramClient
+from src.utils.log_rotation import LogArchive
 
 class HealthChecker:
     #System health checker
@@ -65,7 +66,9 @@ class HealthChecker:
                 'status': status,
                 'log_size_mb': round(log_size / 1024 / 1024, 2),
                 'activity_log_size_mb': round(activity_size / 1024 / 1024, 2),
-                'log_age_hours': round(log_age, 1) if log_age else None
+                'log_age_hours': round(log_age, 1) if log_age else None,
+                'log_archive': LogArchive(log_file).stats(),
+                'activity_archive': LogArchive(activity_log).stats()
             }
             
             return status == 'healthy'
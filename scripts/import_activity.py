@@ -0,0 +1,30 @@
+import sys
+import argparse
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from Config import Config
+from src.utils.activity_store import ActivityStore
+from src.utils.log_rotation import LogArchive
+
+def import_activity(csv_path):
+    #Load an existing activity.csv, and any rotated segments of it, into the activity store.
+    #Safe to re-run: events already in the store are skipped.
+    csv_path = Path(csv_path)
+    archive = LogArchive(csv_path)
+    segments = archive.segments()
+    if not csv_path.exists() and not segments:
+        print(f"No activity log found at {csv_path}")
+        return
+
+    store = ActivityStore()
+    print(f"Importing {csv_path} and {len(segments)} archived segment(s) into {store.db_path}...")
+    imported = store.import_rows(archive.iter_rows())
+    print(f"✓ Imported {imported} new activity rows ({store.event_count()} in store)")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Import activity.csv into the activity store")
+    parser.add_argument('--csv', default=str(Config.ACTIVITY_LOG))
+    args = parser.parse_args()
+    import_activity(args.csv)
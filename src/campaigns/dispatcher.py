@@ -0,0 +1,152 @@
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, as_completed, wait
+from src.utils.logger import logger
+
+
+class EmailDispatcher:
+    #Sends emails from a bounded thread pool.
+    #Pacing comes from the provider's rate limiter, so workers send as fast as
+    #the provider allows and no faster. Results are yielded back to the calling
+    #thread as they complete, which keeps sheet updates single-threaded.
+
+    def __init__(self, email_client, limiter, workers=3):
+        self.email = email_client
+        self.limiter = limiter
+        self.workers = max(1, workers)
+        self._stop = threading.Event()
+        self.sent = 0
+        self.failed = 0
+        self.skipped = 0
+        self.elapsed = 0.0
+
+    def _quota_left(self):
+        #The client's quota store holds the daily cap; send() still reserves atomically,
+        #this only stops the run early instead of trying every remaining lead
+        limit = getattr(self.email, 'daily_limit', None)
+        count = getattr(self.email, 'daily_count', None)
+        if not isinstance(limit, int) or not isinstance(count, int):
+            return True
+        return count < limit
+
+    def _send(self, job):
+        if self._stop.is_set():
+            return job, None
+
+        if not self._quota_left() or not self.limiter.acquire():
+            #Daily cap reached, nothing else in this run can go out
+            self._stop.set()
+            return job, None
+
+        return job, self.email.send(job['to'], job['subject'], job['body'])
+
+    def _collect(self, future):
+        job, success = future.result()
+        if success is None:
+            self.skipped += 1
+        elif success:
+            self.sent += 1
+        else:
+            self.failed += 1
+        return job, bool(success)
+
+    def dispatch(self, jobs):
+        #jobs: iterable of dicts with 'to', 'subject' and 'body' plus any caller context.
+        #Only a couple of jobs per worker are in flight, so huge lead lists stream through.
+        start = time.monotonic()
+        self._stop.clear()
+        try:
+            with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='email') as pool:
+                pending = set()
+                for job in jobs:
+                    if self._stop.is_set():
+                        self.skipped += 1
+                        continue
+                    pending.add(pool.submit(self._send, job))
+                    if len(pending) >= self.workers * 2:
+                        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                        for future in done:
+                            yield self._collect(future)
+
+                for future in wait(pending).done:
+                    yield self._collect(future)
+        finally:
+            self._stop.set()
+            self.elapsed += time.monotonic() - start
+            logger.info(f"Email dispatch: {self.stats()}")
+
+    def stats(self):
+        return {
+            'sent': self.sent,
+            'failed': self.failed,
+            'skipped': self.skipped,
+            'elapsed_seconds': round(self.elapsed, 1),
+            'emails_per_minute': round(self.sent / self.elapsed * 60, 1) if self.elapsed else 0,
+            'limiter': self.limiter.stats() if hasattr(self.limiter, 'stats') else None
+        }
+
+
+class PostDispatcher:
+    #Publishes a burst of social posts to every platform at once.
+    #Each platform gets its own worker pool and rate limiter, so a slow or
+    #throttled platform only holds up its own posts. As with emails, results
+    #are yielded back to the calling thread for the sheet updates.
+
+    def __init__(self, publish, platforms):
+        #publish(job) -> post id or None
+        #platforms: {key: (limiter, workers)}, unknown keys get one worker and no limiter
+        self.publish = publish
+        self.platforms = platforms
+        self.counts = {}
+        self.elapsed = 0.0
+
+    def _count(self, platform, outcome):
+        counts = self.counts.setdefault(platform, {'sent': 0, 'failed': 0, 'skipped': 0})
+        counts[outcome] += 1
+
+    def _publish(self, job, limiter):
+        if limiter is not None and not limiter.acquire():
+            return job, None, False
+        try:
+            return job, self.publish(job), True
+        except Exception as e:
+            logger.error(f"Publishing row {job.get('row')} to {job['platform']} failed: {e}")
+            return job, None, True
+
+    def dispatch(self, jobs):
+        #jobs: iterable of dicts with a 'platform' key plus any caller context.
+        #Yields (job, post_id) as posts complete, post_id is None when nothing was published.
+        start = time.monotonic()
+        pools = {}
+        futures = []
+        try:
+            for job in jobs:
+                platform = job['platform']
+                limiter, workers = self.platforms.get(platform, (None, 1))
+                if platform not in pools:
+                    pools[platform] = ThreadPoolExecutor(
+                        max_workers=max(1, workers), thread_name_prefix=f'post-{platform}'
+                    )
+                futures.append(pools[platform].submit(self._publish, job, limiter))
+
+            for future in as_completed(futures):
+                job, post_id, attempted = future.result()
+                self._count(job['platform'], 'skipped' if not attempted else 'sent' if post_id else 'failed')
+                yield job, post_id
+        finally:
+            for pool in pools.values():
+                pool.shutdown(wait=True)
+            self.elapsed += time.monotonic() - start
+            if futures:
+                logger.info(f"Post dispatch: {self.stats()}")
+
+    def stats(self):
+        return {
+            'platforms': self.counts,
+            'elapsed_seconds': round(self.elapsed, 1),
+            'limiters': {
+                platform: limiter.stats()
+                for platform, (limiter, _) in self.platforms.items()
+                if hasattr(limiter, 'stats')
+            }
+        }
@@ -0,0 +1,114 @@
+import heapq
+from datetime import datetime, timedelta
+from src.utils.logger import logger
+
+
+def scheduled_time(post):
+    #Scheduled datetime of a pending post, None when posted or unparseable
+    if post.get('Status') == 'Posted':
+        return None
+    try:
+        return datetime.strptime(f"{post['Date']} {post['Time']}", "%Y-%m-%d %H:%M")
+    except (KeyError, TypeError, ValueError):
+        return None
+
+
+class PostSchedule:
+    #Pending social posts in a heap ordered by scheduled time.
+    #update() takes the sheet rows and only re-parses and re-pushes rows that
+    #differ from what it saw last time; when the mirror revision has not moved
+    #it does nothing at all. Popping a due post and peeking at the next one
+    #are O(log n) and O(1), instead of a strptime per row per run.
+    #Superseded heap entries are skipped lazily when they reach the top.
+    #A post that failed to publish is requeued for another try within its window.
+
+    def __init__(self, grace=timedelta(minutes=5), retry_delay=timedelta(minutes=1)):
+        #A post that comes due more than `grace` ago is reported as missed, not sent
+        self.grace = grace
+        self.retry_delay = retry_delay
+        self.revision = None
+        self._heap = []
+        #row_num -> (due time or None once handed out/posted, post)
+        self._rows = {}
+        self.missed = 0
+        self.failed = 0
+
+    def __len__(self):
+        return sum(1 for when, _ in self._rows.values() if when is not None)
+
+    def update(self, posts, revision=None, now=None):
+        #Apply the current sheet rows (row 2 first), returns how many rows changed
+        if revision is not None and revision == self.revision:
+            return 0
+        now = now or datetime.now()
+        changed = 0
+        for i, post in enumerate(posts):
+            row_num = i + 2
+            current = self._rows.get(row_num)
+            if current is not None and current[1] == post:
+                continue
+            changed += 1
+            when = scheduled_time(post)
+            #Rows already past their window when first seen are not queued, as before
+            if when is not None and when < now - self.grace:
+                when = None
+            self._rows[row_num] = (when, post)
+            if when is not None:
+                heapq.heappush(self._heap, (when, row_num))
+
+        #Rows past the end were deleted (or shifted up and re-read above)
+        for row_num in [row_num for row_num in self._rows if row_num > len(posts) + 1]:
+            del self._rows[row_num]
+            changed += 1
+        self.revision = revision
+        return changed
+
+    def _valid(self, when, row_num):
+        current = self._rows.get(row_num)
+        return current is not None and current[0] == when
+
+    def next_due(self):
+        #Scheduled time of the earliest pending post, or None
+        while self._heap:
+            when, row_num = self._heap[0]
+            if self._valid(when, row_num):
+                return when
+            heapq.heappop(self._heap)
+        return None
+
+    def pop_due(self, now=None):
+        #[(row_num, post)] due at `now`, oldest first. Each post is handed out once;
+        #it only comes back if its row changes in the sheet or it is requeued.
+        now = now or datetime.now()
+        due = []
+        while self._heap and self._heap[0][0] <= now:
+            when, row_num = heapq.heappop(self._heap)
+            if not self._valid(when, row_num):
+                continue
+            post = self._rows[row_num][1]
+            self._rows[row_num] = (None, post)
+            if now - when > self.grace:
+                self.missed += 1
+                logger.warning(f"Row {row_num}: post scheduled for {when:%Y-%m-%d %H:%M} missed its window")
+                continue
+            due.append((row_num, post))
+        return due
+
+    def requeue(self, row_num, post, now=None):
+        #Retry a post that failed to publish after retry_delay, while that is still within
+        #`grace` of its scheduled time. Returns the retry time, None when it is given up.
+        now = now or datetime.now()
+        current = self._rows.get(row_num)
+        if current is None or current[0] is not None or current[1] != post:
+            #The row changed while it was publishing, update() has already indexed the new one
+            return None
+        when = scheduled_time(post)
+        retry_at = now + self.retry_delay
+        if when is None or retry_at - when > self.grace:
+            self.failed += 1
+            logger.error(f"Row {row_num}: post failed and its window has passed, not retrying")
+            return None
+        self._rows[row_num] = (retry_at, post)
+        heapq.heappush(self._heap, (retry_at, row_num))
+        logger.warning(f"Row {row_num}: post failed, retrying at {retry_at:%H:%M:%S}")
+        return retry_at
@@ -1,53 +1,96 @@
-import time
 from datetime import datetime
+from Config import Config
 from src.database.sheets_manager import SheetsManager
 from src.email.email_client import EmailClient
-from src.email.templates import EmailTemplates
+from src.database.backends import SALES_HEADERS
+from src.email.templates import CampaignTemplates
 from src.utils.logger import logger
+from src.utils.rate_limiter import get_rate_limiter
+from .dispatcher import EmailDispatcher
+
+#Outreach sequence: stage -> (template, subject, values shared by every lead)
+EMAIL_STAGES = {
+    0: ('initial', "Quick Question about {company}", {
+        'value_prop': "Increase revenue by 30%",
+        'sender_name': "Name"
+    }),
+    1: ('followup_1', "Quick Question about {company}", {
+        'similar_company': "CompanyX",
+        'result': "40% growth",
+        'sender_name': "Name"
+    }),
+    2: ('followup_2', "Quick Question about {company}", {
+        'resource_link': "https://motherhoodafrica.org",
+        'sender_name': "Name"
+    })
+}
+
+#Template placeholders filled from each lead's row
+LEAD_FIELDS = {'name': 'Name', 'company': 'Company', 'industry': 'Industry'}
 
 class SalesCampaign:
     #Manageing sales campaign
 
     def __init__(self):
+        self.templates = CampaignTemplates(
+            EMAIL_STAGES,
+            LEAD_FIELDS,
+            SALES_HEADERS,
+            defaults={'industry': 'our industry'}
+        )
         self.sheets=SheetsManager()
         self.email=EmailClient()
+        self.dispatcher = EmailDispatcher(
+            self.email,
+            get_rate_limiter('email'),
+            workers=Config.EMAIL_WORKERS
+        )
 
     def run(self):
         #Execution of sales campaigns
         logger.info("=== Starting Sales Campaign ===")
         leads = self.sheets.get_sales_leads()
 
+        try:
+            #Lead status writes are batched and flushed when the run ends or fails
+            with self.sheets.buffered_writes():
+                for job, success in self.dispatcher.dispatch(self._email_jobs(leads)):
+                    if success:
+                        self.sheets.update_lead_status(job['row'], 'Contacted', job['stage'] + 1)
+                        logger.info(f"Sent stage {job['stage']} email to {job['lead']['Name']}")
+        finally:
+            #Release pooled SMTP sessions between runs
+            self.email.close()
+
+        logger.info("=== Sales Campaign Complete ===")
+
+    def _email_jobs(self, leads):
+        #Lazily prepare one email per lead that is due, so rendering keeps pace with sending
         for i, lead in enumerate(leads):
             #Skip if contacted today
             if self._Contacted_today(lead):
                 continue
 
-            stage = int(lead.get('stage', 0))
+            try:
+                stage = int(lead.get('Stage') or 0)
+            except (TypeError, ValueError):
+                logger.warning(f"Skipping {lead.get('Email')}: invalid stage {lead.get('Stage')!r}")
+                continue
 
-            #Determine emain type
-            if stage == 0:
-                email_data = self._prepare_intitial_email(lead)
-            elif stage == 1:
-                email_data = self._prepare_followup_1(lead)
-            elif stage == 2:
-                email_data=self._prepare_followup_2(lead)
-            else:
+            if stage not in self.templates:
                 continue #campign complete
 
-            #send email
-            success = self.email.send(
-                lead['Email'],
-                email_data['subject'],
-                email_data['body']
-            )
-
-            if success:
-                self.sheets.update_lead_status(i+2, 'contacted', i+1)
-                logger.info(f"Sent stage {stage} email to {lead['Name']}")
+            email_data = self.templates.render(stage, lead)
 
-            time.sleep(10)
+            yield {
+                'to': lead['Email'],
+                'subject': email_data['subject'],
+                'body': email_data['body'],
+                'row': i + 2,
+                'stage': stage,
+                'lead': lead
+            }
 
-        logger.info("=== Sales Campaign Complete ===")
     def _Contacted_today(self, lead):
         #Check if lead was contacted today
         if lead.get('Status') != 'Contacted':
@@ -62,45 +105,3 @@ class SalesCampaign:
             return contact_date == datetime.now().date()
         except:
             return False
-        
-    def _prepare_intitial_email(self, lead):
-        return {
-            'subject': f"Quick Question about {lead['Company']}",
-            'body':EmailTemplates.get(
-                'initial', 
-                name=lead['Name'],
-                company=lead['Company'],
-                industry=lead.get('industry', 'our industry'),
-                value_prop="Increase revenue by 30%",
-                sender_name="Name"
-            )
-        }
-
-    def _prepare_followup_1(self, lead):
-        return{
-            'subject': f"Quick Question about {lead['Company']}",
-            'body':EmailTemplates.get(
-                'followup_1', 
-                name=lead['Name'],
-                similar_Company="CompanyX",
-                result="40% growth",
-                sender_name="Name"
-            )
-        }
-    
-    def _prepare_followup_2(self, lead):
-        return{
-            'subject': f"Quick Question about {lead['Company']}",
-            'body':EmailTemplates.get(
-                'followup_2', 
-                name=lead['Name'],
-                industry=lead.get('industry', 'our industry'),
-                resource_link="https://motherhoodafrica.org",
-                sender_name="Name"
-            )
-        }
-
-
-
-
-    
\ No newline at end of file
@@ -1,9 +1,13 @@
-import time
 from datetime import datetime
+from Config import Config
+from src.campaigns.dispatcher import PostDispatcher
+from src.campaigns.post_schedule import PostSchedule
 from src.database.sheets_manager import SheetsManager
 from src.social.facebook_client import FacebookClient
 from src.social.instagram_client import InstagramClient
 from src.utils.logger import logger
+from src.utils.metrics_store import get_metrics_store, parse_time
+from src.utils.rate_limiter import get_rate_limiter
 
 
 class SocialCampaign:
@@ -11,86 +15,119 @@ class SocialCampaign:
         self.sheets = SheetsManager()
         self.facebook = FacebookClient()
         self.instagram = InstagramClient()
+        #Time-ordered pending posts, kept across runs by a long-lived campaign
+        self.schedule = PostSchedule()
+        self.metrics = get_metrics_store()
+        #Platform key -> client; a new platform needs an entry here and in the rate limiter settings
+        self.clients = {'facebook': self.facebook, 'instagram': self.instagram}
+        self.dispatcher = PostDispatcher(self._publish, {
+            'facebook': (get_rate_limiter('facebook'), Config.FACEBOOK_WORKERS),
+            'instagram': (get_rate_limiter('instagram'), Config.INSTAGRAM_WORKERS)
+        })
+
+    def refresh_schedule(self):
+        #Sync the post index with the sheet; nothing is read while the mirror revision is unchanged
+        mirror = getattr(self.sheets, 'mirror', None)
+        revision = None
+        if mirror is not None and not mirror.is_stale(Config.SOCIAL_SHEET_NAME):
+            revision = mirror.revision(Config.SOCIAL_SHEET_NAME)
+            if revision == self.schedule.revision:
+                return 0
+        posts = self.sheets.get_social_post()
+        if mirror is not None and revision is None:
+            #get_social_post() just re-synced the stale mirror
+            revision = mirror.revision(Config.SOCIAL_SHEET_NAME)
+        return self.schedule.update(posts, revision)
+
+    def next_post_time(self):
+        return self.schedule.next_due()
 
     def run(self):
         #Executing social media campaign
         logger.info("=== Starting Social Media Campaign === ")
-        posts = self.sheets.get_social_post()
-        current_time = datetime.now()
-
-        for i, post in enumerate(posts):
-            if post.get('Status') == 'Posted':
-                continue
-
-            if self._is_time_to_post(post, current_time):
-                self._post_content(post, i + 2)
-                time.sleep(2)
-
-            logger.info("=== Social Media Campaign Complete ===")
-
-    def _is_time_to_post(self, post, current_time):
-        #Check if it is time to post
-
-        try:
-            scheduled_time = datetime.strptime(
-                f"{post['Date']} {post['Time']}","%Y-%m-%d %H:%M" 
-            )
-            time_diff = (current_time - scheduled_time).total_seconds()/60
-            return -5 <= time_diff <= 5
-        except:
-            return False
-        
-    def _post_content(self, post, row_num):
-        platform = post['Platform'].lower()
+        self.refresh_schedule()
+
+        jobs = [
+            {'platform': str(post.get('Platform', '')).lower(), 'row': row_num, 'post': post}
+            for row_num, post in self.schedule.pop_due(datetime.now())
+        ]
+        #Every platform publishes at once; status writes go out together after the burst
+        with self.sheets.buffered_writes():
+            for job, post_id in self.dispatcher.dispatch(jobs):
+                if post_id:
+                    self._mark_sent(job['post'], job['row'], job['platform'], post_id)
+                elif self._unpublishable(job) is None:
+                    #Network errors, refused quota and media timeouts get another try
+                    self.schedule.requeue(job['row'], job['post'])
+
+        logger.info("=== Social Media Campaign Complete ===")
+
+    def _publish(self, job):
+        #Runs on the platform's worker thread, returns the post id or None
+        post = job['post']
         text = post['Text']
         hashtags = post.get('Hashtags', '')
         media = post.get('Media', '')
         full_text = f"{text}\n\n{hashtags}".strip()
 
-        post_id = None
+        problem = self._unpublishable(job)
+        if problem:
+            logger.error(problem)
+            return None
+
+        return self.clients[job['platform']].post(full_text, media if media else None)
 
-        if platform == 'facebook':
-            post_id = self.facebook.post(full_text, media if media else None)
-            platform_name ='Facebook'
+    def _unpublishable(self, job):
+        #Why a post can never go out as the row stands, None if it can; these are not retried
+        if job['platform'] not in self.clients:
+            return f"Unknown platform: {job['platform']}"
+        if job['platform'] == 'instagram' and not job['post'].get('Media', ''):
+            return f"Row {job['row']}: Instagram requires media"
+        return None
 
-        elif platform == 'instagram':
-            if not media:
-                logger.error(f"Row {row_num}: Instagram requires media")
-                return
-            post_id = self.instagram.post(full_text, media)
-            platform_name = 'Instagram'
+    def _mark_sent(self, post, row_num, platform, post_id):
+        platform_name = self.clients[platform].platform_name
+        self.sheets.mark_post_as_sent(row_num, platform_name, post_id)
+        logger.info(f"Posted to {platform_name}: {post['Text'][:50]}...")
 
-        #elif platform =='linkedin':
-        else:
-            logger.error(f"Unknown platform: {platform}")
-            return
-        
+    def _post_content(self, post, row_num):
+        #Publish a single post straight away, outside the dispatcher
+        job = {'platform': post['Platform'].lower(), 'row': row_num, 'post': post}
+        post_id = self._publish(job)
         if post_id:
-            self.sheets.mark_post_as_sent(row_num, platform_name, post_id)
-            logger.info(f"Posted to{platform_name}: {text[:50]}...")
+            self._mark_sent(post, row_num, job['platform'], post_id)
+        return post_id
 
 
     def collect_metrics(self):
+        #Only posts due for a refresh are fetched, batched per platform and saved to the metrics store.
+        #Returns {platform: {post id: metrics or None}}
         logger.info("=== Collecting Social Metrics ===")
         posts = self.sheets.get_social_post()
 
-        for post in posts:
-            if post.get('Status') == 'Posted' and post.get('Post ID'):
-                platform = post['Platform'].lower()
-                post_id = post['Post ID']
-
-                metrics = None
-
-                if platform == 'facebook':
-                    metrics = self.facebook.get_metrics(post_id)
-                elif platform == 'instagram':
-                    metrics = self.instagram.get_metrics(post_id)
-                #LinkedIn
-
-                if metrics:
-                    logger.info(f"{platform.title()} post{post_id}:{metrics}")
-
-                time.sleep(1)
-
-                
-        
\ No newline at end of file
+        posted = [
+            (str(post.get('Platform', '')).lower(), str(post['Post ID']), parse_time(post.get('Posted Time')))
+            for post in posts
+            if post.get('Status') == 'Posted' and post.get('Post ID')
+        ]
+        #LinkedIn
+        posted = [item for item in posted if item[0] in self.clients]
+
+        post_ids = {}
+        for platform, post_id in self.metrics.due(posted):
+            post_ids.setdefault(platform, []).append(post_id)
+
+        results = {}
+        for platform, ids in post_ids.items():
+            results[platform] = self.clients[platform].get_metrics_batch(ids)
+            failed = 0
+            for post_id, metrics in results[platform].items():
+                if metrics is None:
+                    #Not marked collected, so it is retried next run
+                    failed += 1
+                    continue
+                self.metrics.record(post_id, metrics)
+                logger.info(f"{platform.title()} post{post_id}:{metrics}")
+            logger.info(f"{platform.title()} metrics: {len(ids) - failed}/{len(ids)} posts collected")
+        logger.info(f"Metrics refreshed for {sum(len(ids) for ids in post_ids.values())}/{len(posted)} posted items")
+        return results
@@ -0,0 +1,199 @@
+import csv
+import json
+import sqlite3
+import threading
+from abc import ABC, abstractmethod
+from pathlib import Path
+from Config import Config
+from src.utils.logger import logger
+
+#Column layout of the two sheets (see README), used when a local sheet has no header yet
+SALES_HEADERS = ['Name', 'Email', 'Company', 'Industry', 'Status', 'Last Contact', 'Stage']
+SOCIAL_HEADERS = ['Date', 'Time', 'Platform', 'Text', 'Media', 'Hashtags', 'Status', 'Posted Time', 'Post ID']
+
+
+class StorageBackend(ABC):
+    #Where leads and posts live. SheetsManager only talks to this interface.
+    #Rows are numbered like a spreadsheet: the header is row 1, data starts at 2.
+
+    #Remote backends are worth mirroring locally, local ones are not
+    mirrored = False
+
+    @abstractmethod
+    def headers(self, sheet_name):
+        pass
+
+    @abstractmethod
+    def read_records(self, sheet_name):
+        pass
+
+    @abstractmethod
+    def update_rows(self, sheet_name, rows):
+        #rows: {row_num: {header: value}}
+        pass
+
+    @abstractmethod
+    def append_row(self, sheet_name, values):
+        #values in column order, like gspread's append_row
+        pass
+
+    @abstractmethod
+    def delete_row(self, sheet_name, row_num):
+        pass
+
+    def resolve_fields(self, sheet_name, fields):
+        #Map caller field names onto the exact header names, tolerating case and stray spaces
+        lookup = {header.strip().lower(): header for header in self.headers(sheet_name)}
+        resolved = {}
+        for name, value in fields.items():
+            header = lookup.get(name.strip().lower())
+            if header is None:
+                raise KeyError(f"Column '{name}' not found in '{sheet_name}' header")
+            resolved[header] = value
+        return resolved
+
+    def handle_error(self, sheet_name, error):
+        pass
+
+    def stats(self):
+        return {}
+
+
+class SQLiteBackend(StorageBackend):
+    #Keeps each sheet as rows in a local SQLite file, for offline benchmarks
+    #and high-volume tenants that outgrow the Sheets API quotas
+
+    def __init__(self, db_path=None):
+        self.db_path = Path(db_path or Config.STORAGE_DB_PATH)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.RLock()
+        self._headers = {}
+        self._conn = sqlite3.connect(str(self.db_path), timeout=30, check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        with self._conn:
+            self._conn.execute('''
+                CREATE TABLE IF NOT EXISTS sheet_headers (
+                    sheet TEXT PRIMARY KEY,
+                    headers TEXT NOT NULL
+                )
+            ''')
+            self._conn.execute('''
+                CREATE TABLE IF NOT EXISTS records (
+                    sheet TEXT NOT NULL,
+                    row_num INTEGER NOT NULL,
+                    data TEXT NOT NULL,
+                    PRIMARY KEY (sheet, row_num)
+                )
+            ''')
+        logger.info(f"Using SQLite storage at {self.db_path}")
+
+    def _default_headers(self, sheet_name):
+        return {
+            Config.SALES_SHEET_NAME: SALES_HEADERS,
+            Config.SOCIAL_SHEET_NAME: SOCIAL_HEADERS
+        }.get(sheet_name, [])
+
+    def headers(self, sheet_name):
+        with self._lock:
+            if sheet_name not in self._headers:
+                row = self._conn.execute(
+                    'SELECT headers FROM sheet_headers WHERE sheet = ?', (sheet_name,)
+                ).fetchone()
+                self._headers[sheet_name] = json.loads(row[0]) if row else list(self._default_headers(sheet_name))
+            return list(self._headers[sheet_name])
+
+    def set_headers(self, sheet_name, headers):
+        headers = [h.strip() for h in headers]
+        with self._lock, self._conn:
+            self._conn.execute(
+                'INSERT OR REPLACE INTO sheet_headers (sheet, headers) VALUES (?, ?)',
+                (sheet_name, json.dumps(headers))
+            )
+            self._headers[sheet_name] = headers
+
+    def read_records(self, sheet_name):
+        headers = self.headers(sheet_name)
+        with self._lock:
+            rows = self._conn.execute(
+                'SELECT data FROM records WHERE sheet = ? ORDER BY row_num', (sheet_name,)
+            ).fetchall()
+
+        records = []
+        for (data,) in rows:
+            stored = json.loads(data)
+            records.append({header: stored.get(header, '') for header in headers})
+        return records
+
+    def update_rows(self, sheet_name, rows):
+        with self._lock, self._conn:
+            for row_num, fields in rows.items():
+                row = self._conn.execute(
+                    'SELECT data FROM records WHERE sheet = ? AND row_num = ?', (sheet_name, row_num)
+                ).fetchone()
+                if row is None:
+                    raise IndexError(f"Row {row_num} does not exist in '{sheet_name}'")
+                record = json.loads(row[0])
+                record.update(fields)
+                self._conn.execute(
+                    'UPDATE records SET data = ? WHERE sheet = ? AND row_num = ?',
+                    (json.dumps(record, default=str), sheet_name, row_num)
+                )
+
+    def append_row(self, sheet_name, values):
+        record = dict(zip(self.headers(sheet_name), values))
+        return self.append_records(sheet_name, [record])
+
+    def append_records(self, sheet_name, records):
+        #Bulk insert dict records below the last row, returns the first new row number
+        with self._lock, self._conn:
+            (last_row,) = self._conn.execute(
+                'SELECT COALESCE(MAX(row_num), 1) FROM records WHERE sheet = ?', (sheet_name,)
+            ).fetchone()
+            self._conn.executemany(
+                'INSERT INTO records (sheet, row_num, data) VALUES (?, ?, ?)',
+                (
+                    (sheet_name, last_row + i, json.dumps(record, default=str))
+                    for i, record in enumerate(records, start=1)
+                )
+            )
+        return last_row + 1
+
+    def delete_row(self, sheet_name, row_num):
+        #Shift following rows up like Sheets does, negating first to dodge key clashes
+        with self._lock, self._conn:
+            self._conn.execute(
+                'DELETE FROM records WHERE sheet = ? AND row_num = ?', (sheet_name, row_num)
+            )
+            self._conn.execute(
+                'UPDATE records SET row_num = -(row_num - 1) WHERE sheet = ? AND row_num > ?',
+                (sheet_name, row_num)
+            )
+            self._conn.execute(
+                'UPDATE records SET row_num = -row_num WHERE sheet = ? AND row_num < 0',
+                (sheet_name,)
+            )
+
+    def import_csv(self, sheet_name, csv_path):
+        #Replace a sheet with the contents of a CSV export (header row first)
+        with open(csv_path, 'r', newline='', encoding='utf-8') as f:
+            reader = csv.reader(f)
+            headers = [h.strip() for h in next(reader)]
+            records = [dict(zip(headers, row)) for row in reader]
+
+        self.set_headers(sheet_name, headers)
+        with self._lock, self._conn:
+            self._conn.execute('DELETE FROM records WHERE sheet = ?', (sheet_name,))
+        self.append_records(sheet_name, records)
+        logger.info(f"Imported {len(records)} rows from {csv_path} into '{sheet_name}'")
+        return len(records)
+
+    def stats(self):
+        with self._lock:
+            counts = self._conn.execute(
+                'SELECT sheet, COUNT(*) FROM records GROUP BY sheet'
+            ).fetchall()
+        return {'backend': 'sqlite', 'rows': dict(counts)}
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,188 @@
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from Config import Config
+from src.utils.logger import logger
+
+
+def _row_hash(record):
+    return hashlib.sha1(json.dumps(record, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+
+
+class SheetMirror:
+    #Local SQLite copy of the Sales and Social sheets.
+    #Reads are served from here while the copy is younger than max_age,
+    #syncs only rewrite rows whose hash changed, and every change bumps the
+    #sheet's revision so callers can tell when cached views are out of date.
+
+    def __init__(self, db_path=None, max_age=None):
+        self.db_path = Path(db_path or Config.SHEETS_MIRROR_PATH)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_age = Config.SHEETS_MIRROR_MAX_AGE if max_age is None else max_age
+        self._lock = threading.Lock()
+        self._init_db()
+
+    @contextmanager
+    def _connect(self):
+        #Short-lived connections keep the mirror safe to share between the
+        #scheduler and API processes
+        conn = sqlite3.connect(str(self.db_path), timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def _init_db(self):
+        with self._connect() as conn:
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS rows (
+                    sheet TEXT NOT NULL,
+                    row_num INTEGER NOT NULL,
+                    row_hash TEXT NOT NULL,
+                    data TEXT NOT NULL,
+                    PRIMARY KEY (sheet, row_num)
+                )
+            ''')
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS sync_state (
+                    sheet TEXT PRIMARY KEY,
+                    synced_at REAL NOT NULL,
+                    revision INTEGER NOT NULL DEFAULT 0,
+                    row_count INTEGER NOT NULL DEFAULT 0
+                )
+            ''')
+
+    def _state(self, conn, sheet_name):
+        return conn.execute(
+            'SELECT synced_at, revision, row_count FROM sync_state WHERE sheet = ?',
+            (sheet_name,)
+        ).fetchone()
+
+    def is_stale(self, sheet_name, max_age=None):
+        max_age = self.max_age if max_age is None else max_age
+        with self._connect() as conn:
+            state = self._state(conn, sheet_name)
+        return state is None or time.time() - state[0] > max_age
+
+    def revision(self, sheet_name):
+        with self._connect() as conn:
+            state = self._state(conn, sheet_name)
+        return state[1] if state else 0
+
+    def sync(self, sheet_name, records):
+        #Apply a fresh get_all_records() download, touching only changed rows
+        hashes = [_row_hash(record) for record in records]
+
+        with self._lock, self._connect() as conn:
+            existing = dict(conn.execute(
+                'SELECT row_num, row_hash FROM rows WHERE sheet = ?', (sheet_name,)
+            ).fetchall())
+
+            changed = [
+                (sheet_name, i + 2, row_hash, json.dumps(record, default=str))
+                for i, (record, row_hash) in enumerate(zip(records, hashes))
+                if existing.get(i + 2) != row_hash
+            ]
+            removed = sum(1 for row_num in existing if row_num > len(records) + 1)
+
+            conn.executemany(
+                'INSERT OR REPLACE INTO rows (sheet, row_num, row_hash, data) VALUES (?, ?, ?, ?)',
+                changed
+            )
+            conn.execute(
+                'DELETE FROM rows WHERE sheet = ? AND row_num > ?',
+                (sheet_name, len(records) + 1)
+            )
+
+            state = self._state(conn, sheet_name)
+            revision = state[1] if state else 0
+            if changed or removed or state is None:
+                revision += 1
+            conn.execute(
+                'INSERT OR REPLACE INTO sync_state (sheet, synced_at, revision, row_count) VALUES (?, ?, ?, ?)',
+                (sheet_name, time.time(), revision, len(records))
+            )
+
+        if changed or removed:
+            logger.info(f"Mirror sync '{sheet_name}': {len(changed)} changed, {removed} removed")
+        return {'changed': len(changed), 'removed': removed, 'revision': revision}
+
+    def records(self, sheet_name):
+        with self._connect() as conn:
+            rows = conn.execute(
+                'SELECT data FROM rows WHERE sheet = ? ORDER BY row_num', (sheet_name,)
+            ).fetchall()
+        return [json.loads(data) for (data,) in rows]
+
+    def _bump(self, conn, sheet_name, row_delta=0):
+        conn.execute(
+            'UPDATE sync_state SET revision = revision + 1, row_count = row_count + ? WHERE sheet = ?',
+            (row_delta, sheet_name)
+        )
+
+    def update_row(self, sheet_name, row_num, fields):
+        #Patch a mirrored row in place after a write went through to Sheets
+        with self._lock, self._connect() as conn:
+            row = conn.execute(
+                'SELECT data FROM rows WHERE sheet = ? AND row_num = ?', (sheet_name, row_num)
+            ).fetchone()
+            if row is None:
+                return False
+
+            record = json.loads(row[0])
+            keys = {key.strip().lower(): key for key in record}
+            for name, value in fields.items():
+                record[keys.get(name.strip().lower(), name)] = value
+
+            conn.execute(
+                'UPDATE rows SET data = ?, row_hash = ? WHERE sheet = ? AND row_num = ?',
+                (json.dumps(record, default=str), _row_hash(record), sheet_name, row_num)
+            )
+            self._bump(conn, sheet_name)
+        return True
+
+    def append_row(self, sheet_name, record):
+        with self._lock, self._connect() as conn:
+            (last_row,) = conn.execute(
+                'SELECT COALESCE(MAX(row_num), 1) FROM rows WHERE sheet = ?', (sheet_name,)
+            ).fetchone()
+            conn.execute(
+                'INSERT INTO rows (sheet, row_num, row_hash, data) VALUES (?, ?, ?, ?)',
+                (sheet_name, last_row + 1, _row_hash(record), json.dumps(record, default=str))
+            )
+            self._bump(conn, sheet_name, 1)
+        return last_row + 1
+
+    def delete_row(self, sheet_name, row_num):
+        #Rows below the deleted one shift up, matching Sheets' delete_rows.
+        #Negating first avoids primary key clashes while renumbering.
+        with self._lock, self._connect() as conn:
+            conn.execute('DELETE FROM rows WHERE sheet = ? AND row_num = ?', (sheet_name, row_num))
+            conn.execute(
+                'UPDATE rows SET row_num = -(row_num - 1) WHERE sheet = ? AND row_num > ?',
+                (sheet_name, row_num)
+            )
+            conn.execute(
+                'UPDATE rows SET row_num = -row_num WHERE sheet = ? AND row_num < 0',
+                (sheet_name,)
+            )
+            self._bump(conn, sheet_name, -1)
+
+    def stats(self):
+        with self._connect() as conn:
+            states = conn.execute(
+                'SELECT sheet, synced_at, revision, row_count FROM sync_state'
+            ).fetchall()
+        return {
+            sheet: {
+                'age_seconds': round(time.time() - synced_at, 1),
+                'revision': revision,
+                'rows': row_count
+            }
+            for sheet, synced_at, revision, row_count in states
+        }
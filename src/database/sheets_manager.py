@@ -1,86 +1,337 @@
 import gspread
 import logging
+import threading
+from contextlib import contextmanager
 from oauth2client.service_account import ServiceAccountCredentials
 from datetime import datetime
 from Config import Config
 from src.utils.logger import logger
+from .worksheet_cache import worksheet_cache
+from .write_buffer import WriteBuffer, compile_ranges
+from .sheet_mirror import SheetMirror
+from .backends import StorageBackend, SQLiteBackend
 
-class SheetsManager:
-    #Managing Google shees opertaions
+AUTH_ERROR_CODES = (401, 403)
 
-    def __init__(self):
-        self.client = None
-        self.connect()
 
-    def connect(self):
-        #Connecting to google sheets API
-        scope = [
-            'https://spreadsheets.google.com/feeds',
-            'https://www.googleapis.com/auth/drive'
-        ]
+def _is_auth_error(error):
+    #Expired or revoked credentials surface as 401/403 APIErrors or token refresh errors
+    response = getattr(error, 'response', None)
+    if getattr(response, 'status_code', None) in AUTH_ERROR_CODES:
+        return True
+    return 'Refresh' in type(error).__name__ or 'Credentials' in type(error).__name__
 
-        try:
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def authorized_client(refresh=False):
+    #One authorized gspread client per process. Cached worksheet handles belong to it,
+    #so sharing it is what lets every SheetsManager reuse them.
+    global _client
+    with _client_lock:
+        if _client is None or refresh:
+            scope = [
+                'https://spreadsheets.google.com/feeds',
+                'https://www.googleapis.com/auth/drive'
+            ]
             creds = ServiceAccountCredentials.from_json_keyfile_name(
                 Config.GOOGLE_SHEETS_CREDENTIALS, scope
             )
-            self.client = gspread.authorize(creds)
+            _client = gspread.authorize(creds)
             logger.info("Connected to Google Sheets")
+        return _client
+
+
+class GoogleSheetsBackend(StorageBackend):
+    #Google Sheets through gspread, with cached worksheet handles and header indexes
+
+    mirrored = True
+
+    def __init__(self):
+        self.cache = worksheet_cache
+        self.connect()
+
+    @property
+    def client(self):
+        #Always the current shared client, so a re-authorization reaches every instance
+        return _client
+
+    def connect(self, refresh=False):
+        #Connecting to google sheets API, reusing the process-wide client unless asked to refresh
+        try:
+            authorized_client(refresh)
         except Exception as e:
             logger.error(f"Failed to connect to Google Sheets: {e}")
             raise
 
+    def get_worksheet(self, sheet_name):
+        #Worksheet handle from the shared cache, opened at most once per TTL
+        return self.cache.get(self.client, sheet_name)
+
+    def handle_error(self, sheet_name, error):
+        #Drop the cached handle when Google rejects our credentials so the
+        #next call re-authorizes and re-opens instead of failing until TTL expiry
+        if _is_auth_error(error):
+            logger.warning(f"Auth error on '{sheet_name}', invalidating cached worksheet")
+            self.cache.invalidate(sheet_name)
+            try:
+                self.connect(refresh=True)
+            except Exception:
+                pass
+
+    def column_index(self, sheet_name):
+        return self.cache.get_columns(self.client, sheet_name)
+
+    def headers(self, sheet_name):
+        columns = self.column_index(sheet_name)
+        return sorted(columns, key=columns.get)
+
+    def resolve_fields(self, sheet_name, fields):
+        try:
+            return super().resolve_fields(sheet_name, fields)
+        except KeyError:
+            #Header may have changed under us, re-read it on the next call
+            self.cache.invalidate(sheet_name)
+            raise
+
+    def read_records(self, sheet_name):
+        return self.get_worksheet(sheet_name).get_all_records()
+
+    def update_rows(self, sheet_name, rows):
+        #One batch_update round trip for every row, adjacent columns merged into one range
+        columns = self.column_index(sheet_name)
+        cells = {
+            row_num: {columns[name]: value for name, value in fields.items()}
+            for row_num, fields in rows.items()
+        }
+        self.get_worksheet(sheet_name).batch_update(compile_ranges(cells))
+
+    def append_row(self, sheet_name, values):
+        self.get_worksheet(sheet_name).append_row(values)
+
+    def delete_row(self, sheet_name, row_num):
+        self.get_worksheet(sheet_name).delete_rows(row_num)
+
+    def stats(self):
+        return dict(self.cache.stats(), backend='sheets')
+
+
+def create_backend(name=None):
+    #Pick the storage backend configured through STORAGE_BACKEND
+    name = (name or Config.STORAGE_BACKEND).lower()
+    if name == 'sqlite':
+        return SQLiteBackend()
+    if name in ('sheets', 'gspread'):
+        return GoogleSheetsBackend()
+    raise ValueError(f"Unknown storage backend: {name}")
+
+
+class SheetsManager:
+    #Managing Google shees opertaions
+
+    def __init__(self, backend=None):
+        self.backend = backend or create_backend()
+        self._buffer = None
+        self._sync_stop = None
+        self.mirror = None
+        if self.backend.mirrored and Config.SHEETS_MIRROR_ENABLED:
+            self.mirror = SheetMirror()
+
+    @property
+    def client(self):
+        return getattr(self.backend, 'client', None)
 
+    @property
+    def cache(self):
+        return getattr(self.backend, 'cache', None)
+
+    def handle_error(self, sheet_name, error):
+        self.backend.handle_error(sheet_name, error)
+
+    def update_fields(self, row_num, fields, sheet_name=None):
+        #Write {header: value} into one row. Adjacent columns go out as a single
+        #range and all ranges of the row share one batch_update round trip.
+        sheet_name = sheet_name or Config.SALES_SHEET_NAME
+        fields = {name: value for name, value in fields.items() if value is not None}
+        if not fields:
+            return True
 
-    def get_sales_leads(self):
         try:
-            sheet = self.client.open(Config.SALES_SHEET_NAME).sheet1
-            return sheet.get_all_records()
-        
+            fields = self.backend.resolve_fields(sheet_name, fields)
+            if self._buffer is not None:
+                #The mirror is patched by _write_rows once the flush reaches Sheets
+                for name, value in fields.items():
+                    self._buffer.add(sheet_name, row_num, name, value)
+            else:
+                self.backend.update_rows(sheet_name, {row_num: fields})
+                self._mirror_rows(sheet_name, {row_num: fields})
+            return True
+
+        except Exception as e:
+            logger.error(f"Error updating row {row_num} in '{sheet_name}': {e}")
+            self.handle_error(sheet_name, e)
+            return False
+
+    def append_row(self, sheet_name, values):
+        #Append a row in sheet column order and mirror it locally
+        try:
+            self.backend.append_row(sheet_name, values)
+            if self.mirror is not None:
+                headers = self.backend.headers(sheet_name)
+                record = {name: values[i] if i < len(values) else '' for i, name in enumerate(headers)}
+                self.mirror.append_row(sheet_name, record)
+            return True
+
+        except Exception as e:
+            logger.error(f"Error appending row to '{sheet_name}': {e}")
+            self.handle_error(sheet_name, e)
+            return False
+
+    def delete_row(self, sheet_name, row_num):
+        try:
+            self.backend.delete_row(sheet_name, row_num)
+            if self.mirror is not None:
+                self.mirror.delete_row(sheet_name, row_num)
+            return True
+
+        except Exception as e:
+            logger.error(f"Error deleting row {row_num} from '{sheet_name}': {e}")
+            self.handle_error(sheet_name, e)
+            return False
+
+    def _read_records(self, sheet_name, max_age=None):
+        #Serve rows from the local mirror unless it is older than max_age
+        if self.mirror is None:
+            return self.backend.read_records(sheet_name)
+
+        if self.mirror.is_stale(sheet_name, max_age):
+            try:
+                self.sync_sheet(sheet_name)
+            except Exception as e:
+                #Stale rows beat no rows when Google is unreachable
+                if self.mirror.revision(sheet_name) == 0:
+                    raise
+                logger.warning(f"Serving stale mirror for '{sheet_name}': {e}")
+                self.handle_error(sheet_name, e)
+        return self.mirror.records(sheet_name)
+
+    def sync_sheet(self, sheet_name):
+        records = self.backend.read_records(sheet_name)
+        return self.mirror.sync(sheet_name, records)
+
+    def sync_mirror(self):
+        #Refresh both mirrored sheets, used by the background sync
+        results = {}
+        for sheet_name in (Config.SALES_SHEET_NAME, Config.SOCIAL_SHEET_NAME):
+            try:
+                results[sheet_name] = self.sync_sheet(sheet_name)
+            except Exception as e:
+                logger.error(f"Mirror sync failed for '{sheet_name}': {e}")
+                self.handle_error(sheet_name, e)
+        return results
+
+    def start_background_sync(self, interval=None):
+        #Keep the mirror warm on a timer so dashboard reads never wait on Google
+        if self.mirror is None or self._sync_stop is not None:
+            return
+        interval = interval or Config.SHEETS_MIRROR_SYNC_SECONDS
+        self._sync_stop = threading.Event()
+
+        def run():
+            while not self._sync_stop.wait(interval):
+                self.sync_mirror()
+
+        threading.Thread(target=run, name='sheets-mirror-sync', daemon=True).start()
+        logger.info(f"Sheets mirror sync every {interval}s")
+
+    def stop_background_sync(self):
+        if self._sync_stop is not None:
+            self._sync_stop.set()
+            self._sync_stop = None
+
+    def cache_stats(self):
+        return self.backend.stats()
+
+    @contextmanager
+    def buffered_writes(self, max_pending=None, flush_interval=None):
+        #Queue field writes made inside the block and send them as batched
+        #updates. Always flushes on exit, including when the block raises.
+        if self._buffer is not None:
+            yield self._buffer
+            return
+
+        self._buffer = WriteBuffer(
+            self._write_rows,
+            max_pending=max_pending or Config.SHEETS_WRITE_BATCH_SIZE,
+            flush_interval=flush_interval or Config.SHEETS_WRITE_FLUSH_SECONDS
+        )
+        try:
+            yield self._buffer
+        finally:
+            buffer, self._buffer = self._buffer, None
+            #One retry for whatever the final flush re-queued, then say what was lost
+            if not buffer.flush() and not buffer.flush():
+                for sheet_name, rows in buffer.drain().items():
+                    logger.error(f"Unsent writes to '{sheet_name}' dropped: {rows}")
+
+    def _write_rows(self, sheet_name, rows):
+        try:
+            self.backend.update_rows(sheet_name, rows)
+        except Exception as e:
+            self.handle_error(sheet_name, e)
+            raise
+        self._mirror_rows(sheet_name, rows)
+
+    def _mirror_rows(self, sheet_name, rows):
+        #Only called after the write went through, so the mirror never shows unsaved data
+        if self.mirror is not None:
+            for row_num, fields in rows.items():
+                self.mirror.update_row(sheet_name, row_num, fields)
+
+    def get_sales_leads(self, max_age=None):
+        try:
+            return self._read_records(Config.SALES_SHEET_NAME, max_age)
+
         except Exception as e:
             logger.error(f"Error reading sales leads: {e}")
+            self.handle_error(Config.SALES_SHEET_NAME, e)
             return []
 
 
 
     def update_lead_status(self, row_num, status, stage=None):
         #Updating lead status
-        
-        try:
-            sheet = self.client.open(Config.SALES_SHEET_NAME).sheet1
-            sheet.update_cell(row_num, 5, status)
-            sheet.update_cell(row_num, 6, datetime.now().isoformat())
-            if stage is not None:
-                sheet.update_cell(row_num, 7, stage)
+        updated = self.update_fields(row_num, {
+            'Status': status,
+            'Last Contact': datetime.now().isoformat(),
+            'Stage': stage
+        }, sheet_name=Config.SALES_SHEET_NAME)
+
+        if updated:
             logger.info(f"Updating lead row {row_num} was succesful")
-            return True
-        
-        except Exception as e:
-            logger.error(f"Error Updating lead: {e}")
-            return False
-        
+        return updated
 
-    def get_social_post(self):
+
+    def get_social_post(self, max_age=None):
         #Get scheduled social media posts
-        
+
         try:
-            sheet = self.client.open(Config.SOCIAL_SHEET_NAME).sheet1
-            return sheet.get_all_records()
-        
+            return self._read_records(Config.SOCIAL_SHEET_NAME, max_age)
+
         except Exception as e:
             logger.error(f"Error reading social posts: {e}")
+            self.handle_error(Config.SOCIAL_SHEET_NAME, e)
             return []
-        
+
     def mark_post_as_sent(self, row_num, platform, post_id=None):
-        
-        try: 
-            sheet = self.client.open(Config.SOCIAL_SHEET_NAME).sheet1
-            sheet.update_cell(row_num, 7, 'Posted')
-            sheet.update_cell(row_num, datetime.now().isoformat)
-            if post_id:
-                sheet.update_cell(row_num, 9, post_id)
+        marked = self.update_fields(row_num, {
+            'Status': 'Posted',
+            'Posted Time': datetime.now().isoformat(),
+            'Post ID': post_id
+        }, sheet_name=Config.SOCIAL_SHEET_NAME)
+
+        if marked:
             logger.info(f"Marked post row {row_num} as sent on {platform}")
-            return True
-        
-        except Exception as e:
-            logger.error(f"Error marking post as sent: {e}")
-            return False
\ No newline at end of file
+        return marked
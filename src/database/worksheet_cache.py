@@ -0,0 +1,85 @@
+import threading
+import time
+from Config import Config
+
+
+class WorksheetCache:
+    #Caches opened worksheet handles by sheet name.
+    #client.open() costs a Drive search plus a metadata fetch, so every
+    #SheetsManager in the process resolves each spreadsheet once per TTL.
+
+    def __init__(self, ttl=300):
+        self.ttl = ttl
+        self._entries = {}
+        self._lock = threading.Lock()
+        self.opens = 0
+        self.hits = 0
+        self.invalidations = 0
+
+    def get(self, client, sheet_name):
+        #Return a cached handle, opening the spreadsheet on a miss
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(sheet_name)
+            #Handles belong to the client that opened them, a reconnect means re-open
+            if entry and entry['client'] is client and now - entry['opened_at'] < self.ttl:
+                self.hits += 1
+                return entry['sheet']
+
+        sheet = client.open(sheet_name).sheet1
+
+        with self._lock:
+            self._entries[sheet_name] = {
+                'client': client,
+                'sheet': sheet,
+                'opened_at': now,
+                'columns': None
+            }
+            self.opens += 1
+        return sheet
+
+    def get_columns(self, client, sheet_name):
+        #Header name -> 1-based column number, read once per cached handle
+        sheet = self.get(client, sheet_name)
+        with self._lock:
+            entry = self._entries.get(sheet_name)
+            if entry and entry['sheet'] is sheet and entry['columns'] is not None:
+                return entry['columns']
+
+        headers = sheet.row_values(1)
+        columns = {}
+        for col, name in enumerate(headers, start=1):
+            name = str(name).strip()
+            if name and name not in columns:
+                columns[name] = col
+
+        with self._lock:
+            entry = self._entries.get(sheet_name)
+            if entry and entry['sheet'] is sheet:
+                entry['columns'] = columns
+        return columns
+
+    def invalidate(self, sheet_name=None):
+        #Drop one handle, or every handle when no name is given
+        with self._lock:
+            if sheet_name is None:
+                dropped = len(self._entries)
+                self._entries.clear()
+            else:
+                dropped = 1 if self._entries.pop(sheet_name, None) else 0
+            self.invalidations += dropped
+
+    def stats(self):
+        with self._lock:
+            return {
+                'opens': self.opens,
+                'hits': self.hits,
+                'saved_opens': self.hits,
+                'invalidations': self.invalidations,
+                'cached_sheets': sorted(self._entries),
+                'ttl': self.ttl
+            }
+
+
+#Shared by every SheetsManager in the process (campaigns and the Flask API)
+worksheet_cache = WorksheetCache(ttl=Config.SHEETS_CACHE_TTL)
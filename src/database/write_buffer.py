@@ -0,0 +1,98 @@
+import threading
+import time
+from gspread.utils import rowcol_to_a1
+from src.utils.logger import logger
+
+
+def compile_ranges(cells):
+    #Collapse {row: {col: value}} into batch_update payloads,
+    #one A1 range per run of adjacent columns in a row
+    ranges = []
+    for row in sorted(cells):
+        columns = sorted(cells[row])
+        run = [columns[0]]
+        for col in columns[1:]:
+            if col == run[-1] + 1:
+                run.append(col)
+                continue
+            ranges.append(_range_payload(row, run, cells[row]))
+            run = [col]
+        ranges.append(_range_payload(row, run, cells[row]))
+    return ranges
+
+
+def _range_payload(row, columns, values):
+    a1 = rowcol_to_a1(row, columns[0])
+    if len(columns) > 1:
+        a1 = f"{a1}:{rowcol_to_a1(row, columns[-1])}"
+    return {'range': a1, 'values': [[values[col] for col in columns]]}
+
+
+class WriteBuffer:
+    #Collects field changes as {sheet: {row: {field: value}}} and writes them
+    #through flush_func(sheet_name, rows) once max_pending values are queued
+    #or flush_interval seconds have passed
+
+    def __init__(self, flush_func, max_pending=150, flush_interval=30):
+        self.flush_func = flush_func
+        self.max_pending = max_pending
+        self.flush_interval = flush_interval
+        self._pending = {}
+        self._pending_count = 0
+        self._last_flush = time.monotonic()
+        self._lock = threading.Lock()
+        self.flushes = 0
+        self.cells_written = 0
+
+    def add(self, sheet_name, row, field, value):
+        with self._lock:
+            row_cells = self._pending.setdefault(sheet_name, {}).setdefault(row, {})
+            if field not in row_cells:
+                self._pending_count += 1
+            row_cells[field] = value
+            due = (self._pending_count >= self.max_pending
+                   or time.monotonic() - self._last_flush >= self.flush_interval)
+        if due:
+            self.flush()
+
+    def pending(self):
+        return self._pending_count
+
+    def drain(self):
+        #Take everything still queued without writing it
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            self._pending_count = 0
+        return pending
+
+    def flush(self):
+        #Write everything queued so far. Failed sheets are re-queued so the
+        #next flush retries them without clobbering newer values.
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            self._pending_count = 0
+            self._last_flush = time.monotonic()
+
+        ok = True
+        for sheet_name, cells in pending.items():
+            count = sum(len(row_cells) for row_cells in cells.values())
+            try:
+                self.flush_func(sheet_name, cells)
+                self.flushes += 1
+                self.cells_written += count
+                logger.info(f"Flushed {count} buffered values to '{sheet_name}'")
+            except Exception as e:
+                logger.error(f"Buffered write to '{sheet_name}' failed: {e}")
+                self._requeue(sheet_name, cells)
+                ok = False
+        return ok
+
+    def _requeue(self, sheet_name, cells):
+        with self._lock:
+            sheet_cells = self._pending.setdefault(sheet_name, {})
+            for row, row_cells in cells.items():
+                current = sheet_cells.setdefault(row, {})
+                for field, value in row_cells.items():
+                    if field not in current:
+                        current[field] = value
+                        self._pending_count += 1
@@ -0,0 +1,138 @@
+import asyncio
+from datetime import date
+import aiosmtplib
+from Config import Config
+from src.utils.logger import logger, log_activity
+from src.utils.quota_store import get_quota_store
+from .email_client import build_message
+
+
+class AsyncEmailClient:
+    #Asyncio sender for large outreach runs.
+    #A few long-lived SMTP sessions pull from one shared queue, so several
+    #messages are in flight at once instead of one per process. Daily limit
+    #and activity logging behave exactly like EmailClient.send.
+
+    def __init__(self, connections=None, hostname=None, port=None, use_tls=True,
+                 username=None, password=None, rate_limiter=None, timeout=30):
+        self.sender = Config.EMAIL_ADDRESS
+        self.username = Config.EMAIL_ADDRESS if username is None else username
+        self.password = Config.EMAIL_PASSWORD if password is None else password
+        self.hostname = hostname or Config.SMTP_HOST
+        self.port = port or Config.SMTP_PORT
+        self.use_tls = use_tls
+        self.connections = connections or Config.SMTP_POOL_SIZE
+        self.max_messages = Config.SMTP_MAX_MESSAGES_PER_CONNECTION
+        self.rate_limiter = rate_limiter
+        self.timeout = timeout
+        self.daily_limit = Config.EMAIL_DAILY_LIMIT
+        self.quota = get_quota_store()
+        self.connections_opened = 0
+        self.reconnects = 0
+
+    @property
+    def daily_count(self):
+        return self.quota.used('email')
+
+    @daily_count.setter
+    def daily_count(self, value):
+        self.quota.set('email', value)
+
+    async def _connect(self):
+        smtp = aiosmtplib.SMTP(
+            hostname=self.hostname,
+            port=self.port,
+            use_tls=self.use_tls,
+            start_tls=False if not self.use_tls else None,
+            timeout=self.timeout
+        )
+        await smtp.connect()
+        if self.username and self.password:
+            await smtp.login(self.username, self.password)
+        self.connections_opened += 1
+        return smtp
+
+    async def _close(self, smtp):
+        #QUIT when the session is still up, otherwise just release the transport
+        if smtp is None:
+            return
+        try:
+            if smtp.is_connected:
+                await smtp.quit()
+                return
+        except Exception:
+            pass
+        try:
+            smtp.close()
+        except Exception:
+            pass
+
+    async def _worker(self, queue, results):
+        smtp = None
+        sent_on_connection = 0
+        try:
+            while True:
+                item = await queue.get()
+                if item is None:
+                    return
+                index, (to_email, subject, body_html) = item
+
+                day = date.today()
+                if not self.quota.try_acquire('email', self.daily_limit, day=day):
+                    logger.warning(f"Daily limit reached ({self.daily_limit})")
+                    results[index] = {'to': to_email, 'success': False, 'error': 'Daily limit reached'}
+                    continue
+
+                if self.rate_limiter is not None:
+                    await self.rate_limiter.acquire_async()
+
+                msg = build_message(self.sender, to_email, subject, body_html)
+                try:
+                    if smtp is None or not smtp.is_connected or sent_on_connection >= self.max_messages:
+                        await self._close(smtp)
+                        smtp, sent_on_connection = await self._connect(), 0
+                    try:
+                        await smtp.send_message(msg)
+                    except aiosmtplib.SMTPServerDisconnected:
+                        #Dropped session, retry once on a fresh one
+                        self.reconnects += 1
+                        await self._close(smtp)
+                        smtp, sent_on_connection = await self._connect(), 0
+                        await smtp.send_message(msg)
+
+                    sent_on_connection += 1
+                    logger.info(f"Email sent to {to_email} ({self.daily_count}/{self.daily_limit})")
+                    log_activity('Email', 'success', f'To: {to_email}, Subject: {subject} ')
+                    results[index] = {'to': to_email, 'success': True, 'error': None}
+
+                except Exception as e:
+                    self.quota.release('email', day=day)
+                    logger.error(f'Email failed to {to_email}: {e}')
+                    log_activity('Email', 'failed', f'{to_email} - {str(e)}')
+                    results[index] = {'to': to_email, 'success': False, 'error': str(e)}
+        finally:
+            await self._close(smtp)
+
+    async def send_many(self, messages):
+        #messages: iterable of (to_email, subject, body_html).
+        #Returns one {'to', 'success', 'error'} dict per message, in input order.
+        messages = list(messages)
+        results = [None] * len(messages)
+        queue = asyncio.Queue()
+        for item in enumerate(messages):
+            queue.put_nowait(item)
+
+        workers = min(self.connections, len(messages)) or 1
+        for _ in range(workers):
+            queue.put_nowait(None)
+
+        await asyncio.gather(*(self._worker(queue, results) for _ in range(workers)))
+        return results
+
+    def send_many_blocking(self, messages):
+        #Convenience wrapper for synchronous callers such as the scheduler
+        return asyncio.run(self.send_many(messages))
+
+    def reset_daily_count(self):
+        self.quota.reset('email')
+        logger.info("Email counter reset")
@@ -1,10 +1,20 @@
-import smtplib
 import logging
+from datetime import date
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 from Config import Config
 from src.utils.logger import logger, log_activity
+from src.utils.quota_store import get_quota_store
 from .templates import EmailTemplates
+from .smtp_pool import SMTPConnectionPool
+
+def build_message(sender, to_email, subject, body_html):
+    msg = MIMEMultipart('alternative')
+    msg['From'] = sender
+    msg['To'] = to_email
+    msg['subject'] = subject
+    msg.attach(MIMEText(body_html, 'html'))
+    return msg
 
 class EmailClient:
     #Handle email sending operations
@@ -12,35 +22,58 @@ class EmailClient:
     def __init__(self):
         self.sender = Config.EMAIL_ADDRESS
         self.password = Config.EMAIL_PASSWORD
-        self.daily_count = 0
         self.daily_limit = Config.EMAIL_DAILY_LIMIT
+        self.quota = get_quota_store()
+        self.pool = SMTPConnectionPool(
+            Config.SMTP_HOST,
+            Config.SMTP_PORT,
+            self.sender,
+            self.password,
+            size=Config.SMTP_POOL_SIZE,
+            max_messages=Config.SMTP_MAX_MESSAGES_PER_CONNECTION,
+            idle_timeout=Config.SMTP_IDLE_TIMEOUT
+        )
+
+    @property
+    def daily_count(self):
+        #Today's sends across every process, not just this client
+        return self.quota.used('email')
+
+    @daily_count.setter
+    def daily_count(self, value):
+        self.quota.set('email', value)
 
     def send(self, to_email, subject, body_html):
-        if self.daily_count>=self.daily_limit:
+        #Reserve a slot up front so concurrent senders cannot overshoot the limit.
+        #The day is pinned so a failure after midnight releases the slot it took.
+        day = date.today()
+        if not self.quota.try_acquire('email', self.daily_limit, day=day):
             logger.warning(f"Daily limit reached ({self.daily_limit})")
             return False
             
-        msg = MIMEMultipart('alternative')
-        msg['From'] = self.sender
-        msg['To'] = to_email
-        msg['subject'] = subject
-        msg.attach(MIMEText(body_html, 'html'))
+        msg = build_message(self.sender, to_email, subject, body_html)
 
         try: 
-            with smtplib.SMTP_SSL('smtp.gmail.com', 465) as server:
-                server.login(self.sender, self.password)
-                server.send_message(msg)
-
-                self.daily_count += 1
-                logger.info(f"Email sent to {to_email} ({self.daily_count}/{self.daily_limit})")
-                log_activity('Email', 'success', f'To: {to_email}, Subject: {subject} ')
-                return True
+            #Reuses a logged-in session instead of a TLS handshake + login per email
+            self.pool.send_message(msg)
+
+            logger.info(f"Email sent to {to_email} ({self.daily_count}/{self.daily_limit})")
+            log_activity('Email', 'success', f'To: {to_email}, Subject: {subject} ')
+            return True
             
         except Exception as e:
+            self.quota.release('email', day=day)
             logger.error(f'Email failed to {to_email}: {e}')
             log_activity('Email', 'failed', f'{to_email} - {str(e)}')
             return False
         
     def reset_daily_count(self):
-        self.daily_count = 0
-        logger.info("Email counter reset")
\ No newline at end of file
+        self.quota.reset('email')
+        logger.info("Email counter reset")
+
+    def connection_stats(self):
+        return self.pool.stats()
+
+    def close(self):
+        #Log out of pooled SMTP sessions
+        self.pool.close_all()
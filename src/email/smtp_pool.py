@@ -0,0 +1,190 @@
+import smtplib
+import threading
+import time
+from itertools import count
+from src.utils.logger import logger
+
+
+class PooledConnection:
+    #One authenticated SMTP session and its usage counters
+    _ids = count(1)
+
+    def __init__(self, server):
+        self.id = next(self._ids)
+        self.server = server
+        self.created_at = time.monotonic()
+        self.last_used = self.created_at
+        self.messages_sent = 0
+
+    def idle_for(self):
+        return time.monotonic() - self.last_used
+
+    def close(self):
+        try:
+            self.server.quit()
+        except Exception:
+            try:
+                self.server.close()
+            except Exception:
+                pass
+
+
+class SMTPConnectionPool:
+    #Keeps a few logged-in SMTP_SSL sessions open between messages.
+    #A session is retired after max_messages sends or idle_timeout seconds,
+    #checked with NOOP when it has sat unused for noop_after seconds,
+    #and re-opened once if the server drops it mid-send.
+
+    def __init__(self, host, port, username, password, size=1,
+                 max_messages=100, idle_timeout=60, noop_after=15, timeout=30):
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        self.size = max(1, size)
+        self.max_messages = max_messages
+        self.idle_timeout = idle_timeout
+        self.noop_after = noop_after
+        self.timeout = timeout
+
+        self._idle = []
+        self._open_count = 0
+        self._cond = threading.Condition()
+        self._retired = []
+        self.connections_opened = 0
+        self.messages_sent = 0
+        self.reconnects = 0
+        self.health_check_failures = 0
+
+    def _connect(self):
+        server = smtplib.SMTP_SSL(self.host, self.port, timeout=self.timeout)
+        try:
+            server.login(self.username, self.password)
+        except Exception:
+            server.close()
+            raise
+        self.connections_opened += 1
+        conn = PooledConnection(server)
+        logger.info(f"Opened SMTP connection #{conn.id} to {self.host}")
+        return conn
+
+    def _usable(self, conn):
+        if conn.messages_sent >= self.max_messages or conn.idle_for() >= self.idle_timeout:
+            return False
+        if conn.idle_for() < self.noop_after:
+            return True
+        try:
+            healthy = conn.server.noop()[0] == 250
+        except (smtplib.SMTPException, OSError):
+            healthy = False
+        if not healthy:
+            self.health_check_failures += 1
+        return healthy
+
+    def _retire(self, conn):
+        conn.close()
+        with self._cond:
+            self._retired.append({
+                'id': conn.id,
+                'messages_sent': conn.messages_sent,
+                'age_seconds': round(time.monotonic() - conn.created_at, 1)
+            })
+            del self._retired[:-20]
+
+    def acquire(self):
+        #Reuse an idle healthy session, or open one if the pool has room
+        while True:
+            with self._cond:
+                while not self._idle and self._open_count >= self.size:
+                    self._cond.wait()
+                if self._idle:
+                    conn = self._idle.pop()
+                else:
+                    self._open_count += 1
+                    conn = None
+
+            if conn is None:
+                try:
+                    return self._connect()
+                except Exception:
+                    self._discard()
+                    raise
+
+            if self._usable(conn):
+                return conn
+            self._retire(conn)
+            self._discard()
+
+    def release(self, conn):
+        conn.last_used = time.monotonic()
+        with self._cond:
+            self._idle.append(conn)
+            self._cond.notify()
+
+    def _discard(self):
+        with self._cond:
+            self._open_count -= 1
+            self._cond.notify()
+
+    def send_message(self, msg):
+        conn = self.acquire()
+        try:
+            conn.server.send_message(msg)
+        except smtplib.SMTPServerDisconnected:
+            #Server closed a session we thought was alive, retry once on a fresh one
+            self.reconnects += 1
+            logger.warning(f"SMTP connection #{conn.id} dropped, reconnecting")
+            self._retire(conn)
+            conn = None
+            try:
+                conn = self._connect()
+                conn.server.send_message(msg)
+            except Exception:
+                if conn is not None:
+                    self._retire(conn)
+                self._discard()
+                raise
+        except (smtplib.SMTPRecipientsRefused, smtplib.SMTPSenderRefused, smtplib.SMTPDataError):
+            #Rejected message, smtplib has already reset the session so keep it
+            self.release(conn)
+            raise
+        except Exception:
+            self._retire(conn)
+            self._discard()
+            raise
+
+        conn.messages_sent += 1
+        with self._cond:
+            self.messages_sent += 1
+        self.release(conn)
+
+    def close_all(self):
+        with self._cond:
+            idle, self._idle = self._idle, []
+            self._open_count -= len(idle)
+        for conn in idle:
+            self._retire(conn)
+
+    def stats(self):
+        with self._cond:
+            active = [
+                {
+                    'id': conn.id,
+                    'messages_sent': conn.messages_sent,
+                    'age_seconds': round(time.monotonic() - conn.created_at, 1),
+                    'idle_seconds': round(conn.idle_for(), 1)
+                }
+                for conn in self._idle
+            ]
+            in_use = self._open_count - len(self._idle)
+            retired = list(self._retired)
+        return {
+            'connections_opened': self.connections_opened,
+            'messages_sent': self.messages_sent,
+            'messages_per_connection': round(self.messages_sent / self.connections_opened, 2) if self.connections_opened else 0,
+            'reconnects': self.reconnects,
+            'health_check_failures': self.health_check_failures,
+            'in_use': in_use,
+            'idle': active,
+            'retired': retired
+        }
@@ -1,3 +1,60 @@
+from string import Formatter
+
+
+class CompiledTemplate:
+    #A template parsed once into literal text and placeholders.
+    #bind() folds values that are the same for a whole campaign into the
+    #literal text, so per-lead render() only fills the fields that vary.
+
+    def __init__(self, name, parts):
+        self.name = name
+        #Alternating literal strings and placeholder names, literals at even indexes
+        self._parts = parts
+        self.fields = frozenset(parts[1::2])
+        #Residual format string holding only the unbound placeholders, so
+        #render() runs in C with no per-call parsing of the static text
+        self._format = ''.join(
+            part.replace('{', '{{').replace('}', '}}') if i % 2 == 0 else '{' + part + '}'
+            for i, part in enumerate(parts)
+        )
+
+    @classmethod
+    def parse(cls, name, source):
+        parts = ['']
+        for literal, field, spec, conversion in Formatter().parse(source):
+            parts[-1] += literal
+            if field is None:
+                continue
+            if not field.isidentifier() or spec or conversion:
+                raise ValueError(f"Template '{name}' has unsupported placeholder '{{{field}}}'")
+            parts.extend([field, ''])
+        return cls(name, parts)
+
+    def validate(self, available):
+        #Fail at startup, not halfway through a campaign, when a placeholder has no source
+        missing = self.fields - set(available)
+        if missing:
+            raise KeyError(f"Template '{self.name}' has no value for: {', '.join(sorted(missing))}")
+
+    def bind(self, **values):
+        #Substitute the given placeholders now and return the smaller template
+        parts = [self._parts[0]]
+        for i in range(1, len(self._parts), 2):
+            field, literal = self._parts[i], self._parts[i + 1]
+            if field in values:
+                parts[-1] += str(values[field]) + literal
+            else:
+                parts.extend([field, literal])
+        return CompiledTemplate(self.name, parts)
+
+    def render(self, **values):
+        return self._format.format_map(values)
+
+    def render_map(self, values):
+        #render() without repacking an existing dict
+        return self._format.format_map(values)
+
+
 class EmailTemplates:
     #Template library 
     INITIAL = '''
@@ -39,8 +96,57 @@ class EmailTemplates:
     </html>
 '''
 
+    _compiled = {}
+
+    @classmethod
+    def compile(cls, template_name):
+        #Parsed once per process and reused by every campaign
+        key = template_name.upper()
+        if key not in cls._compiled:
+            cls._compiled[key] = CompiledTemplate.parse(template_name.lower(), getattr(cls, key))
+        return cls._compiled[key]
+
     @classmethod
     def get(cls, template_name, **kwargs):
         #get template with various variables filled
-        template = getattr(cls, template_name.upper())
-        return template.format(**kwargs)
\ No newline at end of file
+        return cls.compile(template_name).render(**kwargs)
+
+class CampaignTemplates:
+    #Per-campaign render cache.
+    #stages: {stage: (template_name, subject, {placeholder: value})} where the
+    #values are fixed for the whole run. lead_fields maps the remaining
+    #placeholders onto sheet columns. Everything is validated against the
+    #lead schema when the campaign starts.
+
+    def __init__(self, stages, lead_fields, schema, defaults=None):
+        self.lead_fields = dict(lead_fields)
+        self.defaults = defaults or {}
+
+        unknown = set(self.lead_fields.values()) - set(schema)
+        if unknown:
+            raise KeyError(f"Lead columns not in schema: {', '.join(sorted(unknown))}")
+
+        self._stages = {}
+        self._columns = {}
+        for stage, (template_name, subject, static) in stages.items():
+            available = set(static) | set(self.lead_fields)
+            body = EmailTemplates.compile(template_name)
+            subject = CompiledTemplate.parse(f'{template_name} subject', subject)
+            body.validate(available)
+            subject.validate(available)
+            subject, body = subject.bind(**static), body.bind(**static)
+            fields = sorted(subject.fields | body.fields)
+            self._stages[stage] = (subject, body)
+            self._columns[stage] = [(field, self.lead_fields[field], self.defaults.get(field, '')) for field in fields]
+
+    def __contains__(self, stage):
+        return stage in self._stages
+
+    def render(self, stage, lead):
+        #Only the lead-specific fields are looked up here
+        subject, body = self._stages[stage]
+        values = {}
+        for field, column, default in self._columns[stage]:
+            value = lead.get(column)
+            values[field] = default if value is None or value == '' else value
+        return {'subject': subject.render_map(values), 'body': body.render_map(values)}
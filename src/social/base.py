@@ -1,18 +1,52 @@
 from abc import ABC, abstractmethod
+from datetime import date
 from src.utils.logger import logger
+from src.utils.quota_store import get_quota_store
 import logging
 
 class SocialMediaBase(ABC):
     #base class for social media clients
     def __init__(self, platform_name):
         self.platform_name= platform_name
-        self.daily_count = 0
         self.daily_limit = 0
+        self.quota = get_quota_store()
+
+    @property
+    def quota_key(self):
+        return self.platform_name.lower()
+
+    @property
+    def daily_count(self):
+        #Today's posts across every process, not just this client
+        return self.quota.used(self.quota_key)
+
+    @daily_count.setter
+    def daily_count(self, value):
+        self.quota.set(self.quota_key, value)
+
+    def reserve_post(self, day=None):
+        #Take one of today's slots before publishing, atomically across threads and processes
+        if not self.quota.try_acquire(self.quota_key, self.daily_limit, day=day):
+            logger.warning(f"{self.platform_name} daily limit reached ({self.daily_limit})")
+            return False
+        return True
+
+    def release_post(self, day=None):
+        #Give the slot back when the post did not go out, to the day it was reserved on
+        self.quota.release(self.quota_key, day=day)
+
+    def today(self):
+        #Pinned once per post so a reservation and its release hit the same day
+        return date.today()
 
     @abstractmethod
     def post(self, text, media_path=None):
         pass
 
+    def get_metrics_batch(self, post_ids):
+        #post id -> metrics or None; one request per post unless the platform can batch
+        return {post_id: self.get_metrics(post_id) for post_id in post_ids}
+
     def check_limit(self):
         if self.daily_count>=self.daily_limit:
             logger.warning(f"{self.platform_name} daily limit reached ({self.daily_limit})")
@@ -20,7 +54,7 @@ class SocialMediaBase(ABC):
         return True
     
     def reset_daily_count(self):
-        self.daily_count = 0
+        self.quota.reset(self.quota_key)
         logger.info(f"{self.platform_name} counter reset")
 
         #ENFORCING POLYMORPHISM FOR THE DIFFERENT PLATFORMS BEING INTERACTED WITH
@@ -1,8 +1,12 @@
 import requests
 import logging
+from urllib.parse import urlencode
 from Config import Config
 from src.utils.logger import logger, log_activity
 from .base import SocialMediaBase
+from .graph_batch import GraphBatch
+
+METRIC_FIELDS = 'likes.summary(true), comments.summary(true), shares'
 
 class FacebookClient (SocialMediaBase):
     #Facebook API Client using Graph API
@@ -25,9 +29,10 @@ class FacebookClient (SocialMediaBase):
         if not self.access_token or not self.page_id:
             logger.error("Facebook not configured")
             return None
-        if not self.check_limit():
+        #Reserve before publishing so concurrent workers cannot overshoot the limit
+        day = self.today()
+        if not self.reserve_post(day):
             return None
-        
 
         try:
             url = f"{self.base_url}/{self.page_id}/feed"
@@ -57,11 +62,11 @@ class FacebookClient (SocialMediaBase):
             result = response.json()
             post_id = result.get('id') or result.get('post_id')
 
-            self.daily_count+= 1
             logger.info(f"Facebook post published: {post_id} ({self.daily_count}/{self.daily_limit})")
             log_activity('facebook', 'success', f'Post ID: {post_id}')
             return post_id
         except Exception as e:
+            self.release_post(day)
             logger.error(f"Facebook post failed:{e}")
             log_activity('facebook', 'Failed', str(e))
             return None
@@ -71,23 +76,33 @@ class FacebookClient (SocialMediaBase):
         try:
             url = f"{self.base_url}/{post_id}"
             params = {
-                'fields': 'likes.summary(true), comments.summary(true), shares',
+                'fields': METRIC_FIELDS,
                 'access_token': self.access_token
             }
 
             response = requests.get(url, params=params)
             response.raise_for_status()
-            data = response.json()
-
-            metrics = {
-                'likes': data.get('likes', {}).get('summary', {}).get('total_count', 0),
-                'comments': data.get('comments', {}).get('summary', {}).get('total_count', 0),
-                'shares': data.get('shares', {}).get('count', 0)
-            }
+            metrics = self._parse_metrics(response.json())
 
             logger.info(f"Facebook post {post_id} metrics: {metrics}")
             return metrics
         
         except Exception as e:
             logger.error(f"Failed to get Facebook metrics for {post_id}: {e}")
-            return None
\ No newline at end of file
+            return None
+
+    def get_metrics_batch(self, post_ids):
+        #Up to 50 posts per Graph call; posts whose sub-request failed map to None
+        urls = {post_id: f"{post_id}?{urlencode({'fields': METRIC_FIELDS})}" for post_id in post_ids}
+        bodies = GraphBatch(self.access_token, self.base_url).get(list(urls.values()))
+        return {
+            post_id: self._parse_metrics(bodies[url]) if bodies.get(url) is not None else None
+            for post_id, url in urls.items()
+        }
+
+    def _parse_metrics(self, data):
+        return {
+            'likes': data.get('likes', {}).get('summary', {}).get('total_count', 0),
+            'comments': data.get('comments', {}).get('summary', {}).get('total_count', 0),
+            'shares': data.get('shares', {}).get('count', 0)
+        }
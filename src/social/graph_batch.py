@@ -0,0 +1,89 @@
+import json
+import threading
+import time
+import requests
+from concurrent.futures import ThreadPoolExecutor
+from Config import Config
+from src.utils.logger import logger
+
+
+class GraphBatch:
+    #Runs many GET sub-requests through the Graph API batch endpoint.
+    #Chunks of up to 50 go out concurrently; sub-requests that fail transiently
+    #(timeouts come back as null, 5xx, throttling) are retried in the next round.
+
+    RETRY_CODES = {500, 502, 503, 504, 429}
+
+    def __init__(self, access_token, base_url='https://graph.facebook.com/v18.0',
+                 chunk_size=None, workers=None, retries=None, sleep=time.sleep):
+        self.access_token = access_token
+        self.base_url = base_url
+        self.chunk_size = max(1, min(50, chunk_size or Config.GRAPH_BATCH_SIZE))
+        self.workers = max(1, workers or Config.GRAPH_BATCH_WORKERS)
+        self.retries = Config.GRAPH_BATCH_RETRIES if retries is None else retries
+        self.sleep = sleep
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.failed = 0
+
+    def get(self, relative_urls):
+        #relative url -> parsed JSON body, or None when that sub-request failed
+        results = {}
+        pending = list(dict.fromkeys(relative_urls))
+        for attempt in range(self.retries + 1):
+            if not pending:
+                break
+            if attempt:
+                self.sleep(2 ** (attempt - 1))
+            chunks = [pending[i:i + self.chunk_size] for i in range(0, len(pending), self.chunk_size)]
+            retry = []
+            with ThreadPoolExecutor(max_workers=min(self.workers, len(chunks))) as pool:
+                for done, again in pool.map(self._run_chunk, chunks):
+                    results.update(done)
+                    retry.extend(again)
+            pending = retry
+
+        for url in pending:
+            results[url] = None
+        with self._lock:
+            self.failed += sum(1 for body in results.values() if body is None)
+        return results
+
+    def _run_chunk(self, urls):
+        #Returns ({url: body or None}, [urls worth retrying])
+        batch = [{'method': 'GET', 'relative_url': url} for url in urls]
+        try:
+            response = requests.post(f"{self.base_url}/", data={
+                'access_token': self.access_token,
+                'include_headers': 'false',
+                'batch': json.dumps(batch)
+            })
+            with self._lock:
+                self.calls += 1
+            if response.status_code in self.RETRY_CODES:
+                return {}, list(urls)
+            response.raise_for_status()
+            replies = response.json()
+        except requests.RequestException as e:
+            logger.error(f"Graph batch of {len(urls)} failed: {e}")
+            return {}, list(urls)
+
+        done, retry = {}, []
+        for url, reply in zip(urls, replies):
+            if reply is None or reply.get('code') in self.RETRY_CODES:
+                retry.append(url)
+            elif reply.get('code') == 200:
+                try:
+                    done[url] = json.loads(reply.get('body') or '{}')
+                except ValueError:
+                    done[url] = None
+            else:
+                logger.warning(f"Graph sub-request {url.split('?')[0]} failed: {reply.get('code')} {reply.get('body')}")
+                done[url] = None
+        #A short reply list means the rest never ran
+        retry.extend(urls[len(replies):])
+        return done, retry
+
+    def stats(self):
+        with self._lock:
+            return {'calls': self.calls, 'failed': self.failed, 'chunk_size': self.chunk_size, 'workers': self.workers}
@@ -4,6 +4,10 @@ import logging
 from Config import Config
 from src.utils.logger import logger, log_activity
 from .base import SocialMediaBase
+from .graph_batch import GraphBatch
+
+VIDEO_EXTENSIONS = ('.mp4', '.mov', '.avi')
+INSIGHT_METRICS = 'engagement,impressions,reach,saved'
 
 class InstagramClient(SocialMediaBase):
     #Instagram API using Graph API(Business account)
@@ -26,32 +30,37 @@ class InstagramClient(SocialMediaBase):
             logger.error("Instagram not configured")
             return None
         
-        if not self.check_limit():
-            return None
-        
         if not media_path:
             logger.error("Instagram requires media(image or video)")
             return None
+
+        #Reserve before publishing so concurrent workers cannot overshoot the limit
+        day = self.today()
+        if not self.reserve_post(day):
+            return None
         
         try:
             #create media container
             container_id=self._create_media_container(text, media_path)
             if not container_id:
-                return None
+                raise RuntimeError("No media container id returned")
             
-            #Wait for media to process
-            time.sleep(5)
+            #Wait for media to process, as long as it actually takes
+            status = self._wait_for_container(container_id)
+            if status != 'FINISHED':
+                raise RuntimeError(f"Media container {container_id} not ready: {status}")
 
             #Publish the container
             post_id = self._publish_container(container_id)
 
-            if post_id:
-                self.daily_count+=1
-                logger.info(f"Instagram post published: {post_id}({self.daily_count}/{self.daily_limit})")
-                log_activity('Instagram', 'Success', f'Post ID:{post_id}')
+            if not post_id:
+                raise RuntimeError(f"Media container {container_id} was not published")
 
-                return post_id
+            logger.info(f"Instagram post published: {post_id}({self.daily_count}/{self.daily_limit})")
+            log_activity('Instagram', 'Success', f'Post ID:{post_id}')
+            return post_id
         except Exception as e:
+            self.release_post(day)
             logger.error(f"Instagram post failed: {e}")
             log_activity('Instagram', 'Failed', str(e))
             return None
@@ -59,34 +68,61 @@ class InstagramClient(SocialMediaBase):
     def _create_media_container(self, caption, media_path):
         url=f"{self.base_url}/{self.account_id}/media"
 
-        #Image. Video requires different params
+        #Image or video (published as a reel); media must be a publicly accessible url
         data={
-            'image_url': media_path, #Must be publicly accessible url
             'caption': caption,
             'access_token': self.access_token
         }
+        if media_path.lower().endswith(VIDEO_EXTENSIONS):
+            data.update({'media_type': 'REELS', 'video_url': media_path})
+        else:
+            data['image_url'] = media_path
         response = requests.post(url, data=data)
         response.raise_for_status()
-        result= response.json
+        result= response.json()
         
         return result.get('id')
+
+    def _wait_for_container(self, container_id):
+        #Poll status_code with exponential backoff until FINISHED, ERROR/EXPIRED or timeout.
+        #Small images are usually ready on the first check, videos get as long as they need.
+        url = f"{self.base_url}/{container_id}"
+        params = {'fields': 'status_code', 'access_token': self.access_token}
+        delay = Config.INSTAGRAM_POLL_INITIAL
+        deadline = time.monotonic() + Config.INSTAGRAM_CONTAINER_TIMEOUT
+        while True:
+            response = requests.get(url, params=params)
+            response.raise_for_status()
+            status = response.json().get('status_code')
+            if status in ('FINISHED', 'ERROR', 'EXPIRED'):
+                return status
+            if time.monotonic() + delay > deadline:
+                return 'TIMEOUT'
+            time.sleep(delay)
+            delay = min(delay * 2, Config.INSTAGRAM_POLL_MAX_DELAY)
+
+    def _publish_container(self, container_id):
+        url = f"{self.base_url}/{self.account_id}/media_publish"
+        data = {
+            'creation_id': container_id,
+            'access_token': self.access_token
+        }
+        response = requests.post(url, data=data)
+        response.raise_for_status()
+        return response.json().get('id')
     
     def get_metrics(self, post_id):
         
         try:
             url=f"{self.base_url}/{post_id}/insights"
             params={
-                'metric': "engagement,impressions,reach,saved",
+                'metric': INSIGHT_METRICS,
                 'access_token':self.access_token
             }
 
             response=requests.get(url, params=params)
             response.raise_for_status()
-            data=response.json()
-
-            metrics={}
-            for item in data.get('data',[]):
-                metrics[item['name']]=item['values'][0]['value']
+            metrics=self._parse_metrics(response.json())
 
             logger.info(f"Instagram post {post_id} metrics: {metrics}")
             return metrics
@@ -94,6 +130,18 @@ class InstagramClient(SocialMediaBase):
         except Exception as e:
             logger.error(f"Failed to get Instagram metrics for {post_id}: {e}")
             return None
-            
 
-        
\ No newline at end of file
+    def get_metrics_batch(self, post_ids):
+        #Insights for up to 50 posts per Graph call; failed sub-requests map to None
+        urls = {post_id: f"{post_id}/insights?metric={INSIGHT_METRICS}" for post_id in post_ids}
+        bodies = GraphBatch(self.access_token, self.base_url).get(list(urls.values()))
+        return {
+            post_id: self._parse_metrics(bodies[url]) if bodies.get(url) is not None else None
+            for post_id, url in urls.items()
+        }
+
+    def _parse_metrics(self, data):
+        metrics={}
+        for item in data.get('data',[]):
+            metrics[item['name']]=item['values'][0]['value']
+        return metrics
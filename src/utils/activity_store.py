@@ -0,0 +1,218 @@
+import csv
+import logging
+import sqlite3
+import threading
+from collections import Counter
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from pathlib import Path
+from Config import Config
+
+#Clients log types and statuses in whatever case they like ('facebook', 'success'),
+#the store keeps one spelling so counts line up
+ACTIVITY_TYPES = {'email': 'Email', 'facebook': 'Facebook', 'instagram': 'Instagram', 'linkedin': 'LinkedIn'}
+ACTIVITY_STATUSES = {'success': 'Success', 'failed': 'Failed'}
+POST_TYPES = ('Facebook', 'Instagram', 'LinkedIn')
+
+
+def normalize_type(activity_type):
+    value = str(activity_type).strip()
+    return ACTIVITY_TYPES.get(value.lower(), value)
+
+
+def normalize_status(status):
+    value = str(status).strip()
+    return ACTIVITY_STATUSES.get(value.lower(), value)
+
+
+def empty_counts():
+    return {name: {'Success': 0, 'Failed': 0} for name in ACTIVITY_TYPES.values()}
+
+
+class ActivityStore:
+    #Append-only activity events plus per-hour and per-day counters.
+    #Counters are bumped in the same transaction as the event insert, so
+    #quota and weekly-stats queries read a handful of buckets instead of
+    #re-parsing the whole log.
+
+    def __init__(self, db_path=None):
+        self.db_path = Path(db_path or Config.ACTIVITY_DB_PATH)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS events (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    ts TEXT NOT NULL,
+                    type TEXT NOT NULL,
+                    status TEXT NOT NULL,
+                    details TEXT NOT NULL DEFAULT ''
+                )
+            ''')
+            conn.execute('CREATE INDEX IF NOT EXISTS events_ts ON events (ts)')
+            for table, key in (('hourly', 'hour'), ('daily', 'day')):
+                conn.execute(f'''
+                    CREATE TABLE IF NOT EXISTS {table} (
+                        {key} TEXT NOT NULL,
+                        type TEXT NOT NULL,
+                        status TEXT NOT NULL,
+                        count INTEGER NOT NULL DEFAULT 0,
+                        PRIMARY KEY ({key}, type, status)
+                    )
+                ''')
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(str(self.db_path), timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def _insert(self, conn, rows):
+        conn.executemany(
+            'INSERT INTO events (ts, type, status, details) VALUES (?, ?, ?, ?)',
+            ((ts.isoformat(), t, s, d) for ts, t, s, d in rows)
+        )
+        for table, key, fmt in (('hourly', 'hour', '%Y-%m-%dT%H'), ('daily', 'day', '%Y-%m-%d')):
+            conn.executemany(f'''
+                INSERT INTO {table} ({key}, type, status, count) VALUES (?, ?, ?, 1)
+                ON CONFLICT ({key}, type, status) DO UPDATE SET count = count + 1
+            ''', ((ts.strftime(fmt), t, s) for ts, t, s, _ in rows))
+
+    def record(self, activity_type, status, details='', timestamp=None):
+        self.record_many([(timestamp or datetime.now(), activity_type, status, details)])
+
+    def record_many(self, rows):
+        #rows: iterable of (timestamp, type, status, details)
+        rows = [
+            (ts, normalize_type(t), normalize_status(s), '' if d is None else str(d))
+            for ts, t, s, d in rows
+        ]
+        if rows:
+            with self._connect() as conn:
+                self._insert(conn, rows)
+        return len(rows)
+
+    def _add(self, counts, rows):
+        for activity_type, status, count in rows:
+            counts.setdefault(activity_type, {'Success': 0, 'Failed': 0})
+            counts[activity_type][status] = counts[activity_type].get(status, 0) + count
+        return counts
+
+    def counts_since(self, since):
+        #{type: {status: count}} for events after `since`.
+        #Whole hours come from the hourly buckets, only the partial first hour touches events.
+        first_full_hour = since.replace(minute=0, second=0, microsecond=0) + timedelta(hours=1)
+        with self._connect() as conn:
+            buckets = conn.execute('''
+                SELECT type, status, SUM(count) FROM hourly WHERE hour >= ?
+                GROUP BY type, status
+            ''', (first_full_hour.strftime('%Y-%m-%dT%H'),)).fetchall()
+            partial = conn.execute('''
+                SELECT type, status, COUNT(*) FROM events WHERE ts > ? AND ts < ?
+                GROUP BY type, status
+            ''', (since.isoformat(), first_full_hour.isoformat())).fetchall()
+        return self._add(self._add(empty_counts(), buckets), partial)
+
+    def last_24_hours(self):
+        return self.counts_since(datetime.now() - timedelta(hours=24))
+
+    def daily_counts(self, start, end):
+        #{'YYYY-MM-DD': {type: {status: count}}} for start..end inclusive
+        with self._connect() as conn:
+            rows = conn.execute('''
+                SELECT day, type, status, count FROM daily WHERE day >= ? AND day <= ?
+            ''', (start.strftime('%Y-%m-%d'), end.strftime('%Y-%m-%d'))).fetchall()
+        days = {}
+        for day, activity_type, status, count in rows:
+            self._add(days.setdefault(day, empty_counts()), [(activity_type, status, count)])
+        return days
+
+    def day_stats(self, day):
+        counts = self.daily_counts(day, day).get(day.strftime('%Y-%m-%d'), empty_counts())
+        return {
+            'emails': counts['Email']['Success'],
+            'posts': sum(counts[t]['Success'] for t in POST_TYPES)
+        }
+
+    def import_csv(self, csv_path, batch_size=5000):
+        #Load an existing activity.csv, see import_rows
+        with open(csv_path, 'r', newline='', encoding='utf-8') as f:
+            return self.import_rows(csv.DictReader(f), batch_size)
+
+    def import_rows(self, rows, batch_size=5000):
+        #Load activity.csv-style dicts. Rows that do not parse are skipped, and so are
+        #events already in the store, so importing the same log twice adds nothing.
+        imported = 0
+        batch = []
+        for row in rows:
+            try:
+                status = normalize_status(row['Status'])
+                if status not in ACTIVITY_STATUSES.values():
+                    continue
+                batch.append((datetime.fromisoformat(row['Timestamp']), row['Type'], status, row.get('Details')))
+            except (KeyError, TypeError, ValueError):
+                continue
+            if len(batch) >= batch_size:
+                imported += self.record_many(self._unseen(batch))
+                batch = []
+        return imported + self.record_many(self._unseen(batch))
+
+    def _unseen(self, rows):
+        #Drop rows matching events already stored, counting duplicates so repeats in the log survive
+        keys = [(ts.isoformat(), normalize_type(t), s, '' if d is None else str(d)) for ts, t, s, d in rows]
+        timestamps = sorted({key[0] for key in keys})
+        existing = Counter()
+        with self._connect() as conn:
+            for i in range(0, len(timestamps), 500):
+                chunk = timestamps[i:i + 500]
+                existing.update(conn.execute(
+                    f'SELECT ts, type, status, details FROM events WHERE ts IN ({",".join("?" * len(chunk))})',
+                    chunk
+                ).fetchall())
+        unseen = []
+        for row, key in zip(rows, keys):
+            if existing[key]:
+                existing[key] -= 1
+            else:
+                unseen.append(row)
+        return unseen
+
+    def version(self):
+        #Newest event id, changes whenever anything is recorded; cheap via the primary key
+        with self._connect() as conn:
+            return conn.execute('SELECT MAX(id) FROM events').fetchone()[0] or 0
+
+    def event_count(self):
+        with self._connect() as conn:
+            return conn.execute('SELECT COUNT(*) FROM events').fetchone()[0]
+
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+def get_activity_store(db_path=None):
+    #One store object per database file per process
+    path = Path(db_path or Config.ACTIVITY_DB_PATH)
+    with _stores_lock:
+        if path not in _stores:
+            _stores[path] = ActivityStore(path)
+        return _stores[path]
+
+
+class ActivityStoreHandler(logging.Handler):
+    #Feeds activity records into the store from the logging listener thread
+
+    def emit(self, record):
+        if not hasattr(record, 'activity'):
+            return
+        try:
+            activity_type, status, details = record.activity
+            get_activity_store().record(
+                activity_type, status, details, datetime.fromtimestamp(record.created)
+            )
+        except Exception:
+            self.handleError(record)
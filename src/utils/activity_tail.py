@@ -0,0 +1,165 @@
+import csv
+import gzip
+import io
+import os
+import threading
+import time
+from collections import Counter, deque
+from datetime import datetime, timedelta
+from pathlib import Path
+from src.utils.activity_store import normalize_type, normalize_status, empty_counts
+from src.utils.log_rotation import LogArchive
+
+
+class ActivityTailCache:
+    #Sliding-window activity counts kept in memory by tailing activity.csv.
+    #Each refresh reads only the bytes appended since the last one, and
+    #per-minute buckets fall out of the window as it slides. A new inode or
+    #a file shorter than our offset means rotation or truncation: the window
+    #is rebuilt from the archived segments and the new file.
+
+    def __init__(self, path, window=timedelta(hours=24), bucket_seconds=60, archive_dir=None,
+                 clock=time.time, on_rows=None):
+        self.path = Path(path)
+        #Called with the rows from each new read of the live file. Not for archive seeds,
+        #nor for the first load, which only catches up with rows written before we started.
+        self.on_rows = on_rows
+        self.window = window.total_seconds()
+        self.bucket_seconds = bucket_seconds
+        self.archive = LogArchive(self.path, archive_dir)
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._inode = None
+        self._offset = 0
+        self._buckets = deque()
+        self._totals = Counter()
+        self.hits = 0
+        self.misses = 0
+        self.resets = 0
+        self.rows_parsed = 0
+        self.last_refresh_us = 0.0
+        self.total_parse_ms = 0.0
+
+    def _reset(self):
+        self._inode = None
+        self._offset = 0
+        self._buckets.clear()
+        self._totals.clear()
+
+    def _add(self, row):
+        try:
+            timestamp = datetime.fromisoformat(row[0]).timestamp()
+            key = (normalize_type(row[1]), normalize_status(row[2]))
+        except (IndexError, ValueError):
+            return
+        bucket = int(timestamp // self.bucket_seconds)
+        if bucket < int((self.clock() - self.window) // self.bucket_seconds):
+            return
+        if not self._buckets or self._buckets[-1][0] < bucket:
+            self._buckets.append((bucket, Counter()))
+            counter = self._buckets[-1][1]
+        else:
+            #Out-of-order row (e.g. from a segment), find its bucket
+            counter = next((c for b, c in reversed(self._buckets) if b == bucket), None)
+            if counter is None:
+                self._buckets.append((bucket, Counter()))
+                self._buckets = deque(sorted(self._buckets, key=lambda item: item[0]))
+                counter = next(c for b, c in self._buckets if b == bucket)
+        counter[key] += 1
+        self._totals[key] += 1
+        self.rows_parsed += 1
+
+    def _evict(self):
+        cutoff = int((self.clock() - self.window) // self.bucket_seconds)
+        while self._buckets and self._buckets[0][0] < cutoff:
+            _, counter = self._buckets.popleft()
+            self._totals -= counter
+
+    def _seed_from_archive(self):
+        #Rows from rotated segments still inside the window, only overlapping segments are opened
+        since = datetime.fromtimestamp(self.clock() - self.window)
+        for index in self.archive.segments():
+            if index.get('end') and index['end'] >= since.isoformat():
+                with gzip.open(index['path'], 'rt', newline='', encoding='utf-8') as f:
+                    for row in csv.reader(f):
+                        self._add(row)
+        #A rotation caught mid-way has not produced its segment yet
+        staging = self.path.with_name(self.path.name + '.rotating')
+        try:
+            with open(staging, 'r', newline='', encoding='utf-8') as f:
+                for row in csv.reader(f):
+                    self._add(row)
+        except FileNotFoundError:
+            pass
+
+    def _read_new(self, notify=True):
+        #Parse complete rows appended since the last offset
+        with open(self.path, 'rb') as f:
+            f.seek(self._offset)
+            data = f.read()
+        end = data.rfind(b'\n') + 1
+        if end == 0:
+            return
+        rows = list(csv.reader(io.StringIO(data[:end].decode('utf-8', errors='replace'), newline='')))
+        for row in rows:
+            self._add(row)
+        self._offset += end
+        if notify and self.on_rows is not None:
+            self.on_rows([row for row in rows if row and row[0] != 'Timestamp'])
+
+    def refresh(self):
+        start = time.perf_counter()
+        with self._lock:
+            try:
+                stat = os.stat(self.path)
+            except FileNotFoundError:
+                stat = None
+
+            #-1 stands for "no live file yet", so a missing file is only seeded once
+            inode = stat.st_ino if stat is not None else -1
+            cold = self._inode is None
+            if inode != self._inode or (stat is not None and stat.st_size < self._offset):
+                if self._inode is not None:
+                    self.resets += 1
+                self._reset()
+                self._seed_from_archive()
+                self._inode = inode
+
+            if stat is not None and stat.st_size > self._offset:
+                self.misses += 1
+                parse_start = time.perf_counter()
+                self._read_new(notify=not cold)
+                self.total_parse_ms += (time.perf_counter() - parse_start) * 1000
+            else:
+                self.hits += 1
+
+            self._evict()
+            self.last_refresh_us = (time.perf_counter() - start) * 1e6
+
+    def version(self):
+        #Changes whenever counts() could: new rows read, a rotation, or a bucket sliding out
+        self.refresh()
+        with self._lock:
+            return (self._inode, self._offset, self._buckets[0][0] if self._buckets else None)
+
+    def counts(self):
+        #{type: {status: count}} for the window, same shape as ActivityStore.last_24_hours()
+        self.refresh()
+        with self._lock:
+            counts = empty_counts()
+            for (activity_type, status), n in self._totals.items():
+                counts.setdefault(activity_type, {'Success': 0, 'Failed': 0})[status] = n
+        return counts
+
+    def stats(self):
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'resets': self.resets,
+                'rows_parsed': self.rows_parsed,
+                'offset': self._offset,
+                'buckets': len(self._buckets),
+                'last_refresh_us': round(self.last_refresh_us, 1),
+                'total_parse_ms': round(self.total_parse_ms, 2)
+            }
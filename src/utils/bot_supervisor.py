@@ -0,0 +1,285 @@
+import json
+import os
+import signal
+import subprocess
+import sys
+import threading
+import time
+from collections import deque
+from itertools import count
+from pathlib import Path
+import psutil
+from Config import Config
+from src.utils.logger import logger
+
+
+class BotSupervisor:
+    #Starts, finds and stops the scheduler process for the API.
+    #The process we spawn is recorded in a PID file together with its
+    #create_time, so status checks look up one PID instead of walking the
+    #process table, and a recycled PID is never mistaken for the bot.
+    #Status is cached for a short TTL; a full scan only happens when the
+    #tracked process is gone (e.g. the bot was started by hand).
+    #For a child we spawned, a reader thread drains stdout/stderr into a
+    #bounded ring buffer so the bot never blocks on a full pipe, and a crash
+    #is followed by a restart after an exponential backoff.
+
+    def __init__(self, script_path, pid_file=None, status_ttl=None, python=None, clock=time.monotonic,
+                 output_lines=None, auto_restart=None, backoff=None, max_delay=None, stable_seconds=None,
+                 ready_file=None):
+        self.script_path = Path(script_path)
+        self.pid_file = Path(pid_file or Config.BOT_PID_FILE)
+        self.ready_file = Path(ready_file or Config.BOT_READY_FILE)
+        self.status_ttl = Config.BOT_STATUS_TTL if status_ttl is None else status_ttl
+        self.python = python or sys.executable
+        self.clock = clock
+        self.auto_restart = Config.BOT_AUTO_RESTART if auto_restart is None else auto_restart
+        self.backoff = Config.BOT_RESTART_BACKOFF if backoff is None else backoff
+        self.max_delay = Config.BOT_RESTART_MAX_DELAY if max_delay is None else max_delay
+        self.stable_seconds = Config.BOT_STABLE_SECONDS if stable_seconds is None else stable_seconds
+        self._lock = threading.RLock()
+        self._process = None
+        #(seq, line) pairs, seq doubles as the paging cursor for /api/logs?type=bot
+        self._output = deque(maxlen=output_lines or Config.BOT_OUTPUT_LINES)
+        self._seq = count(1)
+        self._stop_requested = threading.Event()
+        self._failures = 0
+        self.restarts = 0
+        self.last_exit_code = None
+        self.restart_pending = False
+        self._status = None
+        #None until the first check and after invalidate()
+        self._status_at = None
+        self.lookups = 0
+        self.scans = 0
+        self.cache_hits = 0
+
+    def _matches(self, cmdline):
+        #An argument that is the script itself, not just text mentioning it (e.g. a shell -c line)
+        return any(os.path.basename(arg) == self.script_path.name for arg in cmdline or [])
+
+    def _read_pid_file(self):
+        try:
+            record = json.loads(self.pid_file.read_text(encoding='utf-8'))
+            return int(record['pid']), float(record['create_time'])
+        except (OSError, ValueError, KeyError, TypeError):
+            return None
+
+    def _write_pid_file(self, proc):
+        self.pid_file.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.pid_file.with_name(self.pid_file.name + '.tmp')
+        tmp.write_text(json.dumps({'pid': proc.pid, 'create_time': proc.create_time()}), encoding='utf-8')
+        os.replace(tmp, self.pid_file)
+
+    def _clear_pid_file(self):
+        try:
+            self.pid_file.unlink()
+        except FileNotFoundError:
+            pass
+
+    def _tracked(self):
+        #The recorded process, if it is still the same process we recorded
+        record = self._read_pid_file()
+        if record is None:
+            return None
+        pid, create_time = record
+        self.lookups += 1
+        try:
+            proc = psutil.Process(pid)
+            if abs(proc.create_time() - create_time) < 1 and proc.status() != psutil.STATUS_ZOMBIE:
+                return proc
+        except (psutil.NoSuchProcess, psutil.AccessDenied):
+            pass
+        return None
+
+    def _scan(self):
+        #Full process-table walk, only when tracking came up empty
+        self.scans += 1
+        found = []
+        for proc in psutil.process_iter(['pid', 'cmdline']):
+            try:
+                if self._matches(proc.info['cmdline']):
+                    found.append(proc)
+            except (psutil.NoSuchProcess, psutil.AccessDenied):
+                continue
+        return found
+
+    def processes(self):
+        #Live bot processes; a process found by scanning is adopted so the next check is cheap
+        with self._lock:
+            proc = self._tracked()
+            if proc is not None:
+                return [proc]
+            found = self._scan()
+            if found:
+                self._write_pid_file(found[0])
+            else:
+                self._clear_pid_file()
+            return found
+
+    def status(self):
+        #{'running', 'pid', 'uptime'}, served from cache within the TTL
+        with self._lock:
+            now = self.clock()
+            if self._status_at is None or now - self._status_at >= self.status_ttl:
+                procs = self.processes()
+                try:
+                    self._status = (procs[0].pid, procs[0].create_time()) if procs else None
+                except (psutil.NoSuchProcess, psutil.AccessDenied):
+                    self._status = None
+                self._status_at = now
+            else:
+                self.cache_hits += 1
+            status = self._status
+
+        if status is None:
+            return {'running': False, 'pid': None, 'uptime': 0}
+        pid, create_time = status
+        return {'running': True, 'pid': pid, 'uptime': max(0, int(time.time() - create_time))}
+
+    def is_running(self):
+        return self.status()['running']
+
+    def invalidate(self):
+        with self._lock:
+            self._status_at = None
+
+    def _record(self, line):
+        self._output.append((next(self._seq), line))
+
+    def _spawn(self):
+        #Merge stderr into stdout so one reader drains both
+        env = dict(os.environ, PYTHONUNBUFFERED='1', BOT_READY_FILE=str(self.ready_file))
+        self.ready_file.unlink(missing_ok=True)
+        process = subprocess.Popen(
+            [self.python, str(self.script_path)],
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            cwd=str(self.script_path.parent),
+            env=env
+        )
+        self._process = process
+        try:
+            self._write_pid_file(psutil.Process(process.pid))
+        except psutil.NoSuchProcess:
+            logger.warning(f"Bot process {process.pid} exited immediately")
+        self.invalidate()
+        threading.Thread(
+            target=self._watch, args=(process, self.clock()),
+            name=f'bot-output-{process.pid}', daemon=True
+        ).start()
+        logger.info(f"Started bot process {process.pid}")
+        return process.pid
+
+    def _watch(self, process, started):
+        #Reader thread: drain output until EOF, then decide whether to restart
+        for raw in iter(process.stdout.readline, b''):
+            self._record(raw.decode('utf-8', errors='replace').rstrip('\r\n'))
+        process.stdout.close()
+        code = process.wait()
+
+        with self._lock:
+            if self._process is not process:
+                return
+            self._process = None
+            self.last_exit_code = code
+            self.invalidate()
+            if self._stop_requested.is_set() or not self.auto_restart:
+                return
+            #Quick crashes back off exponentially, a long healthy run starts over
+            self._failures = 1 if self.clock() - started >= self.stable_seconds else self._failures + 1
+            delay = min(self.max_delay, self.backoff * 2 ** (self._failures - 1))
+            self.restart_pending = True
+
+        logger.warning(f"Bot process {process.pid} exited with code {code}, restarting in {delay:.0f}s")
+        self._record(f"[supervisor] exited with code {code}, restarting in {delay:.0f}s")
+        if self._stop_requested.wait(delay):
+            return
+        with self._lock:
+            self.restart_pending = False
+            if self._stop_requested.is_set() or self._process is not None:
+                return
+            self.restarts += 1
+            self._spawn()
+
+    def start(self):
+        #Spawn the scheduler, returns its PID
+        with self._lock:
+            self._stop_requested.clear()
+            self._failures = 0
+            return self._spawn()
+
+    def wake(self):
+        #Ask the scheduler to re-read posts now (SIGUSR1), False when there is nothing to signal
+        if not hasattr(signal, 'SIGUSR1'):
+            return False
+        with self._lock:
+            proc = self._tracked()
+        if proc is None or not self._ready(proc):
+            #Still starting: SIGUSR1 would kill it before its handler exists, and it loads posts on start anyway
+            return False
+        try:
+            proc.send_signal(signal.SIGUSR1)
+            return True
+        except (psutil.NoSuchProcess, psutil.AccessDenied):
+            return False
+
+    def _ready(self, proc):
+        #The scheduler writes its PID to the ready file once SIGUSR1 is handled
+        try:
+            return int(self.ready_file.read_text().strip()) == proc.pid
+        except (OSError, ValueError):
+            return False
+
+    def output(self, limit=100, before=None):
+        #Last `limit` captured lines (oldest first) and the cursor for older ones
+        buffered = list(self._output)
+        lines = [(seq, line) for seq, line in buffered if before is None or seq < before]
+        lines = lines[-limit:] if limit > 0 else []
+        cursor = lines[0][0] if lines and lines[0][0] > buffered[0][0] else None
+        return [line for _, line in lines], cursor
+
+    def stop(self, timeout=5):
+        #Terminate every bot process, killing any that outlive the timeout. Returns how many were stopped.
+        #Set first so neither the reader thread nor a pending backoff restarts it
+        self._stop_requested.set()
+        with self._lock:
+            self.restart_pending = False
+            procs = self.processes()
+            for proc in procs:
+                try:
+                    proc.terminate()
+                except psutil.NoSuchProcess:
+                    continue
+            _, alive = psutil.wait_procs(procs, timeout=timeout)
+            for proc in alive:
+                try:
+                    proc.kill()
+                except psutil.NoSuchProcess:
+                    continue
+            if self._process is not None:
+                #Reap our own child so it does not linger as a zombie
+                try:
+                    self._process.wait(timeout=timeout)
+                except subprocess.TimeoutExpired:
+                    pass
+                self._process = None
+            self._clear_pid_file()
+            self.invalidate()
+            if procs:
+                logger.info(f"Stopped {len(procs)} bot process(es)")
+            return len(procs)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'pid_file': str(self.pid_file),
+                'lookups': self.lookups,
+                'scans': self.scans,
+                'cache_hits': self.cache_hits,
+                'status_ttl': self.status_ttl,
+                'restarts': self.restarts,
+                'restart_pending': self.restart_pending,
+                'last_exit_code': self.last_exit_code,
+                'output_lines': len(self._output)
+            }
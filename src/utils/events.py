@@ -0,0 +1,155 @@
+import json
+import queue
+import threading
+import time
+from collections import deque
+from itertools import count
+from src.utils.logger import logger
+
+
+def format_sse(event):
+    #One Server-Sent Events frame
+    return f"id: {event['id']}\nevent: {event['event']}\ndata: {json.dumps(event['data'], default=str)}\n\n"
+
+
+class Subscription:
+    #One client's view of the broker: a bounded queue of events.
+    #A client that falls too far behind loses its oldest events and gets a
+    #'resync' event telling it to refetch, instead of slowing everyone else down.
+
+    def __init__(self, broker, max_pending):
+        self.broker = broker
+        self._queue = queue.Queue(max_pending)
+        self.dropped = 0
+
+    def put(self, event):
+        while True:
+            try:
+                self._queue.put_nowait(event)
+                return
+            except queue.Full:
+                try:
+                    self._queue.get_nowait()
+                    self.dropped += 1
+                except queue.Empty:
+                    pass
+                event = {'id': event['id'], 'event': 'resync', 'data': {'dropped': self.dropped}}
+
+    def get(self, timeout=None):
+        #Next event, or None when nothing arrived within timeout
+        try:
+            return self._queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def close(self):
+        self.broker.unsubscribe(self)
+
+
+class EventBroker:
+    #Fans one change feed out to any number of subscribers.
+    #Publishing is a put per subscriber; a short history lets reconnecting
+    #clients replay what they missed via Last-Event-ID.
+
+    def __init__(self, history=200, max_pending=100):
+        self._ids = count(1)
+        self._history = deque(maxlen=history)
+        self._subscribers = set()
+        self._lock = threading.Lock()
+        self.max_pending = max_pending
+        self.published = 0
+
+    def subscribe(self, last_event_id=None):
+        subscription = Subscription(self, self.max_pending)
+        with self._lock:
+            self._subscribers.add(subscription)
+            if last_event_id is not None:
+                missed = [event for event in self._history if event['id'] > last_event_id]
+                if self._history and self._history[0]['id'] > last_event_id + 1:
+                    #Too old to replay exactly
+                    missed = [{'id': self._history[-1]['id'], 'event': 'resync', 'data': {}}]
+                for event in missed:
+                    subscription.put(event)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            self._subscribers.discard(subscription)
+
+    def publish(self, event_type, data):
+        with self._lock:
+            event = {'id': next(self._ids), 'event': event_type, 'data': data}
+            self._history.append(event)
+            self.published += 1
+            subscribers = list(self._subscribers)
+        for subscription in subscribers:
+            subscription.put(event)
+        return event
+
+    def stats(self):
+        with self._lock:
+            return {
+                'subscribers': len(self._subscribers),
+                'published': self.published,
+                'dropped': sum(s.dropped for s in self._subscribers)
+            }
+
+
+class ChangeFeed:
+    #A single background poller that turns cheap change checks into events.
+    #sources: {name: callable} where each callable returns a list of
+    #(event_type, data) deltas since its previous call. However many clients
+    #are connected, each source is checked once per interval.
+
+    def __init__(self, broker, sources, interval=1.0):
+        self.broker = broker
+        self.sources = dict(sources)
+        self.interval = interval
+        self._thread = None
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        self.polls = 0
+        self.last_poll_ms = 0.0
+
+    def poll(self):
+        start = time.perf_counter()
+        for name, source in self.sources.items():
+            try:
+                for event_type, data in source() or []:
+                    self.broker.publish(event_type, data)
+            except Exception as e:
+                logger.error(f"Change feed source '{name}' failed: {e}")
+        self.polls += 1
+        self.last_poll_ms = (time.perf_counter() - start) * 1000
+
+    def start(self):
+        #Idempotent, the first subscriber starts the feed
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name='change-feed', daemon=True)
+            self._thread.start()
+
+    @property
+    def running(self):
+        return self._thread is not None
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.poll()
+
+    def stop(self):
+        self._stop.set()
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is not None:
+            thread.join(timeout=5)
+
+    def stats(self):
+        return {
+            'running': self._thread is not None,
+            'polls': self.polls,
+            'last_poll_ms': round(self.last_poll_ms, 2),
+            'interval': self.interval
+        }
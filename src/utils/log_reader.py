@@ -0,0 +1,80 @@
+import csv
+import io
+import os
+import re
+
+#activity.csv rows start with an ISO timestamp; anything else continues a quoted multi-line field
+ACTIVITY_ROW_START = re.compile(rb'^\d{4}-\d{2}-\d{2}T')
+
+
+def read_lines_reverse(path, before=None, chunk_size=64 * 1024):
+    #Yield (offset, line) from the end of the file backwards, reading fixed-size
+    #blocks so the cost depends on how much is read, not on the file size.
+    #`before` is a byte offset; only lines starting before it are returned.
+    with open(path, 'rb') as f:
+        end = f.seek(0, os.SEEK_END)
+        if before is not None:
+            end = max(0, min(end, before))
+
+        position = end
+        remainder = b''
+        while position > 0:
+            size = min(chunk_size, position)
+            position -= size
+            f.seek(position)
+            block = f.read(size) + remainder
+            lines = block.split(b'\n')
+            #The first piece may be the tail of a line that starts in an earlier block
+            remainder = lines.pop(0)
+            offset = position + len(remainder) + 1
+            found = []
+            for line in lines:
+                found.append((offset, line))
+                offset += len(line) + 1
+            for offset, line in reversed(found):
+                if line.strip():
+                    yield offset, line
+        if remainder.strip():
+            yield 0, remainder
+
+
+def tail_lines(path, limit, before=None):
+    #Last `limit` lines (oldest first) and the cursor for the page before them
+    lines = []
+    cursor = None
+    for offset, line in read_lines_reverse(path, before):
+        if len(lines) >= limit:
+            break
+        lines.append(line.decode('utf-8', errors='replace').rstrip('\r'))
+        cursor = offset
+    lines.reverse()
+    return lines, (cursor or None)
+
+
+def tail_csv(path, limit, before=None, row_start=ACTIVITY_ROW_START):
+    #Last `limit` CSV records as dicts (newest first) plus the cursor for older ones.
+    #Lines that do not look like a record start are glued onto the line above,
+    #so quoted fields containing newlines survive the backwards read.
+    with open(path, 'r', newline='', encoding='utf-8') as f:
+        header_line = f.readline()
+    header = next(csv.reader([header_line]), [])
+    header_end = len(header_line.encode('utf-8'))
+
+    records = []
+    cursor = None
+    pending = []
+    for offset, line in read_lines_reverse(path, before):
+        if offset < header_end or len(records) >= limit:
+            break
+        pending.insert(0, line)
+        if row_start is not None and not row_start.match(line):
+            continue
+        text = b'\n'.join(pending).decode('utf-8', errors='replace')
+        pending = []
+        for row in csv.reader(io.StringIO(text)):
+            records.append(dict(zip(header, row)))
+        cursor = offset
+
+    if cursor is not None and cursor <= header_end:
+        cursor = None
+    return records, cursor
@@ -0,0 +1,286 @@
+import csv
+import gzip
+import json
+import os
+import re
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from Config import Config
+from src.utils.activity_store import normalize_type, normalize_status
+
+try:
+    import fcntl
+except ImportError:
+    #Windows has no flock; there the API and scheduler do not share a lock around rotation
+    fcntl = None
+
+#automation.log lines start with the logging asctime, e.g. "2025-11-14 09:00:00,123 - root - INFO - ..."
+LOG_LINE = re.compile(r'^(\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2}),\d+ - [^ ]+ - (\w+) - ')
+
+
+def _widen(index, timestamp):
+    stamp = timestamp.isoformat()
+    if index['start'] is None or stamp < index['start']:
+        index['start'] = stamp
+    if index['end'] is None or stamp > index['end']:
+        index['end'] = stamp
+
+
+def index_activity(lines):
+    #Sidecar index for an activity.csv segment: time range and counts by type/status
+    index = {'start': None, 'end': None, 'rows': 0, 'counts': {}}
+    for row in csv.DictReader(lines):
+        try:
+            timestamp = datetime.fromisoformat(row['Timestamp'])
+        except (KeyError, TypeError, ValueError):
+            continue
+        _widen(index, timestamp)
+        index['rows'] += 1
+        by_status = index['counts'].setdefault(normalize_type(row.get('Type', '')), {})
+        status = normalize_status(row.get('Status', ''))
+        by_status[status] = by_status.get(status, 0) + 1
+    return index
+
+
+def index_log(lines):
+    #Sidecar index for an automation.log segment: time range and counts by level
+    index = {'start': None, 'end': None, 'rows': 0, 'counts': {}}
+    for line in lines:
+        match = LOG_LINE.match(line)
+        if not match:
+            continue
+        _widen(index, datetime.strptime(match.group(1), '%Y-%m-%d %H:%M:%S'))
+        index['rows'] += 1
+        index['counts'][match.group(2)] = index['counts'].get(match.group(2), 0) + 1
+    return index
+
+
+def started_at(path):
+    #Epoch time of the first record in a live log, so time-based rotation
+    #survives process restarts. None when the file is missing or empty.
+    try:
+        with open(path, 'r', encoding='utf-8', errors='replace') as f:
+            for _ in range(2):
+                line = f.readline()
+                match = LOG_LINE.match(line)
+                if match:
+                    return datetime.strptime(match.group(1), '%Y-%m-%d %H:%M:%S').timestamp()
+                try:
+                    return datetime.fromisoformat(line.split(',', 1)[0]).timestamp()
+                except ValueError:
+                    continue
+    except OSError:
+        pass
+    return None
+
+
+class RotationLock:
+    #Lock file beside a live log, shared by every process writing to it.
+    #Rotation holds it exclusively from the rename until the segment is written; writers
+    #hold it shared while they check they still have the live file open and write.
+    #A line therefore never lands in a file that is being archived.
+
+    def __init__(self, path):
+        self.path = Path(path).with_name(Path(path).name + '.lock')
+        self._fd = None
+
+    def _lock(self, mode):
+        if fcntl is None:
+            return False
+        if self._fd is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        fcntl.flock(self._fd, mode)
+        return True
+
+    @contextmanager
+    def shared(self):
+        locked = self._lock(fcntl.LOCK_SH if fcntl else None)
+        try:
+            yield
+        finally:
+            if locked:
+                fcntl.flock(self._fd, fcntl.LOCK_UN)
+
+    @contextmanager
+    def exclusive(self):
+        locked = self._lock(fcntl.LOCK_EX if fcntl else None)
+        try:
+            yield
+        finally:
+            if locked:
+                fcntl.flock(self._fd, fcntl.LOCK_UN)
+
+    def close(self):
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+
+
+def is_live(stream, path):
+    #True while `stream` is still the file at `path`, False once another process rotated it away
+    try:
+        opened, current = os.fstat(stream.fileno()), os.stat(path)
+    except (OSError, ValueError):
+        return False
+    return (opened.st_ino, opened.st_dev) == (current.st_ino, current.st_dev)
+
+
+def rotate_segment(path, archive_dir=None, indexer=index_log):
+    #Move `path` into the archive as a gzip segment with a .json index beside it.
+    #The live file is renamed first so writers can reopen it straight away.
+    path = Path(path)
+    if not path.exists() or path.stat().st_size == 0:
+        return None
+    archive_dir = Path(archive_dir or Config.LOG_ARCHIVE_DIR)
+    archive_dir.mkdir(parents=True, exist_ok=True)
+
+    stamp = datetime.now().strftime('%Y%m%dT%H%M%S')
+    segment = archive_dir / f'{path.stem}-{stamp}{path.suffix}.gz'
+    n = 1
+    while segment.exists():
+        segment = archive_dir / f'{path.stem}-{stamp}-{n}{path.suffix}.gz'
+        n += 1
+
+    staging = path.with_name(path.name + '.rotating')
+    os.replace(path, staging)
+
+    with open(staging, 'r', newline='', encoding='utf-8', errors='replace') as src, \
+            gzip.open(segment, 'wt', newline='', encoding='utf-8') as dest:
+        def copied():
+            for line in src:
+                dest.write(line)
+                yield line
+        index = indexer(copied())
+        #Drain anything the indexer stopped short of
+        for line in src:
+            dest.write(line)
+
+    index.update({
+        'segment': segment.name,
+        'source': path.name,
+        'rotated_at': time.time(),
+        'raw_bytes': staging.stat().st_size,
+        'compressed_bytes': segment.stat().st_size
+    })
+    sidecar = segment.with_name(segment.name + '.json')
+    tmp = sidecar.with_name(sidecar.name + '.tmp')
+    tmp.write_text(json.dumps(index, indent=2), encoding='utf-8')
+    os.replace(tmp, sidecar)
+    staging.unlink()
+    return segment
+
+
+class LogArchive:
+    #Read side of the rotated segments for one log (activity.csv or automation.log).
+    #Segments whose index says they are outside the requested window are never opened.
+
+    def __init__(self, live_path, archive_dir=None):
+        self.live_path = Path(live_path)
+        self.archive_dir = Path(archive_dir or Config.LOG_ARCHIVE_DIR)
+
+    def segments(self):
+        #Sidecar indexes, oldest first
+        pattern = f'{self.live_path.stem}-*{self.live_path.suffix}.gz.json'
+        indexes = []
+        for sidecar in self.archive_dir.glob(pattern):
+            try:
+                index = json.loads(sidecar.read_text(encoding='utf-8'))
+            except (OSError, ValueError):
+                continue
+            index['path'] = str(sidecar.with_name(sidecar.name[:-len('.json')]))
+            indexes.append(index)
+        return sorted(indexes, key=lambda index: (index.get('start') or '', index.get('rotated_at', 0)))
+
+    def _overlaps(self, index, start, end):
+        if index.get('start') is None:
+            return False
+        if start is not None and index['end'] < start.isoformat():
+            return False
+        if end is not None and index['start'] >= end.isoformat():
+            return False
+        return True
+
+    def _contained(self, index, start, end):
+        return ((start is None or index['start'] >= start.isoformat()) and
+                (end is None or index['end'] < end.isoformat()))
+
+    def _read_rows(self, handle, start, end):
+        for row in csv.DictReader(handle):
+            try:
+                timestamp = datetime.fromisoformat(row['Timestamp'])
+            except (KeyError, TypeError, ValueError):
+                continue
+            if (start is None or timestamp >= start) and (end is None or timestamp < end):
+                yield row
+
+    def iter_rows(self, start=None, end=None):
+        #Activity rows in [start, end), oldest first, across segments and the live file
+        for index in self.segments():
+            if not self._overlaps(index, start, end):
+                continue
+            with gzip.open(index['path'], 'rt', newline='', encoding='utf-8') as f:
+                yield from self._read_rows(f, start, end)
+        if self.live_path.exists():
+            with open(self.live_path, 'r', newline='', encoding='utf-8') as f:
+                yield from self._read_rows(f, start, end)
+
+    def counts(self, start=None, end=None):
+        #{type: {status: count}}; segments fully inside the window are answered from their index
+        counts = {}
+
+        def add(activity_type, status, n=1):
+            by_status = counts.setdefault(activity_type, {'Success': 0, 'Failed': 0})
+            by_status[status] = by_status.get(status, 0) + n
+
+        scan = []
+        for index in self.segments():
+            if not self._overlaps(index, start, end):
+                continue
+            if self._contained(index, start, end):
+                for activity_type, by_status in index['counts'].items():
+                    for status, n in by_status.items():
+                        add(activity_type, status, n)
+            else:
+                scan.append(index['path'])
+
+        for path in scan:
+            with gzip.open(path, 'rt', newline='', encoding='utf-8') as f:
+                for row in self._read_rows(f, start, end):
+                    add(normalize_type(row.get('Type', '')), normalize_status(row.get('Status', '')))
+        if self.live_path.exists():
+            with open(self.live_path, 'r', newline='', encoding='utf-8') as f:
+                for row in self._read_rows(f, start, end):
+                    add(normalize_type(row.get('Type', '')), normalize_status(row.get('Status', '')))
+        return counts
+
+    def iter_lines(self, start=None, end=None):
+        #Plain log lines in [start, end) for automation.log, continuation lines follow their record
+        def read(handle):
+            keep = False
+            for line in handle:
+                match = LOG_LINE.match(line)
+                if match:
+                    timestamp = datetime.strptime(match.group(1), '%Y-%m-%d %H:%M:%S')
+                    keep = (start is None or timestamp >= start) and (end is None or timestamp < end)
+                if keep:
+                    yield line.rstrip('\n')
+
+        for index in self.segments():
+            if self._overlaps(index, start, end):
+                with gzip.open(index['path'], 'rt', encoding='utf-8') as f:
+                    yield from read(f)
+        if self.live_path.exists():
+            with open(self.live_path, 'r', encoding='utf-8', errors='replace') as f:
+                yield from read(f)
+
+    def stats(self):
+        segments = self.segments()
+        return {
+            'segments': len(segments),
+            'compressed_mb': round(sum(s.get('compressed_bytes', 0) for s in segments) / 1024 / 1024, 2),
+            'raw_mb': round(sum(s.get('raw_bytes', 0) for s in segments) / 1024 / 1024, 2),
+            'oldest': segments[0]['start'] if segments else None
+        }
@@ -1,54 +1,233 @@
+import atexit
 import logging
 import csv
+import queue
+import threading
+import time
 from datetime import datetime
+from logging.handlers import QueueHandler, QueueListener
 from pathlib import Path
 from Config import Config
+from src.utils.activity_store import ActivityStoreHandler
+from src.utils.log_rotation import RotationLock, is_live, rotate_segment, started_at, index_activity, index_log
+
+
+def _is_activity(record):
+    return hasattr(record, 'activity')
 
 
 class ActivityCSVHandler(logging.Handler):
     """
-    A logging handler that appends a CSV row for every LogRecord.
-    Columns: Timestamp, LoggerName, Level, Message
+    A logging handler that appends a CSV row for every activity record.
+    Columns: Timestamp, Type, Status, Details
+
+    The file stays open, rows are buffered and written in batches, and a
+    timer flushes whatever is pending so readers never lag far behind.
+    With max_bytes or rotate_seconds set, the file is moved into the
+    archive as a compressed, indexed segment once it gets too big or old.
+    The API and scheduler processes share the file; rotation is coordinated
+    through a lock file and the other process follows to the new file.
+    If writes keep failing, at most max_pending rows are held for retry.
     """
-    def __init__(self, csv_path, level=logging.INFO):
+    HEADER = ['Timestamp', 'Type', 'Status', 'Details']
+
+    def __init__(self, csv_path, level=logging.INFO, batch_size=100, flush_interval=1.0,
+                 max_bytes=None, rotate_seconds=None, archive_dir=None, max_pending=10000):
         super().__init__(level)
+        self.max_pending = max_pending
+        self.dropped = 0
+        self._failing = False
+        self.max_bytes = max_bytes
+        self.rotate_seconds = rotate_seconds
+        self.archive_dir = archive_dir
+        self._opened_at = None
         self.csv_path = Path(csv_path)
         # ensure parent directory exists
         self.csv_path.parent.mkdir(parents=True, exist_ok=True)
+        self.rotation_lock = RotationLock(self.csv_path)
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._file = None
+        self._writer = None
+        self._rows = []
+        self._stopped = threading.Event()
+        self._timer = threading.Thread(target=self._flush_periodically, name='activity-log-flush', daemon=True)
+        self._timer.start()
+
+    def _open(self):
+        self._file = open(self.csv_path, "a", newline="", encoding="utf-8")
+        self._writer = csv.writer(self._file)
+        self._opened_at = started_at(self.csv_path) or time.time()
+        if self._file.tell() == 0:
+            self._writer.writerow(self.HEADER)
+
+    def _should_rotate(self):
+        if self.max_bytes and self._file.tell() >= self.max_bytes:
+            return True
+        return bool(self.rotate_seconds) and time.time() - self._opened_at >= self.rotate_seconds
+
+    def _rotate(self):
+        with self.rotation_lock.exclusive():
+            #Another process may have rotated first, then there is nothing left to archive
+            live = is_live(self._file, self.csv_path)
+            self._file.close()
+            self._file = None
+            if live:
+                rotate_segment(self.csv_path, self.archive_dir, index_activity)
 
     def emit(self, record):
+        if not _is_activity(record):
+            return
         try:
+            activity_type, status, details = record.activity
             row = [
-                datetime.now().isoformat(),
-                record.name,
-                record.levelname,
-                self.format(record)  # formatted message (includes extra info if formatter set)
+                datetime.fromtimestamp(record.created).isoformat(),
+                activity_type,
+                status,
+                details
             ]
-            file_exists = self.csv_path.exists()
-            with open(self.csv_path, "a", newline="", encoding="utf-8") as f:
-                writer = csv.writer(f)
-                if not file_exists:
-                    writer.writerow(["Timestamp", "Logger", "Level", "Message"])
-                writer.writerow(row)
+            self.acquire()
+            try:
+                self._rows.append(row)
+                if len(self._rows) > self.max_pending:
+                    #Writes keep failing, keep the newest rows rather than grow without bound
+                    overflow = len(self._rows) - self.max_pending
+                    del self._rows[:overflow]
+                    self.dropped += overflow
+                pending = len(self._rows)
+            finally:
+                self.release()
+            if pending >= self.batch_size:
+                self.flush()
         except Exception:
             # ensure logging errors don't break the app
             self.handleError(record)
 
+    def flush(self):
+        self.acquire()
+        try:
+            if not self._rows:
+                return
+            with self.rotation_lock.shared():
+                if self._file is not None and not is_live(self._file, self.csv_path):
+                    #The other process rotated the file, follow it to the new one
+                    self._file.close()
+                    self._file = None
+                if self._file is None:
+                    self._open()
+                self._writer.writerows(self._rows)
+                self._file.flush()
+            self._rows = []
+            self._failing = False
+            if self._should_rotate():
+                self._rotate()
+        except Exception:
+            # keep the rows, the next flush will retry; report once per run of failures
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+            if not self._failing:
+                self._failing = True
+                self.handleError(logging.makeLogRecord({
+                    'msg': f'Writing {len(self._rows)} activity rows to {self.csv_path} failed'
+                }))
+        finally:
+            self.release()
+
+    def _flush_periodically(self):
+        while not self._stopped.wait(self.flush_interval):
+            self.flush()
+
+    def close(self):
+        self._stopped.set()
+        self.flush()
+        self.acquire()
+        try:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+            self.rotation_lock.close()
+        finally:
+            self.release()
+        super().close()
+
+
+class SegmentedFileHandler(logging.FileHandler):
+    #FileHandler that archives the log as a compressed, indexed segment
+    #once it passes max_bytes or has been open for rotate_seconds.
+    #Safe to share between processes, see RotationLock.
+
+    def __init__(self, filename, max_bytes=None, rotate_seconds=None, archive_dir=None, **kwargs):
+        super().__init__(filename, **kwargs)
+        self.max_bytes = max_bytes
+        self.rotate_seconds = rotate_seconds
+        self.archive_dir = archive_dir
+        self.rotation_lock = RotationLock(self.baseFilename)
+        self._opened_at = started_at(self.baseFilename) or time.time()
+
+    def emit(self, record):
+        try:
+            with self.rotation_lock.shared():
+                if self.stream is not None and not is_live(self.stream, self.baseFilename):
+                    #The other process rotated the log, follow it to the new file
+                    self.stream.close()
+                    self.stream = self._open()
+                    self._opened_at = started_at(self.baseFilename) or time.time()
+                super().emit(record)
+            if self._should_rotate():
+                self._rotate()
+        except Exception:
+            self.handleError(record)
+
+    def _should_rotate(self):
+        if self.stream is None:
+            return False
+        if self.max_bytes and self.stream.tell() >= self.max_bytes:
+            return True
+        return bool(self.rotate_seconds) and time.time() - self._opened_at >= self.rotate_seconds
+
+    def _rotate(self):
+        with self.rotation_lock.exclusive():
+            #Another process may have rotated first, then there is nothing left to archive
+            live = is_live(self.stream, self.baseFilename)
+            self.stream.close()
+            self.stream = None
+            if live:
+                rotate_segment(self.baseFilename, self.archive_dir, index_log)
+            self.stream = self._open()
+            self._opened_at = started_at(self.baseFilename) or time.time()
 
+    def close(self):
+        self.acquire()
+        try:
+            self.rotation_lock.close()
+        finally:
+            self.release()
+        super().close()
 
 
+_log_queue = queue.Queue(-1)
+_listener = None
 
 
 def setup_logger():
     #setting up application logger
+    #Disk writes happen on a listener thread; callers only pay for a queue put
+    global _listener
     Config.LOGS_DIR.mkdir(parents=True, exist_ok=True)
 
     logger = logging.getLogger()
     logger.setLevel(getattr(logging, Config.LOG_LEVEL))
 
     #fILE HANDLER
-    fh = logging.FileHandler(Config.LOG_FILE)
+    fh = SegmentedFileHandler(
+        Config.LOG_FILE,
+        max_bytes=Config.LOG_MAX_BYTES,
+        rotate_seconds=Config.LOG_ROTATE_HOURS * 3600,
+        archive_dir=Config.LOG_ARCHIVE_DIR
+    )
     fh.setLevel(logging.DEBUG)
+    fh.addFilter(lambda record: not _is_activity(record))
 
     #Console Handler
     ch = logging.StreamHandler()
@@ -56,9 +235,18 @@ def setup_logger():
 
 
     # CSV activity handler
-    csv_handler = ActivityCSVHandler(Config.ACTIVITY_LOG, level=logging.INFO)
+    csv_handler = ActivityCSVHandler(
+        Config.ACTIVITY_LOG,
+        level=logging.INFO,
+        max_bytes=Config.LOG_MAX_BYTES,
+        rotate_seconds=Config.LOG_ROTATE_HOURS * 3600,
+        archive_dir=Config.LOG_ARCHIVE_DIR
+    )
     csv_handler.setLevel(logging.INFO)
 
+    #Activity rollups for the dashboard and quota reports
+    store_handler = ActivityStoreHandler(level=logging.INFO)
+
 
 
     #Formatter
@@ -67,30 +255,46 @@ def setup_logger():
     )
     fh.setFormatter(formatter)
     ch.setFormatter(formatter)
-    csv_handler.setFormatter(formatter)
 
-    logger.addHandler(fh)
+    queue_handler = QueueHandler(_log_queue)
+    logger.addHandler(queue_handler)
     logger.addHandler(ch)
-    logger.addHandler(csv_handler)
+
+    #Activity rows share the queue but stay out of the console and automation.log
+    activity_logger = logging.getLogger('activity')
+    activity_logger.setLevel(logging.INFO)
+    activity_logger.propagate = False
+    activity_logger.addHandler(queue_handler)
+
+    _listener = QueueListener(_log_queue, fh, csv_handler, store_handler, respect_handler_level=True)
+    _listener.start()
+    atexit.register(shutdown_logging)
 
     return logger
 
+def flush_logs():
+    #Block until every queued record is on disk
+    if _listener is None:
+        return
+    _log_queue.join()
+    for handler in _listener.handlers:
+        handler.flush()
+
+def shutdown_logging():
+    #Drain the queue and close the files, safe to call more than once
+    global _listener
+    if _listener is None:
+        return
+    listener, _listener = _listener, None
+    listener.stop()
+    for handler in listener.handlers:
+        handler.close()
+
 def log_activity(activity_type, status, details):
     #Logging activity type to CSV file
-    log_file = Config.ACTIVITY_LOG
-    log_file.parent.mkdir(parents=True, exist_ok=True)
-    log_exists = log_file.exists()
-
-    with open(log_file, 'a', newline='') as f:
-        writer = csv.writer(f)
-        if not log_exists:
-            writer.writerow(['Timestamp', 'Type', 'Status', 'Details'])
-            
-        writer.writerow([
-            datetime.now().isoformat(),
-            activity_type,
-            status,
-            details
-        ])
-
-logger = setup_logger()
\ No newline at end of file
+    logging.getLogger('activity').info(
+        f'{activity_type} {status}: {details}',
+        extra={'activity': (activity_type, status, details)}
+    )
+
+logger = setup_logger()
@@ -0,0 +1,159 @@
+import sqlite3
+import threading
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from pathlib import Path
+from Config import Config
+
+#Names the dashboard expects first; anything else a platform reports is passed through
+ENGAGEMENT_KEYS = ('likes', 'comments', 'shares')
+
+
+def refresh_interval(age, min_interval=None, max_interval=None, stale_days=None):
+    #Seconds until a post of this age should be fetched again, None once it is stale.
+    #A seventh of the post's age, between hourly and daily: new posts hourly, week-old daily.
+    min_interval = Config.METRICS_MIN_INTERVAL if min_interval is None else min_interval
+    max_interval = Config.METRICS_MAX_INTERVAL if max_interval is None else max_interval
+    stale_days = Config.METRICS_STALE_DAYS if stale_days is None else stale_days
+    if age >= timedelta(days=stale_days):
+        return None
+    return min(max_interval, max(min_interval, age.total_seconds() / 7))
+
+
+def parse_time(value):
+    try:
+        return datetime.fromisoformat(str(value)) if value else None
+    except ValueError:
+        return None
+
+
+class MetricsStore:
+    #Time series of post metrics: one row per post, metric and collection time.
+    #The posts table remembers when each post went out and was last collected,
+    #so a run only asks the API about posts that are due.
+
+    def __init__(self, db_path=None):
+        self.db_path = Path(db_path or Config.METRICS_DB_PATH)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS samples (
+                    post_id TEXT NOT NULL,
+                    ts TEXT NOT NULL,
+                    metric TEXT NOT NULL,
+                    value REAL NOT NULL,
+                    PRIMARY KEY (post_id, ts, metric)
+                )
+            ''')
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS posts (
+                    post_id TEXT PRIMARY KEY,
+                    platform TEXT NOT NULL,
+                    posted_at TEXT NOT NULL,
+                    collected_at TEXT
+                )
+            ''')
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(str(self.db_path), timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def due(self, posts, now=None):
+        #posts: iterable of (platform, post_id, posted_at or None); returns the ones to fetch now.
+        #Posts without a posted time are aged from when the store first saw them.
+        now = now or datetime.now()
+        posts = [(platform, str(post_id), posted_at) for platform, post_id, posted_at in posts]
+        with self._connect() as conn:
+            conn.executemany(
+                'INSERT OR IGNORE INTO posts (post_id, platform, posted_at) VALUES (?, ?, ?)',
+                ((post_id, platform, (posted_at or now).isoformat()) for platform, post_id, posted_at in posts)
+            )
+            known = dict(
+                (post_id, (parse_time(posted_at), parse_time(collected_at)))
+                for post_id, posted_at, collected_at in conn.execute('SELECT post_id, posted_at, collected_at FROM posts')
+            )
+
+        due = []
+        for platform, post_id, _ in posts:
+            posted_at, collected_at = known[post_id]
+            interval = refresh_interval(now - posted_at)
+            if interval is None:
+                continue
+            if collected_at is None or (now - collected_at).total_seconds() >= interval:
+                due.append((platform, post_id))
+        return due
+
+    def record(self, post_id, metrics, timestamp=None):
+        #Numeric metrics only; marks the post collected even when it reported nothing
+        ts = (timestamp or datetime.now()).isoformat()
+        rows = [
+            (str(post_id), ts, str(name).lower(), float(value))
+            for name, value in (metrics or {}).items()
+            if isinstance(value, (int, float)) and not isinstance(value, bool)
+        ]
+        with self._connect() as conn:
+            conn.executemany('INSERT OR REPLACE INTO samples (post_id, ts, metric, value) VALUES (?, ?, ?, ?)', rows)
+            conn.execute('UPDATE posts SET collected_at = ? WHERE post_id = ?', (ts, str(post_id)))
+        return len(rows)
+
+    def history(self, post_id, metric=None):
+        #[(timestamp, metric, value)] oldest first
+        query = 'SELECT ts, metric, value FROM samples WHERE post_id = ?'
+        params = [str(post_id)]
+        if metric:
+            query += ' AND metric = ?'
+            params.append(metric)
+        with self._connect() as conn:
+            rows = conn.execute(query + ' ORDER BY ts', params).fetchall()
+        return [(datetime.fromisoformat(ts), name, value) for ts, name, value in rows]
+
+    def totals(self):
+        #{platform: {metric: sum of each post's latest value}}
+        with self._connect() as conn:
+            rows = conn.execute('''
+                SELECT p.platform, s.metric, SUM(s.value)
+                FROM samples s
+                JOIN posts p ON p.post_id = s.post_id
+                JOIN (
+                    SELECT post_id, metric, MAX(ts) AS ts FROM samples GROUP BY post_id, metric
+                ) latest ON latest.post_id = s.post_id AND latest.metric = s.metric AND latest.ts = s.ts
+                GROUP BY p.platform, s.metric
+            ''').fetchall()
+        totals = {}
+        for platform, metric, value in rows:
+            totals.setdefault(platform, {})[metric] = int(value) if float(value).is_integer() else value
+        return totals
+
+    def engagement(self):
+        #Rows for /api/engagement, one per platform
+        result = []
+        for platform, metrics in sorted(self.totals().items()):
+            row = {'platform': platform.title()}
+            row.update({key: metrics.get(key, 0) for key in ENGAGEMENT_KEYS})
+            row.update({key: value for key, value in metrics.items() if key not in ENGAGEMENT_KEYS})
+            result.append(row)
+        return result
+
+    def version(self):
+        #Latest collection time, changes whenever a sample is recorded
+        with self._connect() as conn:
+            return conn.execute('SELECT MAX(collected_at) FROM posts').fetchone()[0] or ''
+
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+def get_metrics_store(db_path=None):
+    #One store object per database file per process
+    path = Path(db_path or Config.METRICS_DB_PATH)
+    with _stores_lock:
+        if path not in _stores:
+            _stores[path] = MetricsStore(path)
+        return _stores[path]
@@ -0,0 +1,116 @@
+import sqlite3
+import threading
+from contextlib import contextmanager
+from datetime import date
+from pathlib import Path
+from Config import Config
+
+
+class QuotaStore:
+    #Durable per-platform, per-day send counters.
+    #Lives in SQLite so a restart, a fresh client or a second process
+    #(scheduler and API) all see the same usage. try_acquire is a single
+    #upsert, so check-and-increment is atomic across processes.
+
+    def __init__(self, db_path=None):
+        self.db_path = Path(db_path or Config.QUOTA_DB_PATH)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS quotas (
+                    platform TEXT NOT NULL,
+                    day TEXT NOT NULL,
+                    used INTEGER NOT NULL DEFAULT 0,
+                    PRIMARY KEY (platform, day)
+                )
+            ''')
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(str(self.db_path), timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def _day(self, day):
+        return (day or date.today()).isoformat()
+
+    def try_acquire(self, platform, limit, amount=1, day=None):
+        #Reserve `amount` sends if that keeps today's usage within limit
+        if limit is None or amount > limit:
+            return limit is None
+        with self._connect() as conn:
+            cursor = conn.execute('''
+                INSERT INTO quotas (platform, day, used) VALUES (?, ?, ?)
+                ON CONFLICT (platform, day) DO UPDATE SET used = used + excluded.used
+                WHERE used + excluded.used <= ?
+            ''', (platform, self._day(day), amount, limit))
+            return cursor.rowcount == 1
+
+    def increment(self, platform, amount=1, day=None):
+        #Record usage without a limit check, returns the new total
+        with self._connect() as conn:
+            conn.execute('''
+                INSERT INTO quotas (platform, day, used) VALUES (?, ?, ?)
+                ON CONFLICT (platform, day) DO UPDATE SET used = used + excluded.used
+            ''', (platform, self._day(day), amount))
+            return self._used(conn, platform, self._day(day))
+
+    def release(self, platform, amount=1, day=None):
+        #Give back a reservation whose send failed; pass the `day` it was taken on,
+        #or one made before midnight would be taken off the new day
+        with self._connect() as conn:
+            conn.execute(
+                'UPDATE quotas SET used = MAX(used - ?, 0) WHERE platform = ? AND day = ?',
+                (amount, platform, self._day(day))
+            )
+
+    def _used(self, conn, platform, day):
+        row = conn.execute(
+            'SELECT used FROM quotas WHERE platform = ? AND day = ?', (platform, day)
+        ).fetchone()
+        return row[0] if row else 0
+
+    def used(self, platform, day=None):
+        with self._connect() as conn:
+            return self._used(conn, platform, self._day(day))
+
+    def set(self, platform, value, day=None):
+        with self._connect() as conn:
+            conn.execute(
+                'INSERT OR REPLACE INTO quotas (platform, day, used) VALUES (?, ?, ?)',
+                (platform, self._day(day), max(0, int(value)))
+            )
+
+    def reset(self, platform, day=None):
+        self.set(platform, 0, day)
+
+    def usage(self, day=None):
+        #{platform: used} for one day
+        with self._connect() as conn:
+            rows = conn.execute(
+                'SELECT platform, used FROM quotas WHERE day = ?', (self._day(day),)
+            ).fetchall()
+        return dict(rows)
+
+    def prune(self, keep_days=30):
+        #Old days are only useful for reports, drop them eventually
+        cutoff = date.fromordinal(date.today().toordinal() - keep_days).isoformat()
+        with self._connect() as conn:
+            conn.execute('DELETE FROM quotas WHERE day < ?', (cutoff,))
+
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+def get_quota_store(db_path=None):
+    #One store object per database file per process
+    path = Path(db_path or Config.QUOTA_DB_PATH)
+    with _stores_lock:
+        if path not in _stores:
+            _stores[path] = QuotaStore(path)
+        return _stores[path]
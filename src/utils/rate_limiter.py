@@ -0,0 +1,115 @@
+import asyncio
+import threading
+import time
+from Config import Config
+
+
+class TokenBucket:
+    #Refills `rate` tokens per second up to `capacity`.
+    #acquire() blocks just long enough for the next token instead of a fixed sleep.
+
+    def __init__(self, rate, capacity=1, clock=time.monotonic, sleep=time.sleep):
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        self.rate = rate
+        self.capacity = max(1, capacity)
+        self.clock = clock
+        self.sleep = sleep
+        self._tokens = float(self.capacity)
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = self.clock()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def try_acquire(self, tokens=1):
+        with self._lock:
+            self._refill()
+            if self._tokens >= tokens:
+                self._tokens -= tokens
+                return True
+            return False
+
+    def acquire(self, tokens=1, timeout=None):
+        deadline = None if timeout is None else self.clock() + timeout
+        while True:
+            with self._lock:
+                self._refill()
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return True
+                wait = (tokens - self._tokens) / self.rate
+
+            if deadline is not None and self.clock() + wait > deadline:
+                return False
+            self.sleep(wait)
+
+    async def acquire_async(self, tokens=1):
+        #Same pacing for asyncio senders, without blocking the event loop
+        while True:
+            with self._lock:
+                self._refill()
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return True
+                wait = (tokens - self._tokens) / self.rate
+            await asyncio.sleep(wait)
+
+
+class RateLimiter:
+    #Provider pacing only: a token bucket for messages per second.
+    #Daily caps live in QuotaStore, which is durable and counts successful sends.
+
+    def __init__(self, name, rate, burst=1):
+        self.name = name
+        self.bucket = TokenBucket(rate, burst)
+        self._lock = threading.Lock()
+        self.waited_seconds = 0.0
+
+    def acquire(self, timeout=None):
+        #False only when the timeout expires
+        start = time.monotonic()
+        acquired = self.bucket.acquire(timeout=timeout)
+        with self._lock:
+            self.waited_seconds += time.monotonic() - start
+        return acquired
+
+    async def acquire_async(self):
+        start = time.monotonic()
+        await self.bucket.acquire_async()
+        with self._lock:
+            self.waited_seconds += time.monotonic() - start
+        return True
+
+    def stats(self):
+        with self._lock:
+            return {
+                'name': self.name,
+                'rate_per_second': self.bucket.rate,
+                'burst': self.bucket.capacity,
+                'waited_seconds': round(self.waited_seconds, 2)
+            }
+
+
+_limiters = {}
+_limiters_lock = threading.Lock()
+
+
+def _provider_settings(provider):
+    #(messages per second, burst) for each provider
+    return {
+        'email': (Config.EMAIL_RATE_PER_SECOND, Config.EMAIL_RATE_BURST),
+        'facebook': (Config.FACEBOOK_RATE_PER_SECOND, Config.FACEBOOK_RATE_BURST),
+        'instagram': (Config.INSTAGRAM_RATE_PER_SECOND, Config.INSTAGRAM_RATE_BURST),
+    }[provider]
+
+
+def get_rate_limiter(provider):
+    #One limiter per provider per process, so every sender shares the same budget
+    with _limiters_lock:
+        if provider not in _limiters:
+            rate, burst = _provider_settings(provider)
+            _limiters[provider] = RateLimiter(provider, rate, burst)
+        return _limiters[provider]
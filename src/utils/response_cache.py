@@ -0,0 +1,74 @@
+import hashlib
+import threading
+from collections import OrderedDict
+
+
+def make_etag(body):
+    #Content hash of a serialized response body
+    return hashlib.sha1(body).hexdigest()
+
+
+class ResponseCache:
+    #Serialized response bodies keyed by endpoint + query args.
+    #Each entry remembers the data version it was built from (e.g. the sheet
+    #mirror revision or the newest activity event id). While the version is
+    #unchanged the body and its ETag are served as-is, so a conditional
+    #request that matches costs one version check and nothing else.
+    #A version of None means "cannot tell", the body is rebuilt every time.
+
+    def __init__(self, max_entries=256):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.bypassed = 0
+        self.not_modified = 0
+
+    def get(self, key, version):
+        #(etag, body, mimetype) when a body built from `version` is cached
+        if version is None:
+            return None
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] != version:
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1:]
+
+    def put(self, key, version, body, mimetype='application/json'):
+        etag = make_etag(body)
+        with self._lock:
+            if version is None:
+                self.bypassed += 1
+                return etag
+            self.misses += 1
+            self._entries[key] = (version, etag, body, mimetype)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return etag
+
+    def count_not_modified(self):
+        with self._lock:
+            self.not_modified += 1
+
+    def invalidate(self, endpoint=None):
+        #Drop every entry, or only those for one endpoint
+        with self._lock:
+            if endpoint is None:
+                self._entries.clear()
+                return
+            for key in [key for key in self._entries if key[0] == endpoint]:
+                del self._entries[key]
+
+    def stats(self):
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'hits': self.hits,
+                'misses': self.misses,
+                'bypassed': self.bypassed,
+                'not_modified': self.not_modified
+            }
@@ -0,0 +1,272 @@
+import heapq
+import json
+import os
+import select
+import socket
+import threading
+import time
+from datetime import datetime, timedelta
+from itertools import count
+from pathlib import Path
+from src.utils.logger import logger
+
+
+class Job:
+    #One scheduled callable: recurring every `interval` seconds, daily at 'HH:MM', or once
+
+    def __init__(self, name, func, next_run, interval=None, at=None):
+        self.name = name
+        self.func = func
+        self.next_run = next_run
+        self.interval = interval
+        self.at = at
+        self.runs = 0
+        self.failures = 0
+        self.last_run = None
+        self.last_lateness = 0.0
+        self.max_lateness = 0.0
+        self.total_lateness = 0.0
+        self.last_duration = 0.0
+
+    def following(self, now):
+        #Next deadline after a run at `now`, None for one-shot jobs.
+        #Missed occurrences are skipped rather than run back to back.
+        if self.interval is not None:
+            next_run = self.next_run + self.interval
+            if next_run <= now:
+                next_run += ((now - next_run) // self.interval + 1) * self.interval
+            return next_run
+        if self.at is not None:
+            return next_daily(self.at, now)
+        return None
+
+    def stats(self):
+        return {
+            'runs': self.runs,
+            'failures': self.failures,
+            'next_run': datetime.fromtimestamp(self.next_run).isoformat() if self.next_run else None,
+            'last_run': datetime.fromtimestamp(self.last_run).isoformat() if self.last_run else None,
+            'last_lateness': round(self.last_lateness, 3),
+            'max_lateness': round(self.max_lateness, 3),
+            'avg_lateness': round(self.total_lateness / self.runs, 3) if self.runs else 0.0,
+            'last_duration': round(self.last_duration, 3)
+        }
+
+
+def next_daily(at, now):
+    #Epoch time of the next 'HH:MM' strictly after `now`
+    hour, minute = (int(part) for part in at.split(':'))
+    current = datetime.fromtimestamp(now)
+    candidate = current.replace(hour=hour, minute=minute, second=0, microsecond=0)
+    if candidate.timestamp() <= now:
+        candidate += timedelta(days=1)
+    return candidate.timestamp()
+
+
+class EventScheduler:
+    #Runs jobs from a heap of deadlines and sleeps until the earliest one,
+    #instead of waking on a fixed tick. wake() interrupts the sleep early,
+    #e.g. when new posts were added, and calls on_wake before re-checking.
+    #Every run records how late it started against its deadline.
+
+    def __init__(self, clock=time.time, max_sleep=3600, stats_path=None, on_wake=None):
+        self.clock = clock
+        #Upper bound on one sleep, so a wall-clock jump is noticed eventually
+        self.max_sleep = max_sleep
+        self.stats_path = Path(stats_path) if stats_path else None
+        self.on_wake = on_wake
+        self.jobs = {}
+        self._heap = []
+        self._seq = count()
+        self._lock = threading.RLock()
+        #The sleep waits on this socket pair: writing a byte is the only thing wake() does,
+        #so a signal handler never waits on a lock the code it interrupted may hold.
+        #_wake_requested tells an external wake() apart from a new job.
+        #The pair only exists while run_forever() sleeps on it.
+        self._wake_reader = None
+        self._wake_writer = None
+        self._wake_requested = False
+        self._stop = False
+        self.wakeups = 0
+        #Across all runs, one-shot jobs included after they are gone
+        self.runs = 0
+        self.total_lateness = 0.0
+        self.max_lateness = 0.0
+
+    def _add(self, job):
+        with self._lock:
+            self.jobs[job.name] = job
+            heapq.heappush(self._heap, (job.next_run, next(self._seq), job))
+        #A new earliest deadline must cut the current sleep short
+        self._interrupt()
+        return job
+
+    def every(self, seconds, func, name=None):
+        return self._add(Job(name or func.__name__, func, self.clock() + seconds, interval=seconds))
+
+    def daily(self, at, func, name=None):
+        return self._add(Job(name or func.__name__, func, next_daily(at, self.clock()), at=at))
+
+    def once(self, when, func, name=None):
+        #One-shot job at `when` (datetime or epoch seconds); re-adding the same name moves it
+        when = when.timestamp() if isinstance(when, datetime) else when
+        name = name or func.__name__
+        with self._lock:
+            existing = self.jobs.get(name)
+            if existing is not None and existing.next_run == when:
+                return existing
+        return self._add(Job(name, func, when))
+
+    def cancel(self, name):
+        #The heap entry is dropped lazily when it comes up
+        with self._lock:
+            return self.jobs.pop(name, None) is not None
+
+    def _pop_due(self, now):
+        with self._lock:
+            while self._heap and self._heap[0][0] <= now:
+                deadline, _, job = heapq.heappop(self._heap)
+                #Stale entry: the job was cancelled or moved since this was pushed
+                if self.jobs.get(job.name) is job and job.next_run == deadline:
+                    return job
+        return None
+
+    def run_pending(self):
+        #Run every job whose deadline has passed, returns how many ran
+        ran = 0
+        while True:
+            start = self.clock()
+            job = self._pop_due(start)
+            if job is None:
+                break
+            lateness = max(0.0, start - job.next_run)
+            try:
+                job.func()
+            except Exception as e:
+                job.failures += 1
+                logger.error(f"Scheduled job '{job.name}' failed: {e}")
+            finished = self.clock()
+            job.runs += 1
+            job.last_run = start
+            job.last_lateness = lateness
+            job.max_lateness = max(job.max_lateness, lateness)
+            job.total_lateness += lateness
+            job.last_duration = finished - start
+            self.runs += 1
+            self.total_lateness += lateness
+            self.max_lateness = max(self.max_lateness, lateness)
+            ran += 1
+            if lateness >= 1:
+                logger.info(f"Job '{job.name}' started {lateness:.1f}s late")
+
+            with self._lock:
+                next_run = job.following(finished)
+                if self.jobs.get(job.name) is not job:
+                    continue
+                if next_run is None:
+                    del self.jobs[job.name]
+                else:
+                    job.next_run = next_run
+                    heapq.heappush(self._heap, (next_run, next(self._seq), job))
+        if ran:
+            self._write_stats()
+        return ran
+
+    def next_run(self):
+        with self._lock:
+            while self._heap:
+                deadline, _, job = self._heap[0]
+                if self.jobs.get(job.name) is job and job.next_run == deadline:
+                    return deadline
+                heapq.heappop(self._heap)
+        return None
+
+    def _interrupt(self):
+        #A full buffer already holds a pending wake, so the byte can be dropped
+        writer = self._wake_writer
+        if writer is None:
+            return
+        try:
+            writer.send(b'\0')
+        except OSError:
+            pass
+
+    def _sleep(self, timeout):
+        #True if interrupted before `timeout`; drains every queued wake byte
+        readable, _, _ = select.select([self._wake_reader], [], [], timeout)
+        if not readable:
+            return False
+        try:
+            while self._wake_reader.recv(4096):
+                pass
+        except OSError:
+            pass
+        return True
+
+    def wake(self):
+        #Safe to call from a signal handler or another thread: takes no locks
+        self._wake_requested = True
+        self._interrupt()
+
+    def stop(self):
+        self._stop = True
+        self._interrupt()
+
+    def run_forever(self):
+        self._stop = False
+        self._wake_reader, writer = socket.socketpair()
+        self._wake_reader.setblocking(False)
+        writer.setblocking(False)
+        self._wake_writer = writer
+        #A wake() from before the pair existed is only in the flag
+        if self._wake_requested:
+            self._interrupt()
+        try:
+            self._loop()
+        finally:
+            self._wake_writer = None
+            writer.close()
+            self._wake_reader.close()
+            self._wake_reader = None
+
+    def _loop(self):
+        while not self._stop:
+            self.run_pending()
+            deadline = self.next_run()
+            timeout = self.max_sleep if deadline is None else min(self.max_sleep, max(0.0, deadline - self.clock()))
+            if self._sleep(timeout):
+                if self._stop:
+                    break
+                if not self._wake_requested:
+                    continue
+                self._wake_requested = False
+                self.wakeups += 1
+                if self.on_wake is not None:
+                    try:
+                        self.on_wake()
+                    except Exception as e:
+                        logger.error(f"Scheduler wake handler failed: {e}")
+
+    def stats(self):
+        with self._lock:
+            jobs = {name: job.stats() for name, job in self.jobs.items()}
+        return {
+            'jobs': jobs,
+            'runs': self.runs,
+            'avg_lateness': round(self.total_lateness / self.runs, 3) if self.runs else 0.0,
+            'max_lateness': round(self.max_lateness, 3),
+            'wakeups': self.wakeups,
+            'updated': datetime.now().isoformat()
+        }
+
+    def _write_stats(self):
+        #The scheduler runs in its own process; the API reads these from disk
+        if self.stats_path is None:
+            return
+        try:
+            self.stats_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.stats_path.with_name(self.stats_path.name + '.tmp')
+            tmp.write_text(json.dumps(self.stats(), indent=2), encoding='utf-8')
+            os.replace(tmp, self.stats_path)
+        except OSError as e:
+            logger.warning(f"Could not write scheduler stats: {e}")
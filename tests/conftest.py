@@ -8,12 +8,34 @@ from unittest.mock import Mock, MagicMock
 os.environ['EMAIL_ADDRESS'] = 'test@example.com'
 os.environ['EMAIL_PASSWORD'] = 'test_password'
 os.environ['GOOGLE_SHEETS_CREDENTIALS'] = 'test_credentials.json'
+os.environ['SALES_SHEET_NAME'] = 'Sales Leads'
+os.environ['SOCIAL_SHEET_NAME'] = 'Social Media Content'
 os.environ['META_ACCESS_TOKEN'] = 'test_meta_token'
 os.environ['FACEBOOK_PAGE_ID'] = 'test_page_id'
 os.environ['INSTAGRAM_ACCOUNT_ID'] = 'test_instagram_id'
 os.environ['LINKEDIN_ACCESS_TOKEN'] = 'test_linkedin_token'
 os.environ['LINKEDIN_PERSON_URN'] = 'test_person_urn'
 
+@pytest.fixture(autouse=True)
+def isolated_data_files(tmp_path, monkeypatch):
+    #Keep local databases written by the code under test out of data/
+    from Config import Config
+    monkeypatch.setattr(Config, 'SHEETS_MIRROR_PATH', tmp_path / 'sheets_mirror.db')
+    monkeypatch.setattr(Config, 'STORAGE_DB_PATH', tmp_path / 'storage.db')
+    monkeypatch.setattr(Config, 'QUOTA_DB_PATH', tmp_path / 'quotas.db')
+    monkeypatch.setattr(Config, 'ACTIVITY_DB_PATH', tmp_path / 'activity.db')
+    monkeypatch.setattr(Config, 'METRICS_DB_PATH', tmp_path / 'metrics.db')
+    monkeypatch.setattr(Config, 'BOT_READY_FILE', tmp_path / 'bot.ready')
+    #Each test patches gspread with its own client, so start without a shared one
+    import src.database.sheets_manager as sheets_manager
+    from src.database.worksheet_cache import worksheet_cache
+    monkeypatch.setattr(sheets_manager, '_client', None)
+    worksheet_cache.invalidate()
+    yield tmp_path
+    #Let queued activity rows land in this test's store before the paths are restored
+    from src.utils.logger import flush_logs
+    flush_logs()
+
 @pytest.fixture
 def mock_config():
     from Config import Config
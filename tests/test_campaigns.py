@@ -1,8 +1,12 @@
 import pytest
+import threading
+import time
 from unittest.mock import MagicMock, patch, Mock
-from datetime import datetime
+from datetime import datetime, timedelta
 from src.campaigns.sales_campaign import SalesCampaign
 from src.campaigns.social_campaign import SocialCampaign
+from src.campaigns.post_schedule import PostSchedule
+from src.campaigns.dispatcher import EmailDispatcher, PostDispatcher
 
 class TestSalesCampaign:
 
@@ -29,8 +33,8 @@ class TestSalesCampaign:
 
     @patch('src.campaigns.sales_campaign.SheetsManager')
     @patch('src.campaigns.sales_campaign.EmailClient')
-    @patch('src.campaigns.sales_campaign.time.sleep')
-    def test_run_campaign(self, mock_sleep, mock_email, mock_sheets,sample_leads):
+    @patch('src.campaigns.sales_campaign.get_rate_limiter')
+    def test_run_campaign(self, mock_limiter, mock_email, mock_sheets,sample_leads):
         #setup 
         mock_sheets_instance = mock_sheets.return_value
         mock_sheets_instance.get_sales_leads.return_value = sample_leads
@@ -44,7 +48,128 @@ class TestSalesCampaign:
         campaign.run()
 
         #verify emails were sent
-        assert mock_email_instance.send.called
+        assert mock_email_instance.send.call_count == 2
+        assert mock_sheets_instance.update_lead_status.call_count == 2
+        mock_email_instance.close.assert_called_once()
+
+    @patch('src.campaigns.sales_campaign.SheetsManager')
+    @patch('src.campaigns.sales_campaign.EmailClient')
+    @patch('src.campaigns.sales_campaign.get_rate_limiter')
+    def test_run_advances_stage(self, mock_limiter, mock_email, mock_sheets, sample_leads):
+        mock_sheets.return_value.get_sales_leads.return_value = sample_leads
+        mock_email.return_value.send.return_value = True
+
+        SalesCampaign().run()
+
+        #Jane is at stage 1, so she gets the first follow-up and moves to stage 2
+        sent = {call.args[0]: call.args[2] for call in mock_email.return_value.send.call_args_list}
+        assert 'CompanyX' in sent['jane@example.com']
+        mock_sheets.return_value.update_lead_status.assert_any_call(2, 'Contacted', 1)
+        mock_sheets.return_value.update_lead_status.assert_any_call(3, 'Contacted', 2)
+
+class TestEmailDispatcher:
+
+    def make_jobs(self, count):
+        return ({'to': f'lead{i}@example.com', 'subject': 'Hi', 'body': '<p>Hi</p>', 'row': i + 2}
+                for i in range(count))
+
+    def test_dispatch_all_jobs(self, mock_email_client):
+        limiter = Mock()
+        limiter.acquire.return_value = True
+        mock_email_client.send.side_effect = lambda to, subject, body: to != 'lead3@example.com'
+
+        dispatcher = EmailDispatcher(mock_email_client, limiter, workers=4)
+        results = list(dispatcher.dispatch(self.make_jobs(20)))
+
+        assert len(results) == 20
+        assert sorted(job['row'] for job, _ in results) == list(range(2, 22))
+        assert dispatcher.stats()['sent'] == 19
+        assert dispatcher.stats()['failed'] == 1
+
+    def test_stops_when_limiter_exhausted(self, mock_email_client):
+        limiter = Mock()
+        limiter.acquire.side_effect = [True] * 5 + [False] * 100
+
+        dispatcher = EmailDispatcher(mock_email_client, limiter, workers=1)
+        results = list(dispatcher.dispatch(self.make_jobs(50)))
+
+        assert mock_email_client.send.call_count == 5
+        assert sum(1 for _, success in results if success) == 5
+        assert dispatcher.stats()['skipped'] == 45
+
+    def test_stops_when_daily_quota_used(self, mock_email_client):
+        limiter = Mock()
+        limiter.acquire.return_value = True
+
+        def send(to, subject, body):
+            mock_email_client.daily_count += 1
+            return True
+        mock_email_client.daily_limit = 3
+        mock_email_client.send.side_effect = send
+
+        dispatcher = EmailDispatcher(mock_email_client, limiter, workers=1)
+        list(dispatcher.dispatch(self.make_jobs(10)))
+
+        assert mock_email_client.send.call_count == 3
+        assert dispatcher.stats()['skipped'] == 7
+
+class TestPostDispatcher:
+
+    def make_jobs(self, platforms):
+        return [{'platform': platform, 'row': i + 2} for i, platform in enumerate(platforms)]
+
+    def open_limiter(self):
+        limiter = Mock()
+        limiter.acquire.return_value = True
+        return limiter
+
+    def test_platforms_publish_concurrently_within_their_limits(self):
+        active = {'facebook': 0, 'instagram': 0}
+        peak = {'facebook': 0, 'instagram': 0}
+        lock = threading.Lock()
+
+        def publish(job):
+            with lock:
+                active[job['platform']] += 1
+                peak[job['platform']] = max(peak[job['platform']], active[job['platform']])
+            time.sleep(0.05)
+            with lock:
+                active[job['platform']] -= 1
+            return f"id-{job['row']}"
+
+        dispatcher = PostDispatcher(publish, {
+            'facebook': (self.open_limiter(), 3),
+            'instagram': (self.open_limiter(), 1)
+        })
+        start = time.monotonic()
+        results = list(dispatcher.dispatch(self.make_jobs(['facebook'] * 6 + ['instagram'] * 2)))
+
+        assert len(results) == 8
+        assert peak == {'facebook': 3, 'instagram': 1}
+        #Serially this would take 8 * 0.05s
+        assert time.monotonic() - start < 0.3
+        assert dispatcher.stats()['platforms']['facebook']['sent'] == 6
+
+    def test_limiter_and_failures_are_per_platform(self):
+        capped = Mock()
+        capped.acquire.side_effect = [True] + [False] * 10
+
+        def publish(job):
+            if job['row'] == 5:
+                raise RuntimeError('boom')
+            return 'id'
+
+        dispatcher = PostDispatcher(publish, {
+            'facebook': (self.open_limiter(), 2),
+            'instagram': (capped, 1)
+        })
+        results = list(dispatcher.dispatch(self.make_jobs(['facebook', 'facebook', 'facebook', 'facebook', 'instagram', 'instagram'])))
+
+        counts = dispatcher.stats()['platforms']
+        assert counts['facebook'] == {'sent': 3, 'failed': 1, 'skipped': 0}
+        assert counts['instagram'] == {'sent': 1, 'failed': 0, 'skipped': 1}
+        assert sum(1 for _, post_id in results if post_id) == 4
+
 
 class TestSocialCampaign:
 
@@ -63,7 +188,7 @@ class TestSocialCampaign:
     @patch('src.campaigns.social_campaign.SheetsManager')
     @patch('src.campaigns.social_campaign.FacebookClient')
     @patch('src.campaigns.social_campaign.InstagramClient')
-    def test_is_time_to_post(self, mock_ig, mock_fb, mock_sheets):
+    def test_only_due_posts_are_popped(self, mock_ig, mock_fb, mock_sheets):
         campaign = SocialCampaign()
         #current time post
         now = datetime.now()
@@ -71,20 +196,37 @@ class TestSocialCampaign:
             'Date': now.strftime('%Y-%m-%d'),
             'Time': now.strftime('%H:%M')
         }
-        assert campaign._is_time_to_post(post, now) is True
-
         #Future time post
         future_post = {
-            'Date': '2025-12-31',
+            'Date': (now + timedelta(days=1)).strftime('%Y-%m-%d'),
             'Time': '23:59'
         }
-        assert campaign._is_time_to_post(future_post, now) is False
+        campaign.schedule.update([post, future_post], now=now)
+
+        assert campaign.schedule.pop_due(now) == [(2, post)]
+        assert campaign.next_post_time() == datetime.strptime(
+            f"{future_post['Date']} {future_post['Time']}", "%Y-%m-%d %H:%M"
+        )
 
     @patch('src.campaigns.social_campaign.SheetsManager')
     @patch('src.campaigns.social_campaign.FacebookClient')
     @patch('src.campaigns.social_campaign.InstagramClient')
-    @patch('src.campaigns.social_campaign.time.sleep')
-    def test_post_to_facebook(self, mock_sleep, mock_ig, mock_fb, mock_sheets, sample_post):
+    def test_refresh_skips_unchanged_revision(self, mock_ig, mock_fb, mock_sheets):
+        mirror = mock_sheets.return_value.mirror
+        mirror.is_stale.return_value = False
+        mirror.revision.return_value = 7
+        mock_sheets.return_value.get_social_post.return_value = []
+        campaign = SocialCampaign()
+
+        campaign.refresh_schedule()
+        campaign.refresh_schedule()
+
+        assert mock_sheets.return_value.get_social_post.call_count == 1
+
+    @patch('src.campaigns.social_campaign.SheetsManager')
+    @patch('src.campaigns.social_campaign.FacebookClient')
+    @patch('src.campaigns.social_campaign.InstagramClient')
+    def test_post_to_facebook(self, mock_ig, mock_fb, mock_sheets, sample_post):
         
         #Setup
         mock_facebook_instance = mock_fb.return_value
@@ -115,4 +257,153 @@ class TestSocialCampaign:
         metrics = campaign.collect_metrics()
 
         #Verify
-        assert mock_sheets_instance.get_social_post.called
\ No newline at end of file
+        assert mock_sheets_instance.get_social_post.called
+
+    @patch('src.campaigns.social_campaign.SheetsManager')
+    @patch('src.campaigns.social_campaign.FacebookClient')
+    @patch('src.campaigns.social_campaign.InstagramClient')
+    def test_collect_metrics_batches_per_platform(self, mock_ig, mock_fb, mock_sheets, sample_posts):
+        posted = [dict(post, Status='Posted', **{'Post ID': f'id_{i}'}) for i, post in enumerate(sample_posts * 2)]
+        mock_sheets.return_value.get_social_post.return_value = posted
+        mock_fb.return_value.get_metrics_batch.return_value = {'id_0': {'likes': 1}, 'id_2': None}
+        mock_ig.return_value.get_metrics_batch.return_value = {'id_1': {'reach': 5}, 'id_3': {'reach': 6}}
+
+        campaign = SocialCampaign()
+        results = campaign.collect_metrics()
+
+        mock_fb.return_value.get_metrics_batch.assert_called_once_with(['id_0', 'id_2'])
+        mock_ig.return_value.get_metrics_batch.assert_called_once_with(['id_1', 'id_3'])
+        assert not mock_fb.return_value.get_metrics.called
+        assert results['facebook']['id_2'] is None
+
+    @patch('src.campaigns.social_campaign.SheetsManager')
+    @patch('src.campaigns.social_campaign.FacebookClient')
+    @patch('src.campaigns.social_campaign.InstagramClient')
+    def test_collect_metrics_is_incremental(self, mock_ig, mock_fb, mock_sheets, sample_posts):
+        now = datetime.now()
+        fresh = dict(sample_posts[0], Status='Posted', **{'Post ID': 'new', 'Posted Time': (now - timedelta(hours=2)).isoformat()})
+        stale = dict(sample_posts[0], Status='Posted', **{'Post ID': 'old', 'Posted Time': (now - timedelta(days=90)).isoformat()})
+        failed = dict(sample_posts[0], Status='Posted', **{'Post ID': 'flaky', 'Posted Time': (now - timedelta(hours=2)).isoformat()})
+        mock_sheets.return_value.get_social_post.return_value = [fresh, stale, failed]
+        mock_fb.return_value.get_metrics_batch.return_value = {'new': {'likes': 4, 'shares': 1}, 'flaky': None}
+
+        campaign = SocialCampaign()
+        campaign.collect_metrics()
+        mock_fb.return_value.get_metrics_batch.assert_called_once_with(['new', 'flaky'])
+
+        #Stored and not due again yet; the failed post is retried
+        mock_fb.return_value.get_metrics_batch.return_value = {'flaky': {'likes': 1}}
+        campaign.collect_metrics()
+        mock_fb.return_value.get_metrics_batch.assert_called_with(['flaky'])
+        assert campaign.metrics.totals() == {'facebook': {'likes': 5, 'shares': 1}}
+
+
+class TestPostSchedule:
+    def post(self, when, status='Pending', text='post'):
+        return {'Date': when.strftime('%Y-%m-%d'), 'Time': when.strftime('%H:%M'), 'Status': status, 'Text': text}
+
+    def test_pops_in_time_order_once(self):
+        now = datetime(2025, 11, 14, 12, 0)
+        schedule = PostSchedule()
+        schedule.update([
+            self.post(now + timedelta(minutes=30)),
+            self.post(now),
+            self.post(now - timedelta(minutes=2)),
+            self.post(now, status='Posted')
+        ], now=now)
+
+        assert len(schedule) == 3
+        assert [row for row, _ in schedule.pop_due(now)] == [4, 3]
+        assert schedule.pop_due(now) == []
+        assert schedule.next_due() == now + timedelta(minutes=30)
+
+    def test_only_changed_rows_are_reindexed(self):
+        now = datetime(2025, 11, 14, 12, 0)
+        posts = [self.post(now + timedelta(hours=h), text=str(h)) for h in range(1, 4)]
+        schedule = PostSchedule()
+        assert schedule.update(posts, revision=1, now=now) == 3
+        assert schedule.update(posts, revision=1, now=now) == 0
+
+        moved = list(posts)
+        moved[0] = self.post(now + timedelta(hours=5), text='0')
+        assert schedule.update(moved, revision=2, now=now) == 1
+        assert schedule.next_due() == now + timedelta(hours=2)
+
+    def test_deleted_and_posted_rows_leave_the_index(self):
+        now = datetime(2025, 11, 14, 12, 0)
+        posts = [self.post(now + timedelta(hours=1), text='a'), self.post(now + timedelta(hours=2), text='b')]
+        schedule = PostSchedule()
+        schedule.update(posts, now=now)
+
+        schedule.update([posts[1]], now=now)
+        assert len(schedule) == 1
+        schedule.update([dict(posts[1], Status='Posted')], now=now)
+        assert schedule.next_due() is None
+
+    def test_post_late_beyond_grace_is_missed(self):
+        now = datetime(2025, 11, 14, 12, 0)
+        schedule = PostSchedule(grace=timedelta(minutes=5))
+        schedule.update([self.post(now)], now=now)
+
+        assert schedule.pop_due(now + timedelta(minutes=10)) == []
+        assert schedule.missed == 1
+
+    def test_failed_post_is_retried_within_grace(self):
+        now = datetime(2025, 11, 14, 12, 0)
+        schedule = PostSchedule(grace=timedelta(minutes=5), retry_delay=timedelta(minutes=2))
+        post = self.post(now)
+        schedule.update([post], now=now)
+        assert schedule.pop_due(now) == [(2, post)]
+
+        assert schedule.requeue(2, post, now=now) == now + timedelta(minutes=2)
+        assert schedule.next_due() == now + timedelta(minutes=2)
+        assert schedule.pop_due(now + timedelta(minutes=2)) == [(2, post)]
+
+        #The next retry would land outside the window
+        assert schedule.requeue(2, post, now=now + timedelta(minutes=4)) is None
+        assert schedule.next_due() is None
+        assert schedule.failed == 1
+
+    @patch('src.campaigns.social_campaign.SheetsManager')
+    @patch('src.campaigns.social_campaign.FacebookClient')
+    @patch('src.campaigns.social_campaign.InstagramClient')
+    def test_run_publishes_burst_and_batches_status_writes(self, mock_ig, mock_fb, mock_sheets):
+        now = datetime.now()
+        due = {'Date': now.strftime('%Y-%m-%d'), 'Time': now.strftime('%H:%M'), 'Status': 'Pending', 'Text': 't'}
+        posts = [dict(due, Platform='Facebook'), dict(due, Platform='Instagram', Media='a.jpg'),
+                 dict(due, Platform='Instagram'), dict(due, Platform='LinkedIn')]
+        sheets = mock_sheets.return_value
+        sheets.get_social_post.return_value = posts
+        mock_fb.return_value.post.return_value = 'fb_1'
+        mock_ig.return_value.post.return_value = 'ig_1'
+        writes = []
+        sheets.buffered_writes.return_value.__enter__.side_effect = lambda: writes.append('open')
+        sheets.buffered_writes.return_value.__exit__.side_effect = lambda *args: writes.append('flush')
+        sheets.mark_post_as_sent.side_effect = lambda *args: writes.append(args[0])
+
+        SocialCampaign().run()
+
+        mock_fb.return_value.post.assert_called_once_with('t', None)
+        mock_ig.return_value.post.assert_called_once_with('t', 'a.jpg')
+        assert writes[0] == 'open' and writes[-1] == 'flush'
+        assert sorted(writes[1:-1]) == [2, 3]
+
+    @patch('src.campaigns.social_campaign.SheetsManager')
+    @patch('src.campaigns.social_campaign.FacebookClient')
+    @patch('src.campaigns.social_campaign.InstagramClient')
+    def test_run_retries_failed_publish(self, mock_ig, mock_fb, mock_sheets):
+        now = datetime.now()
+        due = {'Date': now.strftime('%Y-%m-%d'), 'Time': now.strftime('%H:%M'), 'Status': 'Pending', 'Text': 't'}
+        mock_sheets.return_value.get_social_post.return_value = [dict(due, Platform='Facebook'), dict(due, Platform='LinkedIn')]
+        mock_fb.return_value.post.side_effect = [None, 'fb_1']
+        campaign = SocialCampaign()
+        campaign.schedule.retry_delay = timedelta(0)
+
+        campaign.run()
+        assert not mock_sheets.return_value.mark_post_as_sent.called
+        campaign.run()
+
+        assert mock_fb.return_value.post.call_count == 2
+        mock_sheets.return_value.mark_post_as_sent.assert_called_once_with(2, mock_fb.return_value.platform_name, 'fb_1')
+        #An unknown platform cannot succeed on a retry
+        assert campaign.next_post_time() is None
@@ -1,7 +1,14 @@
+import aiosmtplib
+import asyncio
 import pytest
-from unittest.mock import Mock, patch, MagicMock
+import smtplib
+import socket
+from datetime import date, timedelta
+from unittest.mock import Mock, patch, MagicMock, AsyncMock
 from src.email.email_client import EmailClient
-from src.email.templates import EmailTemplates
+from src.email.smtp_pool import SMTPConnectionPool
+from src.email.async_client import AsyncEmailClient
+from src.email.templates import EmailTemplates, CompiledTemplate, CampaignTemplates
 
 #testing email functionality
 
@@ -17,8 +24,7 @@ class TestEmailClient:
     @patch('smtplib.SMTP_SSL')
     def test_send_email_success(self, mock_smtp, mock_config):
         #setup
-        mock_server = MagicMock()
-        mock_smtp.return_value.__enter__.return_value = mock_server
+        mock_server = mock_smtp.return_value
 
         #Send Email
         client = EmailClient()
@@ -36,9 +42,8 @@ class TestEmailClient:
 
     @patch('smtplib.SMTP_SSL')
     def test_send_email_failure(self, mock_smtp, mock_config):
-        mock_server = MagicMock()
+        mock_server = mock_smtp.return_value
         mock_server.send_message.side_effect = Exception('SMTP error')
-        mock_smtp.return_value.__enter__.return_value = mock_server
 
         #send Email
         client = EmailClient()
@@ -52,6 +57,22 @@ class TestEmailClient:
         assert result is False
         assert client.daily_count == 0
 
+    @patch('smtplib.SMTP_SSL')
+    def test_failure_after_midnight_releases_the_reserving_day(self, mock_smtp, mock_config):
+        mock_smtp.return_value.send_message.side_effect = Exception('SMTP error')
+        today = date.today()
+        tomorrow = today + timedelta(days=1)
+        #The clock crosses midnight between the reservation and its release
+        days = iter([today])
+        client = EmailClient()
+
+        with patch('src.utils.quota_store.date') as mock_date:
+            mock_date.today.side_effect = lambda: next(days, tomorrow)
+            assert client.send('test@example.com', 'Subject', '<p>Body</p>') is False
+
+        assert client.quota.used('email', day=today) == 0
+        assert client.quota.used('email', day=tomorrow) == 0
+
     def test_daily_limit(self, mock_config):
         client = EmailClient()
         client.daily_count = client.daily_limit
@@ -71,6 +92,148 @@ class TestEmailClient:
 
         assert client.daily_count == 0 
 
+    def test_daily_count_survives_new_client(self, mock_config):
+        #Limits used to reset whenever main built a fresh client
+        EmailClient().daily_count = 10
+
+        assert EmailClient().daily_count == 10
+
+    @patch('smtplib.SMTP_SSL')
+    def test_connection_reused_across_sends(self, mock_smtp, mock_config):
+        mock_server = mock_smtp.return_value
+
+        client = EmailClient()
+        for i in range(3):
+            assert client.send(f'lead{i}@example.com', 'Subject', '<p>Body</p>') is True
+
+        assert mock_smtp.call_count == 1
+        mock_server.login.assert_called_once()
+        assert mock_server.send_message.call_count == 3
+        assert client.connection_stats()['messages_per_connection'] == 3
+
+        client.close()
+        mock_server.quit.assert_called_once()
+
+class TestSMTPConnectionPool:
+    def make_pool(self, **kwargs):
+        return SMTPConnectionPool('smtp.example.com', 465, 'user', 'secret', **kwargs)
+
+    @patch('smtplib.SMTP_SSL')
+    def test_reconnects_when_server_disconnects(self, mock_smtp):
+        stale, fresh = MagicMock(), MagicMock()
+        stale.send_message.side_effect = [None, smtplib.SMTPServerDisconnected('gone')]
+        mock_smtp.side_effect = [stale, fresh]
+
+        pool = self.make_pool()
+        pool.send_message(MagicMock())
+        pool.send_message(MagicMock())
+
+        fresh.send_message.assert_called_once()
+        stats = pool.stats()
+        assert stats['reconnects'] == 1
+        assert stats['connections_opened'] == 2
+
+    @patch('smtplib.SMTP_SSL')
+    def test_max_messages_per_connection(self, mock_smtp):
+        mock_smtp.side_effect = lambda *args, **kwargs: MagicMock()
+
+        pool = self.make_pool(max_messages=2)
+        for _ in range(5):
+            pool.send_message(MagicMock())
+
+        assert pool.stats()['connections_opened'] == 3
+
+    @patch('smtplib.SMTP_SSL')
+    def test_noop_health_check_after_idle(self, mock_smtp):
+        first, second = MagicMock(), MagicMock()
+        first.noop.return_value = (421, b'closing')
+        mock_smtp.side_effect = [first, second]
+
+        pool = self.make_pool(noop_after=0)
+        pool.send_message(MagicMock())
+        pool.send_message(MagicMock())
+
+        first.noop.assert_called_once()
+        second.send_message.assert_called_once()
+        assert pool.stats()['health_check_failures'] == 1
+
+class RecordingHandler:
+    def __init__(self):
+        self.recipients = []
+
+    async def handle_DATA(self, server, session, envelope):
+        self.recipients.extend(envelope.rcpt_tos)
+        return '250 OK'
+
+
+@pytest.fixture
+def smtp_server():
+    from aiosmtpd.controller import Controller
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        port = s.getsockname()[1]
+    handler = RecordingHandler()
+    controller = Controller(handler, hostname='127.0.0.1', port=port)
+    controller.start()
+    yield handler, port
+    controller.stop()
+
+
+class TestAsyncEmailClient:
+    def make_client(self, port, **kwargs):
+        return AsyncEmailClient(hostname='127.0.0.1', port=port, use_tls=False,
+                                username='', password='', **kwargs)
+
+    def test_send_many_over_shared_connections(self, smtp_server):
+        handler, port = smtp_server
+        client = self.make_client(port, connections=2)
+        messages = [(f'lead{i}@example.com', 'Hi', '<p>Hello</p>') for i in range(6)]
+
+        results = asyncio.run(client.send_many(messages))
+
+        assert [r['to'] for r in results] == [m[0] for m in messages]
+        assert all(r['success'] for r in results)
+        assert sorted(handler.recipients) == sorted(m[0] for m in messages)
+        assert client.connections_opened == 2
+        assert client.daily_count == 6
+
+    def test_daily_limit(self, smtp_server):
+        handler, port = smtp_server
+        client = self.make_client(port, connections=1)
+        client.daily_limit = 3
+        messages = [(f'lead{i}@example.com', 'Hi', 'Body') for i in range(5)]
+
+        results = asyncio.run(client.send_many(messages))
+
+        assert [r['success'] for r in results] == [True, True, True, False, False]
+        assert results[-1]['error'] == 'Daily limit reached'
+        assert len(handler.recipients) == 3
+
+    def test_connection_failure_is_reported_per_recipient(self):
+        with socket.socket() as s:
+            s.bind(('127.0.0.1', 0))
+            port = s.getsockname()[1]
+        client = self.make_client(port, connections=1)
+
+        results = asyncio.run(client.send_many([('lead@example.com', 'Hi', 'Body')]))
+
+        assert results[0]['success'] is False
+        assert client.daily_count == 0
+
+    def test_reconnect_closes_dropped_session(self):
+        dropped = MagicMock(is_connected=False, connect=AsyncMock(), quit=AsyncMock(),
+                            send_message=AsyncMock(side_effect=aiosmtplib.SMTPServerDisconnected('gone')))
+        fresh = MagicMock(is_connected=True, connect=AsyncMock(), quit=AsyncMock(), send_message=AsyncMock())
+        client = self.make_client(25, connections=1)
+
+        with patch('src.email.async_client.aiosmtplib.SMTP', side_effect=[dropped, fresh]):
+            results = asyncio.run(client.send_many([('lead@example.com', 'Hi', 'Body')]))
+
+        assert results[0]['success'] is True
+        assert client.reconnects == 1
+        dropped.close.assert_called_once()
+        fresh.quit.assert_awaited_once()
+
 class  TestEmailTemplates:
     def test_get_initial_template(self):
         template = EmailTemplates.get(
@@ -112,4 +275,36 @@ class  TestEmailTemplates:
 
         assert 'Alice' in template
         assert 'https://example.com' in template
-        assert 'Bob' in template
\ No newline at end of file
+        assert 'Bob' in template
+
+    def test_compiled_template_bind_and_render(self):
+        template = CompiledTemplate.parse('t', '<p>Hi {name}, from {sender_name} {{literal}}</p>')
+        bound = template.bind(sender_name='Bob')
+
+        assert bound.fields == {'name'}
+        assert bound.render(name='Alice') == '<p>Hi Alice, from Bob {literal}</p>'
+        assert template.render(name='Alice', sender_name='Bob') == bound.render(name='Alice')
+
+    def test_campaign_templates_validate_placeholders(self):
+        #followup_1 needs similar_company, a misspelled key must fail up front
+        with pytest.raises(KeyError, match='similar_company'):
+            CampaignTemplates(
+                {1: ('followup_1', 'Hi', {'similar_Company': 'X', 'result': 'Y', 'sender_name': 'Bob'})},
+                {'name': 'Name'},
+                ['Name']
+            )
+
+    def test_campaign_templates_render_lead(self, sample_lead):
+        templates = CampaignTemplates(
+            {0: ('initial', 'About {company}', {'value_prop': 'grow', 'sender_name': 'Bob'})},
+            {'name': 'Name', 'company': 'Company', 'industry': 'Industry'},
+            list(sample_lead)
+        )
+
+        email = templates.render(0, sample_lead)
+
+        assert email['subject'] == 'About TestCorp'
+        assert email['body'] == EmailTemplates.get(
+            'initial', name='John Doe', company='TestCorp', industry='Saas',
+            value_prop='grow', sender_name='Bob'
+        )
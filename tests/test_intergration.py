@@ -5,8 +5,8 @@ from datetime import datetime
 class TestEndToEndSalesCampaign: 
     @patch ('src.campaigns.sales_campaign.SheetsManager')
     @patch ('src.campaigns.sales_campaign.EmailClient')
-    @patch ('src.campaigns.sales_campaign.time.sleep')
-    def test_full_sales_workflow(self, mock_sleep, mock_email, mock_sheets):
+    @patch ('src.campaigns.sales_campaign.get_rate_limiter')
+    def test_full_sales_workflow(self, mock_limiter, mock_email, mock_sheets):
         from src.campaigns.sales_campaign import SalesCampaign        
 
         #Mock data
@@ -44,8 +44,7 @@ class TestEndToEndSocialCampaign:
     @patch('src.campaigns.social_campaign.SheetsManager')
     @patch('src.campaigns.social_campaign.FacebookClient')
     @patch('src.campaigns.social_campaign.InstagramClient')
-    @patch('src.campaigns.social_campaign.time.sleep')
-    def test_full_social_workflow(self, mock_sleep, mock_instagram, mock_facebook, mock_sheets):
+    def test_full_social_workflow(self, mock_instagram, mock_facebook, mock_sheets):
         from src.campaigns.social_campaign import SocialCampaign
         now = datetime.now()
         posts = [
@@ -1,74 +1,73 @@
 # python
 import pytest
-from unittest.mock import patch
+from datetime import datetime, timedelta
+from unittest.mock import patch, Mock
 import run_scheduler
-from run_scheduler import main
+from run_scheduler import main, schedule_posts
+from src.utils.scheduler import EventScheduler
 
 def test_main_schedules_and_logs():
-    scheduled_jobs = []
-
-    class MockJob:
-        def __init__(self, interval=None):
-            self.interval = interval
-            self.at_called_with = None
-            self.do_called_with = None
-            # allow chaining: schedule().day.at(...).do(...) and schedule(interval).minutes.do(...)
-            self.day = self
-            self.minutes = self
-
-        def at(self, time_str):
-            self.at_called_with = time_str
-            return self
-
-        def do(self, func):
-            self.do_called_with = func
-            scheduled_jobs.append(self)
-            return self
-
-    def fake_every(interval=None):
-        return MockJob(interval=interval)
-
-    class BreakLoop(Exception):
-        pass
-
-    def raise_breakloop():
-        # when schedule.run_pending is called, raise to break out of the infinite loop in main()
-        raise BreakLoop
-
-    # Patch the schedule/time/logging objects used inside run_scheduler module
-    with patch('run_scheduler.schedule.every', side_effect=fake_every) as mock_every, \
-         patch('run_scheduler.schedule.run_pending', side_effect=raise_breakloop) as mock_run_pending, \
-         patch('run_scheduler.time.sleep') as mock_sleep, \
+    started = []
+
+    def fake_run_forever(self):
+        # capture the scheduler instead of entering the loop
+        started.append(self)
+
+    # Patch the scheduler loop, post loading and logging used inside run_scheduler module
+    with patch.object(EventScheduler, 'run_forever', autospec=True, side_effect=fake_run_forever), \
+         patch('run_scheduler.schedule_posts') as mock_schedule_posts, \
          patch('run_scheduler.logger.info') as mock_log:
 
-        # Call main and allow BreakLoop to stop the loop
-        try:
-            main()
-        except BreakLoop:
-            pass
+        main()
+
+    assert len(started) == 1
+    scheduler = started[0]
 
-    # Verify three jobs were scheduled
-    assert len(scheduled_jobs) == 3
+    # Verify the campaign jobs were scheduled, plus the post refresh; posts run off the next_post timer
+    jobs = scheduler.jobs
+    assert set(jobs) == {'run_sales', 'collect_metrics', 'refresh_posts'}
 
-    # First scheduled job: daily at 09:00 -> run_sales
-    first = scheduled_jobs[0]
-    assert first.at_called_with == "09:00"
-    assert first.do_called_with == run_scheduler.run_sales
+    # Daily at 09:00 -> run_sales
+    assert jobs['run_sales'].at == "09:00"
+    assert jobs['run_sales'].func == run_scheduler.run_sales
 
-    # Second scheduled job: every 30 minutes -> run_social
-    second = scheduled_jobs[1]
-    assert second.interval == 30
-    assert second.do_called_with == run_scheduler.run_social
+    # Hourly -> collect_metrics, posts are refreshed by age inside the job
+    assert jobs['collect_metrics'].interval == 60 * 60
+    assert jobs['collect_metrics'].func == run_scheduler.collect_metrics
 
-    # Third scheduled job: daily at 18:00 -> collect_metrics
-    third = scheduled_jobs[2]
-    assert third.at_called_with == "18:00"
-    assert third.do_called_with == run_scheduler.collect_metrics
+    # Upcoming posts are queued before the loop starts
+    mock_schedule_posts.assert_called_once_with(scheduler)
+    assert scheduler.on_wake is not None
 
     # Verify logging.info was called with expected messages
     logged_messages = [call.args[0] for call in mock_log.call_args_list]
     assert any("Automation Scheduler Started" == msg for msg in logged_messages)
     assert any("=" * 50 == msg for msg in logged_messages)
     assert any("Sales campaigns: Daily at 09:00" == msg for msg in logged_messages)
-    assert any("Social posts: Every 30 minutes" == msg for msg in logged_messages)
-    assert any("Metrics collection: Daily at 18:00" == msg for msg in logged_messages)
\ No newline at end of file
+    assert any("Social posts: At their scheduled times" == msg for msg in logged_messages)
+    assert any("Metrics collection: Every 60 minutes" == msg for msg in logged_messages)
+
+def test_schedule_posts_arms_one_timer_for_next_post():
+    soon = datetime.now() + timedelta(minutes=10)
+    campaign = Mock()
+    campaign.next_post_time.return_value = soon
+    scheduler = EventScheduler()
+
+    with patch('run_scheduler._social', campaign):
+        assert schedule_posts(scheduler) == soon
+        assert schedule_posts(scheduler) == soon
+
+    assert list(scheduler.jobs) == ['next_post']
+    assert scheduler.jobs['next_post'].next_run == soon.timestamp()
+    assert campaign.refresh_schedule.call_count == 2
+
+def test_schedule_posts_cancels_timer_when_nothing_pending():
+    campaign = Mock()
+    campaign.next_post_time.return_value = None
+    scheduler = EventScheduler()
+    scheduler.once(datetime.now() + timedelta(hours=1), lambda: None, name='next_post')
+
+    with patch('run_scheduler._social', campaign):
+        assert schedule_posts(scheduler) is None
+
+    assert 'next_post' not in scheduler.jobs
@@ -1,6 +1,13 @@
 import pytest
 from unittest.mock import Mock, patch, MagicMock
+from Config import Config
 from src.database.sheets_manager import SheetsManager
+from src.database.write_buffer import WriteBuffer, compile_ranges
+from src.database.sheet_mirror import SheetMirror
+from src.database.backends import SQLiteBackend
+
+SALES_HEADERS = ['Name', 'Email', 'Company', 'Industry', 'Status', 'Last Contact', ' Stage']
+SOCIAL_HEADERS = ['Date', 'Time', 'Platform', 'Text', 'Media', 'Hashtags', 'Status', 'Posted Time', 'Post ID']
 
 class TestSheetsManager:
     @patch('src.database.sheets_manager.gspread')
@@ -33,6 +40,7 @@ class TestSheetsManager:
     def test_update_lead_status(self, mock_config, mock_gspread, sample_posts):
         mock_sheet = MagicMock()
         mock_sheet.get_all_records.return_value = sample_posts
+        mock_sheet.row_values.return_value = SALES_HEADERS
 
         mock_client = MagicMock()
         mock_client.open.return_value.sheet1 = mock_sheet
@@ -42,7 +50,11 @@ class TestSheetsManager:
         result = manager.update_lead_status(2, 'Contacted', 1)
 
         assert result is True
-        assert mock_sheet.update_cell.call_count == 3
+        mock_sheet.update_cell.assert_not_called()
+        assert mock_sheet.batch_update.call_count == 1
+        ranges = mock_sheet.batch_update.call_args[0][0]
+        assert ranges[0]['range'] == 'E2:G2'
+        assert ranges[0]['values'][0][0] == 'Contacted'
 
     @patch('src.database.sheets_manager.gspread') 
     @patch('src.database.sheets_manager.ServiceAccountCredentials')
@@ -59,4 +71,286 @@ class TestSheetsManager:
         posts = manager.get_social_post()
 
         assert len(posts) == 2
-        assert posts[0]['Platform'] == 'Facebook'
\ No newline at end of file
+        assert posts[0]['Platform'] == 'Facebook'
+
+    @patch('src.database.sheets_manager.gspread')
+    @patch('src.database.sheets_manager.ServiceAccountCredentials')
+    def test_worksheet_handle_is_cached(self, mock_config, mock_gspread, sample_leads):
+        mock_sheet = MagicMock()
+        mock_sheet.get_all_records.return_value = sample_leads
+        mock_sheet.row_values.return_value = SALES_HEADERS
+
+        mock_client = MagicMock()
+        mock_client.open.return_value.sheet1 = mock_sheet
+        mock_gspread.authorize.return_value = mock_client
+
+        manager = SheetsManager()
+        hits_before = manager.cache_stats()['hits']
+        manager.get_sales_leads()
+        manager.get_sales_leads()
+        manager.update_lead_status(2, 'Contacted', 1)
+
+        assert mock_client.open.call_count == 1
+        assert manager.cache_stats()['hits'] - hits_before >= 2
+
+    @patch('src.database.sheets_manager.gspread')
+    @patch('src.database.sheets_manager.ServiceAccountCredentials')
+    def test_handles_shared_across_managers(self, mock_config, mock_gspread, sample_leads):
+        mock_sheet = MagicMock()
+        mock_sheet.get_all_records.return_value = sample_leads
+        mock_client = MagicMock()
+        mock_client.open.return_value.sheet1 = mock_sheet
+        mock_gspread.authorize.return_value = mock_client
+
+        #Campaigns build a new manager per run; they should not re-authorize or re-open
+        SheetsManager().get_sales_leads()
+        SheetsManager().get_sales_leads()
+
+        assert mock_gspread.authorize.call_count == 1
+        assert mock_client.open.call_count == 1
+
+    @patch('src.database.sheets_manager.gspread')
+    @patch('src.database.sheets_manager.ServiceAccountCredentials')
+    def test_auth_error_invalidates_handle(self, mock_config, mock_gspread):
+        auth_error = Exception('Unauthorized')
+        auth_error.response = MagicMock(status_code=401)
+
+        mock_sheet = MagicMock()
+        mock_sheet.get_all_records.side_effect = [auth_error, []]
+
+        mock_client = MagicMock()
+        mock_client.open.return_value.sheet1 = mock_sheet
+        mock_gspread.authorize.return_value = mock_client
+
+        manager = SheetsManager()
+        assert manager.get_sales_leads() == []
+        manager.get_sales_leads()
+
+        assert mock_client.open.call_count == 2
+
+    @patch('src.database.sheets_manager.gspread')
+    @patch('src.database.sheets_manager.ServiceAccountCredentials')
+    def test_buffered_lead_updates(self, mock_config, mock_gspread):
+        mock_sheet = MagicMock()
+        mock_sheet.row_values.return_value = SALES_HEADERS
+        mock_client = MagicMock()
+        mock_client.open.return_value.sheet1 = mock_sheet
+        mock_gspread.authorize.return_value = mock_client
+
+        manager = SheetsManager()
+        with manager.buffered_writes():
+            for row in range(2, 12):
+                assert manager.update_lead_status(row, 'Contacted', 1) is True
+            assert mock_sheet.batch_update.call_count == 0
+
+        mock_sheet.update_cell.assert_not_called()
+        assert mock_sheet.batch_update.call_count == 1
+        ranges = mock_sheet.batch_update.call_args[0][0]
+        assert len(ranges) == 10
+        assert ranges[0]['range'] == 'E2:G2'
+
+    @patch('src.database.sheets_manager.gspread')
+    @patch('src.database.sheets_manager.ServiceAccountCredentials')
+    def test_buffered_writes_flush_on_exception(self, mock_config, mock_gspread):
+        mock_sheet = MagicMock()
+        mock_sheet.row_values.return_value = SALES_HEADERS
+        mock_client = MagicMock()
+        mock_client.open.return_value.sheet1 = mock_sheet
+        mock_gspread.authorize.return_value = mock_client
+
+        manager = SheetsManager()
+        with pytest.raises(RuntimeError):
+            with manager.buffered_writes():
+                manager.update_lead_status(2, 'Contacted')
+                raise RuntimeError('campaign crashed')
+
+        assert mock_sheet.batch_update.call_count == 1
+
+    @patch('src.database.sheets_manager.gspread')
+    @patch('src.database.sheets_manager.ServiceAccountCredentials')
+    def test_failed_flush_leaves_mirror_untouched(self, mock_config, mock_gspread, sample_leads):
+        mock_sheet = MagicMock()
+        mock_sheet.get_all_records.return_value = sample_leads
+        mock_sheet.row_values.return_value = SALES_HEADERS
+        mock_sheet.batch_update.side_effect = Exception('quota exceeded')
+        mock_client = MagicMock()
+        mock_client.open.return_value.sheet1 = mock_sheet
+        mock_gspread.authorize.return_value = mock_client
+
+        manager = SheetsManager()
+        manager.get_sales_leads()
+        with patch('src.database.sheets_manager.logger') as mock_logger:
+            with manager.buffered_writes():
+                manager.update_lead_status(2, 'Contacted', 2)
+
+        #Sheets never got the write, so neither does the mirror; the loss is logged
+        assert manager.get_sales_leads()[0]['Status'] == 'Pending'
+        assert mock_sheet.batch_update.call_count == 2
+        assert any('Unsent writes' in call.args[0] for call in mock_logger.error.call_args_list)
+
+        #Once a flush succeeds the mirror follows
+        mock_sheet.batch_update.side_effect = None
+        with manager.buffered_writes():
+            manager.update_lead_status(2, 'Contacted', 2)
+            assert manager.get_sales_leads()[0]['Status'] == 'Pending'
+        assert manager.get_sales_leads()[0]['Status'] == 'Contacted'
+
+    @patch('src.database.sheets_manager.gspread')
+    @patch('src.database.sheets_manager.ServiceAccountCredentials')
+    def test_update_fields_uses_header_index(self, mock_config, mock_gspread):
+        mock_sheet = MagicMock()
+        mock_sheet.row_values.return_value = SOCIAL_HEADERS
+        mock_client = MagicMock()
+        mock_client.open.return_value.sheet1 = mock_sheet
+        mock_gspread.authorize.return_value = mock_client
+
+        manager = SheetsManager()
+        assert manager.mark_post_as_sent(3, 'Facebook', 'fb_123') is True
+        assert manager.update_fields(4, {'Text': 'New caption', 'Date': '2025-12-01'}, sheet_name=Config.SOCIAL_SHEET_NAME) is True
+
+        assert mock_sheet.row_values.call_count == 1
+        posted = mock_sheet.batch_update.call_args_list[0][0][0]
+        assert posted == [{'range': 'G3:I3', 'values': [['Posted', posted[0]['values'][0][1], 'fb_123']]}]
+        edited = mock_sheet.batch_update.call_args_list[1][0][0]
+        assert [r['range'] for r in edited] == ['A4', 'D4']
+
+    @patch('src.database.sheets_manager.gspread')
+    @patch('src.database.sheets_manager.ServiceAccountCredentials')
+    def test_update_fields_unknown_column(self, mock_config, mock_gspread):
+        mock_sheet = MagicMock()
+        mock_sheet.row_values.return_value = SALES_HEADERS
+        mock_client = MagicMock()
+        mock_client.open.return_value.sheet1 = mock_sheet
+        mock_gspread.authorize.return_value = mock_client
+
+        manager = SheetsManager()
+        assert manager.update_fields(2, {'Missing': 'x'}) is False
+        mock_sheet.batch_update.assert_not_called()
+
+    @patch('src.database.sheets_manager.gspread')
+    @patch('src.database.sheets_manager.ServiceAccountCredentials')
+    def test_reads_served_from_mirror(self, mock_config, mock_gspread, sample_leads):
+        mock_sheet = MagicMock()
+        mock_sheet.get_all_records.return_value = sample_leads
+        mock_sheet.row_values.return_value = SALES_HEADERS
+        mock_client = MagicMock()
+        mock_client.open.return_value.sheet1 = mock_sheet
+        mock_gspread.authorize.return_value = mock_client
+
+        manager = SheetsManager()
+        manager.get_sales_leads()
+        manager.update_lead_status(3, 'Contacted', 2)
+        leads = manager.get_sales_leads()
+
+        assert mock_sheet.get_all_records.call_count == 1
+        assert leads[1]['Status'] == 'Contacted'
+        assert leads[1]['Stage'] == 2
+
+        manager.get_sales_leads(max_age=0)
+        assert mock_sheet.get_all_records.call_count == 2
+
+
+class TestSheetMirror:
+    def test_sync_only_rewrites_changed_rows(self, tmp_path, sample_leads):
+        mirror = SheetMirror(tmp_path / 'mirror.db', max_age=60)
+        assert mirror.is_stale('Sales')
+
+        first = mirror.sync('Sales', sample_leads)
+        assert first['changed'] == 2
+        assert not mirror.is_stale('Sales')
+
+        sample_leads[1]['Status'] = 'Replied'
+        second = mirror.sync('Sales', sample_leads)
+        assert second['changed'] == 1
+        assert second['revision'] == first['revision'] + 1
+
+        third = mirror.sync('Sales', sample_leads[:1])
+        assert third['removed'] == 1
+        assert len(mirror.records('Sales')) == 1
+
+    def test_delete_row_shifts_rows_up(self, tmp_path):
+        mirror = SheetMirror(tmp_path / 'mirror.db')
+        mirror.sync('Social', [{'Text': 'a'}, {'Text': 'b'}, {'Text': 'c'}])
+
+        mirror.delete_row('Social', 3)
+        mirror.append_row('Social', {'Text': 'd'})
+
+        assert [r['Text'] for r in mirror.records('Social')] == ['a', 'c', 'd']
+        assert mirror.update_row('Social', 3, {'Text': 'c2'}) is True
+        assert mirror.records('Social')[1]['Text'] == 'c2'
+
+
+class TestSQLiteBackend:
+    def test_campaign_operations(self, mock_config, sample_leads):
+        backend = SQLiteBackend()
+        backend.append_records(Config.SALES_SHEET_NAME, sample_leads)
+        manager = SheetsManager(backend=backend)
+
+        assert manager.mirror is None
+        assert [lead['Name'] for lead in manager.get_sales_leads()] == ['John Doe', 'Jane Smith']
+
+        with manager.buffered_writes():
+            assert manager.update_lead_status(2, 'Contacted', 1) is True
+        lead = manager.get_sales_leads()[0]
+        assert lead['Status'] == 'Contacted'
+        assert lead['Stage'] == 1
+
+        assert manager.update_fields(2, {'Nope': 1}) is False
+
+    def test_append_and_delete_posts(self, mock_config):
+        manager = SheetsManager(backend=SQLiteBackend())
+        sheet = Config.SOCIAL_SHEET_NAME
+
+        for text in ('first', 'second', 'third'):
+            manager.append_row(sheet, ['2025-12-01', '09:00', 'Facebook', text, '', '', 'Pending', '', ''])
+        manager.delete_row(sheet, 2)
+        manager.mark_post_as_sent(3, 'Facebook', 'fb_1')
+
+        posts = manager.get_social_post()
+        assert [p['Text'] for p in posts] == ['second', 'third']
+        assert posts[1]['Status'] == 'Posted'
+        assert posts[1]['Post ID'] == 'fb_1'
+
+    def test_import_csv(self, mock_config):
+        backend = SQLiteBackend()
+        count = backend.import_csv(
+            Config.SALES_SHEET_NAME,
+            Config.DATA_DIR / 'templates' / 'sales_leads_template.csv'
+        )
+
+        leads = backend.read_records(Config.SALES_SHEET_NAME)
+        assert count == len(leads) == 4
+        assert 'Stage' in backend.headers(Config.SALES_SHEET_NAME)
+
+
+class TestWriteBuffer:
+    def test_compile_ranges_splits_gaps(self):
+        ranges = compile_ranges({2: {5: 'a', 6: 'b', 9: 'c'}, 3: {7: 1}})
+
+        assert ranges == [
+            {'range': 'E2:F2', 'values': [['a', 'b']]},
+            {'range': 'I2', 'values': [['c']]},
+            {'range': 'G3', 'values': [[1]]},
+        ]
+
+    def test_flush_on_size_threshold(self):
+        flushed = []
+        buffer = WriteBuffer(lambda name, cells: flushed.append((name, cells)), max_pending=3)
+
+        buffer.add('Sales', 2, 5, 'x')
+        buffer.add('Sales', 2, 6, 'y')
+        assert flushed == []
+        buffer.add('Sales', 3, 5, 'z')
+
+        assert len(flushed) == 1
+        assert buffer.pending() == 0
+
+    def test_failed_flush_is_requeued(self):
+        flush = Mock(side_effect=[Exception('quota'), None])
+        buffer = WriteBuffer(flush, max_pending=100)
+
+        buffer.add('Sales', 2, 5, 'x')
+        assert buffer.flush() is False
+        assert buffer.pending() == 1
+        assert buffer.flush() is True
+        assert buffer.pending() == 0
@@ -1,9 +1,13 @@
+import json
 import pytest
 import responses
+from urllib.parse import parse_qs
+from concurrent.futures import ThreadPoolExecutor
 from unittest.mock import Mock, patch, MagicMock
 from src.social.facebook_client import FacebookClient
 from src.social.instagram_client import InstagramClient
 from src.social.base import SocialMediaBase
+from src.social.graph_batch import GraphBatch
 
 class TestSocialMediaBase:
     def test_check_limit_under(self):
@@ -43,6 +47,24 @@ class TestSocialMediaBase:
 
         assert client.daily_count == 0 
 
+    def test_reserve_post_is_atomic(self):
+        class TestClient(SocialMediaBase):
+            def post(self, text, media_path=None):
+                pass
+            def get_metrics(self, post_id):
+                pass
+        client = TestClient('Test')
+        client.daily_limit = 5
+
+        #Many workers racing for the last slots never overshoot
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            reserved = list(pool.map(lambda _: client.reserve_post(), range(20)))
+
+        assert reserved.count(True) == 5
+        assert client.daily_count == 5
+        client.release_post()
+        assert client.daily_count == 4
+
 class TestFacebookClient:
     def test_init(self, mock_config):
         client = FacebookClient()
@@ -113,4 +135,98 @@ class TestInstagramClient:
 
         assert post_id is None
 
-        
\ No newline at end of file
+    @responses.activate
+    def test_post_polls_container_until_finished(self, mock_config):
+        base = 'https://graph.facebook.com/v18.0'
+        responses.add(responses.POST, f"{base}/ig_123/media", json={'id': 'container_1'}, status=200)
+        responses.add(responses.GET, f"{base}/container_1", json={'status_code': 'IN_PROGRESS'}, status=200)
+        responses.add(responses.GET, f"{base}/container_1", json={'status_code': 'IN_PROGRESS'}, status=200)
+        responses.add(responses.GET, f"{base}/container_1", json={'status_code': 'FINISHED'}, status=200)
+        responses.add(responses.POST, f"{base}/ig_123/media_publish", json={'id': 'ig_post_1'}, status=200)
+
+        client = InstagramClient()
+        client.access_token, client.account_id = 'token', 'ig_123'
+        with patch('src.social.instagram_client.time.sleep') as mock_sleep:
+            post_id = client.post('Test post', 'https://example.com/image.jpg')
+
+        assert post_id == 'ig_post_1'
+        assert client.daily_count == 1
+        #Backs off between polls instead of a fixed wait
+        delays = [call.args[0] for call in mock_sleep.call_args_list]
+        assert delays == [mock_config.INSTAGRAM_POLL_INITIAL, mock_config.INSTAGRAM_POLL_INITIAL * 2]
+        assert responses.calls[-1].request.body == 'creation_id=container_1&access_token=token'
+
+    @responses.activate
+    def test_post_container_error_not_published(self, mock_config):
+        base = 'https://graph.facebook.com/v18.0'
+        responses.add(responses.POST, f"{base}/ig_123/media", json={'id': 'container_2'}, status=200)
+        responses.add(responses.GET, f"{base}/container_2", json={'status_code': 'ERROR'}, status=200)
+
+        client = InstagramClient()
+        client.access_token, client.account_id = 'token', 'ig_123'
+        with patch('src.social.instagram_client.time.sleep'):
+            post_id = client.post('Test post', 'https://example.com/clip.mp4')
+
+        assert post_id is None
+        assert client.daily_count == 0
+        #Videos go up as reels
+        assert 'media_type=REELS' in responses.calls[0].request.body
+        assert 'video_url=' in responses.calls[0].request.body
+
+
+class TestGraphBatch:
+    def graph_server(self, fail=(), flaky=()):
+        #Stands in for the Graph batch endpoint, answering each sub-request by post id
+        seen = {'batches': [], 'flaky': set()}
+
+        def callback(request):
+            batch = json.loads(parse_qs(request.body)['batch'][0])
+            seen['batches'].append(len(batch))
+            replies = []
+            for item in batch:
+                post_id = item['relative_url'].split('?')[0]
+                if post_id in fail:
+                    replies.append({'code': 400, 'body': json.dumps({'error': {'message': 'Unsupported get request'}})})
+                elif post_id in flaky and post_id not in seen['flaky']:
+                    seen['flaky'].add(post_id)
+                    replies.append(None)
+                else:
+                    body = {'likes': {'summary': {'total_count': int(post_id.split('_')[1])}}, 'shares': {'count': 1}}
+                    replies.append({'code': 200, 'body': json.dumps(body)})
+            return (200, {}, json.dumps(replies))
+
+        responses.add_callback(responses.POST, 'https://graph.facebook.com/v18.0/', callback=callback)
+        return seen
+
+    @responses.activate
+    def test_chunks_of_fifty(self, mock_config):
+        seen = self.graph_server()
+        post_ids = [f"post_{i}" for i in range(120)]
+
+        client = FacebookClient()
+        metrics = client.get_metrics_batch(post_ids)
+
+        assert sorted(seen['batches']) == [20, 50, 50]
+        assert metrics['post_7'] == {'likes': 7, 'comments': 0, 'shares': 1}
+        assert len(metrics) == 120
+
+    @responses.activate
+    def test_partial_failures_and_retries(self, mock_config):
+        seen = self.graph_server(fail={'post_2'}, flaky={'post_3'})
+
+        batch = GraphBatch('token', sleep=lambda seconds: None)
+        bodies = batch.get([f"post_{i}?fields=likes" for i in range(5)])
+
+        #The bad id fails alone, the timed-out one is retried in a second call
+        assert bodies['post_2?fields=likes'] is None
+        assert bodies['post_3?fields=likes']['likes']['summary']['total_count'] == 3
+        assert seen['batches'] == [5, 1]
+        assert batch.stats()['failed'] == 1
+
+    @responses.activate
+    def test_whole_batch_error_marks_posts_failed(self, mock_config):
+        responses.add(responses.POST, 'https://graph.facebook.com/v18.0/', json={'error': 'Invalid token'}, status=400)
+
+        client = FacebookClient()
+        assert client.get_metrics_batch(['post_1', 'post_2']) == {'post_1': None, 'post_2': None}
+
@@ -0,0 +1,950 @@
+import csv
+import gzip
+import logging
+import os
+import pytest
+import queue
+import signal
+import threading
+import time
+from logging.handlers import QueueHandler, QueueListener
+from datetime import date, datetime, timedelta
+from unittest.mock import Mock
+from src.utils.rate_limiter import TokenBucket, RateLimiter
+from src.utils.quota_store import QuotaStore
+from src.utils.logger import ActivityCSVHandler, SegmentedFileHandler
+from src.utils.log_rotation import LogArchive, rotate_segment, index_activity
+from src.utils.activity_store import ActivityStore
+from src.utils.log_reader import read_lines_reverse, tail_lines, tail_csv
+from src.utils.activity_tail import ActivityTailCache
+from src.utils.events import EventBroker, ChangeFeed, format_sse
+from src.utils.response_cache import ResponseCache, make_etag
+from src.utils.bot_supervisor import BotSupervisor
+from src.utils.scheduler import EventScheduler, next_daily
+from src.utils.metrics_store import MetricsStore, refresh_interval
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+class TestTokenBucket:
+    def test_burst_then_paced(self):
+        clock = FakeClock()
+        bucket = TokenBucket(rate=2, capacity=2, clock=clock, sleep=clock.sleep)
+
+        assert bucket.try_acquire() is True
+        assert bucket.try_acquire() is True
+        assert bucket.try_acquire() is False
+
+        bucket.acquire()
+        assert clock.now == pytest.approx(0.5)
+
+    def test_acquire_timeout(self):
+        clock = FakeClock()
+        bucket = TokenBucket(rate=0.1, capacity=1, clock=clock, sleep=clock.sleep)
+        bucket.acquire()
+
+        assert bucket.acquire(timeout=1) is False
+        assert clock.now == 0
+
+    def test_rejects_non_positive_rate(self):
+        with pytest.raises(ValueError):
+            TokenBucket(rate=0)
+
+
+class TestRateLimiter:
+    def test_paces_without_a_daily_cap(self):
+        #Daily limits belong to QuotaStore, the limiter never refuses outright
+        limiter = RateLimiter('email', rate=1000, burst=10)
+
+        assert all(limiter.acquire() for _ in range(50))
+        assert 'daily_limit' not in limiter.stats()
+
+    def test_timeout(self):
+        limiter = RateLimiter('email', rate=0.01, burst=1)
+
+        assert limiter.acquire() is True
+        assert limiter.acquire(timeout=0.01) is False
+
+
+class TestQuotaStore:
+    def test_try_acquire_respects_limit(self, tmp_path):
+        store = QuotaStore(tmp_path / 'quotas.db')
+
+        assert [store.try_acquire('email', 2) for _ in range(3)] == [True, True, False]
+        assert store.used('email') == 2
+
+        store.release('email')
+        assert store.try_acquire('email', 2) is True
+
+    def test_shared_between_instances(self, tmp_path):
+        path = tmp_path / 'quotas.db'
+        QuotaStore(path).try_acquire('facebook', 5)
+
+        #A fresh process/client sees the earlier usage
+        assert QuotaStore(path).usage() == {'facebook': 1}
+
+    def test_counts_are_per_day(self, tmp_path):
+        store = QuotaStore(tmp_path / 'quotas.db')
+        yesterday = date.today() - timedelta(days=1)
+        store.set('email', 450, day=yesterday)
+
+        assert store.used('email') == 0
+        assert store.try_acquire('email', 450) is True
+
+    def test_concurrent_acquire_never_overshoots(self, tmp_path):
+        path = tmp_path / 'quotas.db'
+        QuotaStore(path)
+        results = []
+
+        def worker():
+            store = QuotaStore(path)
+            results.extend(store.try_acquire('email', 10) for _ in range(10))
+
+        threads = [threading.Thread(target=worker) for _ in range(4)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        assert results.count(True) == 10
+        assert QuotaStore(path).used('email') == 10
+
+
+def activity_record(activity_type, status, details):
+    record = logging.LogRecord('activity', logging.INFO, __file__, 0, details, None, None)
+    record.activity = (activity_type, status, details)
+    return record
+
+
+class TestActivityCSVHandler:
+    def read_rows(self, path):
+        with open(path, newline='', encoding='utf-8') as f:
+            return list(csv.reader(f))
+
+    def test_batches_until_size_reached(self, tmp_path):
+        path = tmp_path / 'activity.csv'
+        handler = ActivityCSVHandler(path, batch_size=3, flush_interval=60)
+
+        handler.handle(activity_record('Email', 'success', 'a'))
+        handler.handle(activity_record('Email', 'success', 'b'))
+        assert not path.exists()
+
+        handler.handle(activity_record('Email', 'failed', 'c'))
+        rows = self.read_rows(path)
+        assert rows[0] == ActivityCSVHandler.HEADER
+        assert [row[1:] for row in rows[1:]] == [['Email', 'success', 'a'], ['Email', 'success', 'b'], ['Email', 'failed', 'c']]
+        handler.close()
+
+    def test_ignores_plain_log_records(self, tmp_path):
+        path = tmp_path / 'activity.csv'
+        handler = ActivityCSVHandler(path, batch_size=1, flush_interval=60)
+
+        handler.handle(logging.LogRecord('root', logging.INFO, __file__, 0, 'hello', None, None))
+        handler.close()
+
+        assert not path.exists()
+
+    def test_queue_listener_drains_on_stop(self, tmp_path):
+        path = tmp_path / 'activity.csv'
+        log_queue = queue.Queue()
+        handler = ActivityCSVHandler(path, batch_size=1000, flush_interval=60)
+        listener = QueueListener(log_queue, handler)
+        listener.start()
+
+        queue_handler = QueueHandler(log_queue)
+        for i in range(50):
+            queue_handler.handle(activity_record('Facebook', 'success', f'Post ID: {i}'))
+        listener.stop()
+        handler.close()
+
+        assert len(self.read_rows(path)) == 51
+
+    def test_timer_flushes_pending_rows(self, tmp_path):
+        path = tmp_path / 'activity.csv'
+        handler = ActivityCSVHandler(path, batch_size=1000, flush_interval=0.05)
+        handler.handle(activity_record('Email', 'success', 'a'))
+
+        deadline = time.monotonic() + 2
+        while not path.exists() and time.monotonic() < deadline:
+            time.sleep(0.01)
+        handler.close()
+
+        assert len(self.read_rows(path)) == 2
+
+    def test_failed_writes_are_reported_and_capped(self, tmp_path):
+        path = tmp_path / 'activity.csv'
+        handler = ActivityCSVHandler(path, batch_size=1, flush_interval=60, max_pending=5)
+        handler.handleError = Mock()
+        path.mkdir()
+
+        for i in range(12):
+            handler.handle(activity_record('Email', 'success', f'row {i}'))
+
+        #Reported once for the whole failing stretch, and only the newest rows are held
+        assert handler.handleError.call_count == 1
+        assert handler.dropped == 7
+
+        path.rmdir()
+        handler.flush()
+        handler.close()
+        assert [row[3] for row in self.read_rows(path)[1:]] == [f'row {i}' for i in range(7, 12)]
+
+
+class TestActivityStore:
+    def test_counts_normalize_case(self, tmp_path):
+        store = ActivityStore(tmp_path / 'activity.db')
+        store.record('facebook', 'success', 'Post ID: 1')
+        store.record('Facebook', 'Failed', 'boom')
+        store.record('Email', 'success', 'To: a@example.com')
+
+        counts = store.last_24_hours()
+        assert counts['Facebook'] == {'Success': 1, 'Failed': 1}
+        assert counts['Email'] == {'Success': 1, 'Failed': 0}
+
+    def test_counts_since_excludes_old_events(self, tmp_path):
+        store = ActivityStore(tmp_path / 'activity.db')
+        now = datetime(2025, 11, 14, 12, 30)
+        store.record('Email', 'Success', timestamp=now - timedelta(hours=30))
+        store.record('Email', 'Success', timestamp=now - timedelta(hours=23, minutes=50))
+        store.record('Email', 'Success', timestamp=now - timedelta(hours=24, minutes=10))
+        store.record('Email', 'Success', timestamp=now - timedelta(minutes=5))
+
+        assert store.counts_since(now - timedelta(hours=24))['Email']['Success'] == 2
+
+    def test_day_stats_and_daily_counts(self, tmp_path):
+        store = ActivityStore(tmp_path / 'activity.db')
+        day = datetime(2025, 11, 14, 9, 0)
+        store.record('Email', 'success', timestamp=day)
+        store.record('Instagram', 'Success', timestamp=day)
+        store.record('LinkedIn', 'Success', timestamp=day + timedelta(days=1))
+
+        assert store.day_stats(day) == {'emails': 1, 'posts': 1}
+        week = store.daily_counts(day - timedelta(days=6), day + timedelta(days=1))
+        assert sorted(week) == ['2025-11-14', '2025-11-15']
+
+    def test_import_csv(self, tmp_path):
+        path = tmp_path / 'activity.csv'
+        path.write_text(
+            'Timestamp,Type,Status,Details\n'
+            '2025-11-14T09:00:00,Email,success,To: a@example.com\n'
+            '2025-11-14T09:05:00,root,INFO,not an activity row\n'
+            'garbage,Email,Success,x\n'
+            '2025-11-14T10:00:00,Instagram,Success,Post ID:1\n',
+            encoding='utf-8'
+        )
+        store = ActivityStore(tmp_path / 'activity.db')
+
+        assert store.import_csv(path) == 2
+        assert store.day_stats(datetime(2025, 11, 14)) == {'emails': 1, 'posts': 1}
+
+    def test_import_is_idempotent(self, tmp_path):
+        path = tmp_path / 'activity.csv'
+        path.write_text(
+            'Timestamp,Type,Status,Details\n'
+            '2025-11-14T09:00:00,Email,success,To: a@example.com\n'
+            '2025-11-14T09:00:00,Email,success,To: a@example.com\n'
+            '2025-11-14T10:00:00,Instagram,Success,Post ID:1\n',
+            encoding='utf-8'
+        )
+        store = ActivityStore(tmp_path / 'activity.db')
+        #Already recorded live by the logging handler
+        store.record('instagram', 'success', 'Post ID:1', datetime(2025, 11, 14, 10, 0))
+
+        assert store.import_csv(path) == 2
+        assert store.import_csv(path) == 0
+        assert store.event_count() == 3
+
+    def test_version_moves_with_new_events(self, tmp_path):
+        store = ActivityStore(tmp_path / 'activity.db')
+        assert store.version() == 0
+        store.record('Email', 'Success')
+        first = store.version()
+        store.record('Email', 'Failed')
+
+        assert store.version() > first > 0
+
+
+class TestLogReader:
+    def write_activity(self, path, count):
+        with open(path, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.writer(f)
+            writer.writerow(ActivityCSVHandler.HEADER)
+            for i in range(count):
+                writer.writerow([f'2025-11-14T09:{i // 60:02d}:{i % 60:02d}', 'Email', 'Success', f'row {i}'])
+
+    def test_tail_lines_across_blocks(self, tmp_path):
+        path = tmp_path / 'automation.log'
+        path.write_text(''.join(f'line {i}\n' for i in range(1000)), encoding='utf-8')
+
+        lines = [line for _, line in read_lines_reverse(path, chunk_size=64)]
+        assert len(lines) == 1000
+        assert lines[0] == b'line 999' and lines[-1] == b'line 0'
+
+        last, cursor = tail_lines(path, 3)
+        assert last == ['line 997', 'line 998', 'line 999']
+        older, _ = tail_lines(path, 2, before=cursor)
+        assert older == ['line 995', 'line 996']
+
+    def test_tail_csv_pages_to_the_header(self, tmp_path):
+        path = tmp_path / 'activity.csv'
+        self.write_activity(path, 25)
+
+        seen = []
+        cursor = None
+        while True:
+            rows, cursor = tail_csv(path, 10, before=cursor)
+            seen.extend(row['Details'] for row in rows)
+            if cursor is None:
+                break
+
+        assert seen == [f'row {i}' for i in reversed(range(25))]
+
+    def test_tail_csv_keeps_multiline_fields(self, tmp_path):
+        path = tmp_path / 'activity.csv'
+        self.write_activity(path, 2)
+        with open(path, 'a', newline='', encoding='utf-8') as f:
+            csv.writer(f).writerow(['2025-11-14T10:00:00', 'Facebook', 'Failed', 'Traceback\nValueError: bad'])
+
+        rows, _ = tail_csv(path, 2)
+
+        assert rows[0]['Details'] == 'Traceback\nValueError: bad'
+        assert rows[1]['Details'] == 'row 1'
+
+
+class TestLogRotation:
+    def test_activity_handler_rotates_into_indexed_segments(self, tmp_path):
+        path = tmp_path / 'activity.csv'
+        archive_dir = tmp_path / 'archive'
+        handler = ActivityCSVHandler(path, batch_size=1, flush_interval=60, max_bytes=200, archive_dir=archive_dir)
+        for i in range(20):
+            handler.handle(activity_record('Email', 'success' if i % 4 else 'failed', f'To: lead{i}@example.com'))
+        handler.close()
+
+        archive = LogArchive(path, archive_dir)
+        segments = archive.segments()
+        assert len(segments) >= 2
+        assert all(s['compressed_bytes'] > 0 and s['start'] <= s['end'] for s in segments)
+        assert archive.counts() == {'Email': {'Success': 15, 'Failed': 5}}
+        assert len(list(archive.iter_rows())) == 20
+
+    def test_counts_skip_segments_outside_window(self, tmp_path, mocker):
+        archive_dir = tmp_path / 'archive'
+        path = tmp_path / 'activity.csv'
+        for day in (10, 11, 12):
+            with open(path, 'w', newline='', encoding='utf-8') as f:
+                writer = csv.writer(f)
+                writer.writerow(ActivityCSVHandler.HEADER)
+                writer.writerow([f'2025-11-{day}T09:00:00', 'Facebook', 'Success', 'Post ID: 1'])
+                writer.writerow([f'2025-11-{day}T18:00:00', 'Facebook', 'Failed', 'boom'])
+            rotate_segment(path, archive_dir, index_activity)
+
+        opened = mocker.patch('src.utils.log_rotation.gzip.open', wraps=gzip.open)
+        archive = LogArchive(path, archive_dir)
+
+        #Day 11 is fully inside the window, day 12 only partly, day 10 not at all
+        counts = archive.counts(datetime(2025, 11, 11), datetime(2025, 11, 12, 12))
+
+        assert counts == {'Facebook': {'Success': 2, 'Failed': 1}}
+        assert opened.call_count == 1
+
+    def test_segmented_file_handler_rotates(self, tmp_path):
+        path = tmp_path / 'automation.log'
+        archive_dir = tmp_path / 'archive'
+        handler = SegmentedFileHandler(path, max_bytes=300, archive_dir=archive_dir)
+        handler.setFormatter(logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s'))
+        for i in range(20):
+            handler.handle(logging.LogRecord('root', logging.WARNING if i == 3 else logging.INFO, __file__, 0, f'message {i}', None, None))
+        handler.close()
+
+        archive = LogArchive(path, archive_dir)
+        assert sum(s['counts'].get('WARNING', 0) for s in archive.segments()) == 1
+        lines = list(archive.iter_lines())
+        assert [line.rsplit(' ', 1)[-1] for line in lines] == [str(i) for i in range(20)]
+
+    def test_processes_sharing_a_log_lose_nothing(self, tmp_path):
+        #Two handlers on one file stand in for the API and scheduler processes
+        path = tmp_path / 'automation.log'
+        archive_dir = tmp_path / 'archive'
+        handlers = [SegmentedFileHandler(path, max_bytes=300, archive_dir=archive_dir) for _ in range(2)]
+        for handler in handlers:
+            handler.setFormatter(logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s'))
+        for i in range(40):
+            handlers[i % 2].handle(logging.LogRecord('root', logging.INFO, __file__, 0, f'message {i}', None, None))
+        for handler in handlers:
+            handler.close()
+
+        archive = LogArchive(path, archive_dir)
+        lines = list(archive.iter_lines())
+        assert [line.rsplit(' ', 1)[-1] for line in lines] == [str(i) for i in range(40)]
+        assert len(archive.segments()) >= 2
+
+    def test_activity_handlers_sharing_a_file_lose_nothing(self, tmp_path):
+        path = tmp_path / 'activity.csv'
+        archive_dir = tmp_path / 'archive'
+        handlers = [
+            ActivityCSVHandler(path, batch_size=1, flush_interval=60, max_bytes=200, archive_dir=archive_dir)
+            for _ in range(2)
+        ]
+        for i in range(40):
+            handlers[i % 2].handle(activity_record('Email', 'success', f'To: lead{i}@example.com'))
+        for handler in handlers:
+            handler.close()
+
+        rows = list(LogArchive(path, archive_dir).iter_rows())
+        assert [row['Details'] for row in rows] == [f'To: lead{i}@example.com' for i in range(40)]
+
+
+class TestActivityTailCache:
+    def append(self, path, rows):
+        new = not path.exists()
+        with open(path, 'a', newline='', encoding='utf-8') as f:
+            writer = csv.writer(f)
+            if new:
+                writer.writerow(ActivityCSVHandler.HEADER)
+            writer.writerows(rows)
+
+    def row(self, when, activity_type='Email', status='Success'):
+        return [when.isoformat(), activity_type, status, 'details']
+
+    def test_reads_only_appended_rows(self, tmp_path):
+        path = tmp_path / 'activity.csv'
+        now = datetime.now()
+        self.append(path, [self.row(now), self.row(now, 'facebook', 'failed')])
+        cache = ActivityTailCache(path, archive_dir=tmp_path / 'archive')
+
+        assert cache.counts()['Email'] == {'Success': 1, 'Failed': 0}
+        assert cache.counts()['Facebook'] == {'Success': 0, 'Failed': 1}
+        assert cache.stats()['hits'] == 1
+
+        self.append(path, [self.row(now)])
+        assert cache.counts()['Email']['Success'] == 2
+        assert cache.stats()['rows_parsed'] == 3
+        assert cache.stats()['misses'] == 2
+
+    def test_window_slides(self, tmp_path):
+        path = tmp_path / 'activity.csv'
+        clock = FakeClock()
+        clock.now = datetime(2025, 11, 14, 12, 0).timestamp()
+        self.append(path, [
+            self.row(datetime(2025, 11, 13, 11, 0)),
+            self.row(datetime(2025, 11, 13, 13, 0)),
+            self.row(datetime(2025, 11, 14, 11, 0))
+        ])
+        cache = ActivityTailCache(path, archive_dir=tmp_path / 'archive', clock=clock)
+
+        assert cache.counts()['Email']['Success'] == 2
+        clock.now += 2 * 3600
+        assert cache.counts()['Email']['Success'] == 1
+
+    def test_rebuilds_after_rotation(self, tmp_path):
+        path = tmp_path / 'activity.csv'
+        archive_dir = tmp_path / 'archive'
+        now = datetime.now()
+        self.append(path, [self.row(now), self.row(now)])
+        cache = ActivityTailCache(path, archive_dir=archive_dir)
+        assert cache.counts()['Email']['Success'] == 2
+
+        rotate_segment(path, archive_dir, index_activity)
+        self.append(path, [self.row(now, 'Instagram')])
+
+        counts = cache.counts()
+        assert counts['Email']['Success'] == 2
+        assert counts['Instagram']['Success'] == 1
+        assert cache.stats()['resets'] == 1
+
+    def test_ignores_partial_trailing_row(self, tmp_path):
+        path = tmp_path / 'activity.csv'
+        self.append(path, [self.row(datetime.now())])
+        with open(path, 'a', encoding='utf-8') as f:
+            f.write(datetime.now().isoformat() + ',Email,Succ')
+        cache = ActivityTailCache(path, archive_dir=tmp_path / 'archive')
+
+        assert cache.counts()['Email']['Success'] == 1
+        with open(path, 'a', encoding='utf-8') as f:
+            f.write('ess,details\r\n')
+        assert cache.counts()['Email']['Success'] == 2
+
+    def test_on_rows_receives_new_live_rows(self, tmp_path):
+        path = tmp_path / 'activity.csv'
+        seen = []
+        cache = ActivityTailCache(path, archive_dir=tmp_path / 'archive', on_rows=seen.extend)
+        cache.refresh()
+        self.append(path, [self.row(datetime.now())])
+        cache.refresh()
+        cache.refresh()
+
+        assert len(seen) == 1
+        assert seen[0][1] == 'Email'
+
+    def test_version_follows_the_file(self, tmp_path):
+        path = tmp_path / 'activity.csv'
+        cache = ActivityTailCache(path, archive_dir=tmp_path / 'archive')
+        self.append(path, [self.row(datetime.now())])
+        first = cache.version()
+
+        assert cache.version() == first
+        self.append(path, [self.row(datetime.now())])
+        assert cache.version() != first
+
+    def test_on_rows_skips_rows_from_before_first_load(self, tmp_path):
+        path = tmp_path / 'activity.csv'
+        self.append(path, [self.row(datetime.now() - timedelta(days=3)) for _ in range(500)])
+        seen = []
+        cache = ActivityTailCache(path, archive_dir=tmp_path / 'archive', on_rows=seen.extend)
+
+        cache.refresh()
+        assert seen == []
+        self.append(path, [self.row(datetime.now())])
+        cache.refresh()
+        assert len(seen) == 1
+
+
+class TestEventBroker:
+    def test_fans_out_to_every_subscriber(self):
+        broker = EventBroker()
+        subscriptions = [broker.subscribe() for _ in range(50)]
+        broker.publish('quotas', {'email': 1})
+
+        events = [s.get(timeout=1) for s in subscriptions]
+        assert all(e['event'] == 'quotas' and e['data'] == {'email': 1} for e in events)
+        assert broker.stats()['subscribers'] == 50
+
+    def test_slow_subscriber_gets_resync(self):
+        broker = EventBroker(max_pending=3)
+        slow = broker.subscribe()
+        for n in range(10):
+            broker.publish('activity', n)
+
+        events = [slow.get(timeout=0) for _ in range(3)]
+        assert events[-1]['event'] == 'resync'
+        assert slow.get(timeout=0) is None
+        assert slow.dropped > 0
+
+    def test_replays_from_last_event_id(self):
+        broker = EventBroker(history=10)
+        for n in range(5):
+            broker.publish('activity', n)
+
+        subscription = broker.subscribe(last_event_id=3)
+        assert [subscription.get(timeout=0)['data'] for _ in range(2)] == [3, 4]
+
+    def test_resync_when_gap_outlived_history(self):
+        broker = EventBroker(history=3)
+        for n in range(10):
+            broker.publish('activity', n)
+
+        subscription = broker.subscribe(last_event_id=2)
+        assert subscription.get(timeout=0)['event'] == 'resync'
+
+    def test_unsubscribe_and_format(self):
+        broker = EventBroker()
+        subscription = broker.subscribe()
+        subscription.close()
+        event = broker.publish('posts', {'changed': []})
+
+        assert subscription.get(timeout=0) is None
+        assert format_sse(event) == 'id: 1\nevent: posts\ndata: {"changed": []}\n\n'
+
+
+class TestChangeFeed:
+    def test_poll_publishes_deltas(self):
+        broker = EventBroker()
+        subscription = broker.subscribe()
+        calls = []
+
+        def source():
+            calls.append(1)
+            return [('activity', len(calls))] if len(calls) == 1 else []
+
+        feed = ChangeFeed(broker, {'activity': source})
+        feed.poll()
+        feed.poll()
+
+        assert len(calls) == 2
+        assert subscription.get(timeout=0)['data'] == 1
+        assert subscription.get(timeout=0) is None
+
+    def test_failing_source_does_not_stop_others(self):
+        broker = EventBroker()
+        subscription = broker.subscribe()
+
+        def broken():
+            raise RuntimeError('boom')
+
+        feed = ChangeFeed(broker, {'broken': broken, 'ok': lambda: [('quotas', {})]})
+        feed.poll()
+        assert subscription.get(timeout=0)['event'] == 'quotas'
+
+    def test_start_is_idempotent(self):
+        broker = EventBroker()
+        subscription = broker.subscribe()
+        feed = ChangeFeed(broker, {'tick': lambda: [('quotas', {})]}, interval=0.01)
+        feed.start()
+        feed.start()
+        try:
+            assert subscription.get(timeout=2)['event'] == 'quotas'
+            assert feed.stats()['running'] is True
+        finally:
+            feed.stop()
+        assert feed.stats()['running'] is False
+
+
+class TestResponseCache:
+    def test_reuses_body_until_version_changes(self):
+        cache = ResponseCache()
+        key = ('get_quotas', (), ())
+        etag = cache.put(key, 1, b'{"used": 1}')
+
+        assert cache.get(key, 1) == (etag, b'{"used": 1}', 'application/json')
+        assert cache.get(key, 2) is None
+        assert cache.stats()['hits'] == 1
+
+    def test_etag_is_content_hash(self):
+        cache = ResponseCache()
+        first = cache.put(('a', (), ()), 1, b'[]')
+        second = cache.put(('a', (), ()), 2, b'[]')
+
+        assert first == second == make_etag(b'[]')
+        assert first != make_etag(b'[1]')
+
+    def test_unknown_version_is_not_stored(self):
+        cache = ResponseCache()
+        cache.put(('a', (), ()), None, b'[]')
+
+        assert cache.get(('a', (), ()), None) is None
+        assert cache.stats()['entries'] == 0
+        assert cache.stats()['bypassed'] == 1
+
+    def test_evicts_least_recently_used(self):
+        cache = ResponseCache(max_entries=2)
+        cache.put(('a', (), ()), 1, b'a')
+        cache.put(('b', (), ()), 1, b'b')
+        cache.get(('a', (), ()), 1)
+        cache.put(('c', (), ()), 1, b'c')
+
+        assert cache.get(('b', (), ()), 1) is None
+        assert cache.get(('a', (), ()), 1) is not None
+
+    def test_invalidate_one_endpoint(self):
+        cache = ResponseCache()
+        cache.put(('a', (('limit', '5'),), ()), 1, b'a')
+        cache.put(('b', (), ()), 1, b'b')
+        cache.invalidate('a')
+
+        assert cache.get(('a', (('limit', '5'),), ()), 1) is None
+        assert cache.get(('b', (), ()), 1) is not None
+
+
+class TestBotSupervisor:
+    @pytest.fixture
+    def supervisor(self, tmp_path):
+        script = tmp_path / 'fake_scheduler.py'
+        script.write_text('import time\ntime.sleep(60)\n')
+        supervisor = BotSupervisor(script, pid_file=tmp_path / 'bot.pid', status_ttl=60)
+        yield supervisor
+        supervisor.stop(timeout=1)
+
+    def test_start_status_stop(self, supervisor):
+        pid = supervisor.start()
+        status = supervisor.status()
+
+        assert status['running'] is True
+        assert status['pid'] == pid
+        assert supervisor.stop(timeout=5) == 1
+        assert supervisor.status()['running'] is False
+        assert not supervisor.pid_file.exists()
+
+    def test_status_is_cached_and_tracked_without_scanning(self, supervisor):
+        supervisor.start()
+        for _ in range(5):
+            assert supervisor.is_running()
+
+        stats = supervisor.stats()
+        assert stats['scans'] == 0
+        assert stats['lookups'] == 1
+        assert stats['cache_hits'] == 4
+
+    def test_recycled_pid_is_not_the_bot(self, supervisor):
+        supervisor.pid_file.write_text('{"pid": %d, "create_time": 1.0}' % os.getpid())
+
+        assert supervisor.is_running() is False
+        assert supervisor.is_running() is False
+        assert supervisor.stats()['scans'] == 1
+        assert not supervisor.pid_file.exists()
+
+    def test_adopts_bot_found_by_scan(self, supervisor):
+        supervisor.start()
+        supervisor.pid_file.unlink()
+        supervisor.invalidate()
+        assert supervisor.is_running() is True
+        supervisor.invalidate()
+        assert supervisor.is_running() is True
+
+        assert supervisor.stats()['scans'] == 1
+
+    def write_script(self, tmp_path, body):
+        script = tmp_path / 'fake_scheduler.py'
+        script.write_text(body)
+        return script
+
+    def wait_for(self, condition, timeout=10):
+        deadline = time.monotonic() + timeout
+        while not condition():
+            assert time.monotonic() < deadline
+            time.sleep(0.02)
+
+    def test_drains_output_beyond_pipe_buffer(self, tmp_path):
+        #~1 MB of output would block a child whose pipe nobody reads
+        script = self.write_script(tmp_path, (
+            'import sys, time\n'
+            'for i in range(20000):\n'
+            '    print("line", i, "x" * 40)\n'
+            'print("done", file=sys.stderr)\n'
+            'time.sleep(60)\n'
+        ))
+        supervisor = BotSupervisor(script, pid_file=tmp_path / 'bot.pid', output_lines=100, auto_restart=False)
+        try:
+            supervisor.start()
+            self.wait_for(lambda: supervisor.output(1)[0] == ['done'])
+
+            lines, cursor = supervisor.output(10)
+            assert lines[-2].startswith('line 19999')
+            older, _ = supervisor.output(5, before=cursor)
+            assert older[-1].startswith('line 19990')
+            assert supervisor.stats()['output_lines'] == 100
+        finally:
+            supervisor.stop(timeout=1)
+
+    def test_restarts_after_crash_with_backoff(self, tmp_path):
+        script = self.write_script(tmp_path, 'import sys\nprint("boom")\nsys.exit(3)\n')
+        supervisor = BotSupervisor(script, pid_file=tmp_path / 'bot.pid', backoff=0.05, max_delay=0.2)
+        try:
+            supervisor.start()
+            self.wait_for(lambda: supervisor.restarts >= 3)
+
+            assert supervisor.last_exit_code == 3
+            lines, _ = supervisor.output(100)
+            assert 'boom' in lines
+            assert any('restarting in' in line for line in lines)
+        finally:
+            supervisor.stop(timeout=1)
+
+    @pytest.mark.skipif(not hasattr(signal, 'SIGUSR1'), reason='no SIGUSR1 on this platform')
+    def test_wake_waits_until_bot_is_ready(self, tmp_path):
+        #Slow imports before the handler: an early SIGUSR1 would kill the bot
+        script = self.write_script(tmp_path, (
+            'import os, signal, time\n'
+            'time.sleep(0.3)\n'
+            'signal.signal(signal.SIGUSR1, lambda *args: print("woke", flush=True))\n'
+            'open(os.environ["BOT_READY_FILE"], "w").write(str(os.getpid()))\n'
+            'print("ready", flush=True)\n'
+            'time.sleep(60)\n'
+        ))
+        supervisor = BotSupervisor(script, pid_file=tmp_path / 'bot.pid', status_ttl=0, auto_restart=False)
+        try:
+            supervisor.start()
+            assert supervisor.wake() is False
+            self.wait_for(lambda: 'ready' in supervisor.output(10)[0])
+
+            assert supervisor.wake() is True
+            self.wait_for(lambda: 'woke' in supervisor.output(10)[0])
+            assert supervisor.is_running() is True
+            assert supervisor.restarts == 0
+        finally:
+            supervisor.stop(timeout=1)
+
+    def test_stop_cancels_pending_restart(self, tmp_path):
+        script = self.write_script(tmp_path, 'import sys\nsys.exit(1)\n')
+        supervisor = BotSupervisor(script, pid_file=tmp_path / 'bot.pid', backoff=60)
+        supervisor.start()
+        self.wait_for(lambda: supervisor.restart_pending)
+
+        supervisor.stop(timeout=1)
+        assert supervisor.restart_pending is False
+        assert supervisor.restarts == 0
+        assert supervisor.is_running() is False
+
+
+class TestEventScheduler:
+    def test_runs_jobs_in_deadline_order_and_reschedules(self):
+        clock = FakeClock()
+        clock.now = 1000.0
+        scheduler = EventScheduler(clock=clock)
+        ran = []
+        scheduler.every(10, lambda: ran.append('fast'), name='fast')
+        scheduler.every(25, lambda: ran.append('slow'), name='slow')
+
+        assert scheduler.next_run() == 1010.0
+        clock.now = 1030.0
+        assert scheduler.run_pending() == 2
+        assert ran == ['fast', 'slow']
+        #Missed occurrences are skipped, not replayed
+        assert scheduler.jobs['fast'].next_run == 1040.0
+
+    def test_records_lateness(self):
+        clock = FakeClock()
+        scheduler = EventScheduler(clock=clock)
+        scheduler.once(100.0, lambda: None, name='post')
+        clock.now = 102.5
+        scheduler.run_pending()
+
+        stats = scheduler.stats()
+        assert stats['runs'] == 1
+        assert stats['max_lateness'] == 2.5
+        assert 'post' not in scheduler.jobs
+
+    def test_once_moves_existing_job_and_cancel(self):
+        clock = FakeClock()
+        scheduler = EventScheduler(clock=clock)
+        ran = []
+        scheduler.once(50.0, lambda: ran.append(1), name='post')
+        scheduler.once(80.0, lambda: ran.append(2), name='post')
+        scheduler.once(60.0, lambda: ran.append(3), name='other')
+        scheduler.cancel('other')
+
+        clock.now = 70.0
+        assert scheduler.run_pending() == 0
+        clock.now = 80.0
+        assert scheduler.run_pending() == 1
+        assert ran == [2]
+
+    def test_failing_job_is_counted_and_kept(self):
+        clock = FakeClock()
+        scheduler = EventScheduler(clock=clock)
+
+        def broken():
+            raise RuntimeError('boom')
+
+        scheduler.every(10, broken)
+        clock.now = 10.0
+        scheduler.run_pending()
+        assert scheduler.jobs['broken'].failures == 1
+        assert scheduler.jobs['broken'].next_run == 20.0
+
+    def test_next_daily(self):
+        now = datetime(2025, 11, 14, 10, 0).timestamp()
+        assert next_daily('09:00', now) == datetime(2025, 11, 15, 9, 0).timestamp()
+        assert next_daily('18:00', now) == datetime(2025, 11, 14, 18, 0).timestamp()
+
+    def test_sleeps_until_deadline_and_wakes_early(self, tmp_path):
+        woken = threading.Event()
+        scheduler = EventScheduler(stats_path=tmp_path / 'stats.json', on_wake=woken.set)
+        ran = threading.Event()
+        scheduler.once(time.time() + 0.2, ran.set, name='soon')
+        scheduler.every(3600, lambda: None, name='hourly')
+        thread = threading.Thread(target=scheduler.run_forever, daemon=True)
+        thread.start()
+        try:
+            assert ran.wait(5)
+            scheduler.wake()
+            assert woken.wait(5)
+            assert scheduler.stats()['max_lateness'] < 1
+            assert (tmp_path / 'stats.json').exists()
+        finally:
+            scheduler.stop()
+            thread.join(5)
+        assert not thread.is_alive()
+
+
+    @pytest.mark.skipif(not hasattr(signal, 'SIGALRM') or not hasattr(signal, 'SIGUSR1'), reason='needs POSIX signals')
+    def test_signal_wake_while_scheduler_holds_its_locks(self):
+        #The API signals the bot on every post edit, so SIGUSR1 lands in the main thread mid-sleep,
+        #mid-_add() and with the job lock held; the handler must never wait on any of them
+        scheduler = EventScheduler(max_sleep=0.001)
+        woken = []
+        scheduler.on_wake = lambda: woken.append(1)
+        pid = os.getpid()
+
+        def reschedule():
+            with scheduler._lock:
+                os.kill(pid, signal.SIGUSR1)
+                scheduler.once(time.time() + 0.0005, lambda: None, name='post')
+        scheduler.every(0.0005, reschedule)
+
+        def send():
+            for _ in range(2000):
+                os.kill(pid, signal.SIGUSR1)
+                time.sleep(0.0002)
+            scheduler.stop()
+
+        def timed_out(signum, frame):
+            raise TimeoutError('scheduler deadlocked in its wake handler')
+
+        previous = signal.signal(signal.SIGUSR1, lambda signum, frame: scheduler.wake())
+        previous_alarm = signal.signal(signal.SIGALRM, timed_out)
+        signal.alarm(20)
+        sender = threading.Thread(target=send, daemon=True)
+        held, release = threading.Event(), threading.Event()
+
+        def hold_lock():
+            with scheduler._lock:
+                held.set()
+                release.wait(5)
+        holder = threading.Thread(target=hold_lock, daemon=True)
+        try:
+            #A wake that needed the job lock would block here until the alarm fires
+            holder.start()
+            assert held.wait(5)
+            signal.raise_signal(signal.SIGUSR1)
+            release.set()
+            holder.join(5)
+            assert scheduler._wake_requested
+
+            sender.start()
+            scheduler.run_forever()
+        finally:
+            signal.alarm(0)
+            signal.signal(signal.SIGALRM, previous_alarm)
+            signal.signal(signal.SIGUSR1, previous)
+            sender.join(5)
+        assert woken
+        assert scheduler.jobs['reschedule'].runs > 0
+
+class TestMetricsStore:
+    def test_refresh_interval_decays_with_age(self):
+        assert refresh_interval(timedelta(hours=1)) == 3600
+        assert 3600 < refresh_interval(timedelta(days=2)) < 86400
+        assert refresh_interval(timedelta(days=7)) == 86400
+        assert refresh_interval(timedelta(days=60)) is None
+
+    def test_due_follows_cadence(self, tmp_path):
+        store = MetricsStore(tmp_path / 'metrics.db')
+        now = datetime(2025, 11, 14, 12, 0)
+        posts = [
+            ('facebook', 'new', now - timedelta(hours=3)),
+            ('facebook', 'week', now - timedelta(days=8)),
+            ('instagram', 'stale', now - timedelta(days=45))
+        ]
+        assert store.due(posts, now) == [('facebook', 'new'), ('facebook', 'week')]
+
+        store.record('new', {'likes': 3}, timestamp=now)
+        store.record('week', {'likes': 9}, timestamp=now)
+        assert store.due(posts, now + timedelta(minutes=30)) == []
+        assert store.due(posts, now + timedelta(hours=1)) == [('facebook', 'new')]
+        assert store.due(posts, now + timedelta(days=1)) == [('facebook', 'new'), ('facebook', 'week')]
+
+    def test_totals_use_latest_sample_per_post(self, tmp_path):
+        store = MetricsStore(tmp_path / 'metrics.db')
+        now = datetime(2025, 11, 14, 12, 0)
+        store.due([('facebook', 'a', now), ('facebook', 'b', now), ('instagram', 'c', now)], now)
+        store.record('a', {'likes': 2, 'comments': 1}, timestamp=now)
+        store.record('a', {'likes': 5, 'comments': 1}, timestamp=now + timedelta(hours=1))
+        store.record('b', {'likes': 1, 'shares': 4}, timestamp=now)
+        store.record('c', {'reach': 40, 'saved': 2}, timestamp=now)
+
+        assert [value for _, _, value in store.history('a', 'likes')] == [2, 5]
+        assert store.engagement() == [
+            {'platform': 'Facebook', 'likes': 6, 'comments': 1, 'shares': 4},
+            {'platform': 'Instagram', 'likes': 0, 'comments': 0, 'shares': 0, 'reach': 40, 'saved': 2}
+        ]
+        assert store.version() == (now + timedelta(hours=1)).isoformat()
+